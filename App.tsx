@@ -1,14 +1,19 @@
-import React, { useCallback, useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import { StatusBar, StyleSheet, useColorScheme, View } from 'react-native';
 
 // API
-import { fetchRecommendations } from './frontend/api/recommendations';
+import {
+  fetchRecommendationsBatch,
+  fetchRecommendationsPage,
+  streamRecommendations,
+} from './frontend/api/recommendations';
 
 // Types
 import { Product } from './frontend/types/products';
 type APIResponse = {
   query: string;
   products: Product[];
+  next_cursor: string | null;
 };
 // Mock data
 // import {
@@ -21,6 +26,13 @@ import { HomeScreen } from './frontend/components/screens/HomeScreen';
 import { ResultsScreen } from './frontend/components/screens/ResultsScreen';
 import { WelcomeScreen } from './frontend/components/screens/WelcomeScreen';
 
+type PrefetchedResponse = APIResponse & { fetchedAt: number };
+
+// Prefetched results go stale (prices change, and the backend forgets a
+// next_cursor after RECOMMENDATION_CURSOR_TTL_S, 30 min by default);
+// older entries are dropped and the query is searched again
+const PREFETCH_TTL_MS = 10 * 60 * 1000;
+
 type AppScreen = 'onboarding' | 'home' | 'results';
 type ProductSelection = 'like' | 'dislike' | null;
 
@@ -61,6 +73,20 @@ function AppContent() {
   const [searchQuery, setSearchQuery] = useState('');
   const [products, setProducts] = useState<Product[]>([]);
   const [isSearchLoading, setIsSearchLoading] = useState(false);
+  // True while a streamed search is still filling in products
+  const [isResultsUpdating, setIsResultsUpdating] = useState(false);
+  const searchStream = useRef<ReturnType<typeof streamRecommendations> | null>(
+    null,
+  );
+  // Cursor for the next page of the current results (null when there are no more)
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const loadingMore = useRef(false);
+  // Bumped by every search so a late page is not appended to newer results
+  const resultsVersion = useRef(0);
+  // Results for the popular queries, fetched ahead of time in one batch request
+  const [prefetchedResults, setPrefetchedResults] = useState<
+    Record<string, PrefetchedResponse>
+  >({});
 
   // ----------------------- Search -----------------------
   const handleSearch = useCallback(
@@ -68,10 +94,44 @@ function AppContent() {
       const trimmed = rawQuery.trim();
       if (!trimmed) return;
 
-      try {
-        setIsSearchLoading(true);
+      resultsVersion.current += 1;
+      // A search still streaming in would otherwise overwrite these results
+      searchStream.current?.cancel();
+      searchStream.current = null;
+
+      const prefetched = prefetchedResults[trimmed];
+      if (prefetched && Date.now() - prefetched.fetchedAt > PREFETCH_TTL_MS) {
+        setPrefetchedResults(current => {
+          const fresh = { ...current };
+          delete fresh[trimmed];
+          return fresh;
+        });
+      } else if (prefetched) {
+        setIsSearchLoading(false);
+        setIsResultsUpdating(false);
         setSearchQuery(trimmed);
-        const response: APIResponse = await fetchRecommendations(trimmed);
+        setProducts(prefetched.products);
+        setNextCursor(prefetched.next_cursor);
+        navigateToResults();
+        return;
+      }
+
+      setIsSearchLoading(true);
+      setSearchQuery(trimmed);
+      setNextCursor(null);
+
+      // Show the results screen as soon as the retrieved products arrive;
+      // prices and images fill in as each product is enriched
+      const stream = streamRecommendations(trimmed, current => {
+        setProducts(current);
+        setIsSearchLoading(false);
+        setIsResultsUpdating(true);
+        navigateToResults();
+      });
+      searchStream.current = stream;
+
+      try {
+        const response: APIResponse = await stream.done;
 
         // console.log('=== API RESPONSE ===');
         // console.log('Full response:', JSON.stringify(response, null, 2));
@@ -85,17 +145,60 @@ function AppContent() {
         // console.log('===================');
 
         setProducts(response.products ?? []);
+        setNextCursor(response.next_cursor ?? null);
         navigateToResults();
       } catch (e) {
+        // A newer search (or leaving the results) cancelled this one
+        if (e instanceof Error && e.name === 'AbortError') return;
         console.error('Search failed:', e);
         // TODO: Show user-friendly error message
       } finally {
-        setIsSearchLoading(false);
+        // A newer search owns the loading state once it has replaced this one
+        if (searchStream.current === stream) {
+          searchStream.current = null;
+          setIsSearchLoading(false);
+          setIsResultsUpdating(false);
+        }
       }
     },
-    [navigateToResults],
+    [navigateToResults, prefetchedResults],
   );
 
+  // Append the next page when the list is scrolled to the end
+  const handleLoadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore.current || searchStream.current) return;
+    loadingMore.current = true;
+    const version = resultsVersion.current;
+
+    try {
+      const page: APIResponse = await fetchRecommendationsPage(nextCursor);
+      if (resultsVersion.current !== version) return;
+      setProducts(current => {
+        const shown = new Set(current.map(product => product.id));
+        return [
+          ...current,
+          ...page.products.filter(product => !shown.has(product.id)),
+        ];
+      });
+      setNextCursor(page.next_cursor);
+    } catch (e) {
+      if (e instanceof Error && e.name === 'CursorExpiredError') {
+        // The saved ranking is gone; keep what is shown and stop paging
+        if (resultsVersion.current === version) setNextCursor(null);
+      } else {
+        console.error('Loading more results failed:', e);
+      }
+    } finally {
+      loadingMore.current = false;
+    }
+  }, [nextCursor]);
+
+  const handleResultsBack = useCallback(() => {
+    // Stop enriching products nobody will see
+    searchStream.current?.cancel();
+    navigateToHome();
+  }, [navigateToHome]);
+
   // ----------------------- Product interactions -----------------------
   // TODO: Implement product selection handler
   const handleProductSelection = useCallback(
@@ -129,7 +232,25 @@ function AppContent() {
 
     const loadPopularQueries = async () => {
       const queries = await fetchPopularQueries();
-      if (!cancelled) setPopularQueries(queries);
+      if (cancelled) return;
+      setPopularQueries(queries);
+
+      try {
+        const results: APIResponse[] = await fetchRecommendationsBatch(queries);
+        if (cancelled) return;
+        const fetchedAt = Date.now();
+        const byQuery: Record<string, PrefetchedResponse> = {};
+        queries.forEach((query, idx) => {
+          byQuery[query] = {
+            ...(results[idx] ?? { query, products: [], next_cursor: null }),
+            fetchedAt,
+          };
+        });
+        setPrefetchedResults(byQuery);
+      } catch (e) {
+        // Selecting a popular query falls back to a regular search
+        console.warn('Prefetching popular queries failed:', e);
+      }
     };
 
     loadPopularQueries();
@@ -158,7 +279,9 @@ function AppContent() {
       <ResultsScreen
         initialQuery={searchQuery}
         products={products}
-        onBack={navigateToHome}
+        isUpdating={isResultsUpdating}
+        onBack={handleResultsBack}
+        onEndReached={handleLoadMore}
         onProductClick={handleProductClick}
         updateSelections={handleProductSelection}
       />
@@ -1,65 +1,586 @@
+import asyncio
+import json
 import os
-from contextlib import asynccontextmanager
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from functools import partial
 from pathlib import Path
+from typing import List, Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Body, HTTPException
+from fastapi import FastAPI, Body, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from services.vector_store import get_vector_store
-from services.retrieval import retrieve_top_products
-from services.enrichment import get_enriched_products
-from services.format_answer import format_recommendation_response
+from services.vector_store import get_vector_store, load_index
+from services.index_manifest import index_is_current, sync_index
+from services.retrieval import (
+    RETRIEVAL_MODE,
+    embed_queries,
+    documents_by_id,
+    get_retrieval_stats,
+    retrieve_ranked_products,
+    retrieve_ranked_products_batch,
+)
+from services.lexical_index import load_lexical_index
+from services.metadata_filter import MetadataIndex, filter_key
+from services.enrichment import (
+    add_invalidation_listener,
+    get_enriched_products,
+    get_enriched_products_async,
+    get_enrichment_cache,
+    get_enrichment_stats,
+    iter_enriched_products_async,
+    shutdown_refreshes,
+    unenriched_products,
+)
+from services.format_answer import format_product, format_recommendation_response, sort_products
+from services.http_client import close_async_session, close_session
+from services.response_cache import ResponseCache
+from services.result_cursors import ResultCursors
+from services.embedding_cache import CachedQueryEmbeddings
+from services.embedding_backends import warm_up
 
 # Base paths
 BASE_DIR = Path(__file__).resolve().parents[1]
 CSV_DATA_PATH = BASE_DIR / "data" / "csv" / "beautyProducts.csv"
 FAISS_INDEX_DIR = BASE_DIR / "vectorstores" / "faiss_beauty"
 
+# Full-response cache (semantic tier reuses answers for near-identical queries; 0 disables it)
+RESPONSE_CACHE_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "512"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "900"))
+RESPONSE_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SEMANTIC_THRESHOLD", "0.95"))
+
+# Most queries accepted by one /api/recommendations/batch call
+RECOMMENDATION_BATCH_MAX_QUERIES = int(os.getenv("RECOMMENDATION_BATCH_MAX_QUERIES", "32"))
+
+# Results per page; later pages reuse the ranking saved under a cursor instead of searching again
+RECOMMENDATION_PAGE_SIZE = int(os.getenv("RECOMMENDATION_PAGE_SIZE", "5"))
+RECOMMENDATION_MAX_RESULTS = int(os.getenv("RECOMMENDATION_MAX_RESULTS", "50"))
+RECOMMENDATION_CURSOR_ENTRIES = int(os.getenv("RECOMMENDATION_CURSOR_ENTRIES", "1024"))
+RECOMMENDATION_CURSOR_TTL_S = float(os.getenv("RECOMMENDATION_CURSOR_TTL_S", "1800"))
+# Enrich the next page in the background while the client shows the current one
+RECOMMENDATION_PREFETCH = os.getenv("RECOMMENDATION_PREFETCH", "true").lower() in ("1", "true", "yes")
+
+# Threads for query embedding and index search, kept off the event loop and the default pool
+EMBEDDING_EXECUTOR_WORKERS = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "2"))
+# How often a running recommendation checks whether its client is still connected
+CLIENT_DISCONNECT_POLL_S = float(os.getenv("CLIENT_DISCONNECT_POLL_S", "0.25"))
+
+# Serializes on-demand index syncs
+_index_sync_lock = threading.Lock()
+
+# Background next-page enrichments (strong references so they are not garbage collected mid-run)
+_prefetch_tasks = set()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize and manage the vector store lifecycle."""
+    """Initialize and manage the vector store and cache lifecycle."""
     app.state.vector_store = get_vector_store(
         csv_path=str(CSV_DATA_PATH),
         faiss_dir=str(FAISS_INDEX_DIR)
     )
+    # Brand / product type postings for filtered searches
+    app.state.metadata_index = MetadataIndex.from_vector_store(app.state.vector_store)
+    # BM25 postings saved next to the FAISS index (hybrid retrieval only)
+    app.state.lexical_index = (
+        load_lexical_index(str(FAISS_INDEX_DIR), app.state.vector_store)
+        if RETRIEVAL_MODE == "hybrid" else None
+    )
+    # Pay model lazy-initialization cost now rather than on the first request
+    warm_up(app.state.vector_store.embeddings)
+    app.state.enrichment_cache = get_enrichment_cache()
+
+    # Responses are built from the index loaded above; drop any that include re-enriched products
+    app.state.response_cache = ResponseCache(
+        max_entries=RESPONSE_CACHE_ENTRIES,
+        ttl_s=RESPONSE_CACHE_TTL_S or None,
+        semantic_threshold=RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+    )
+    add_invalidation_listener(app.state.response_cache.invalidate_products)
+    app.state.result_cursors = ResultCursors(
+        max_entries=RECOMMENDATION_CURSOR_ENTRIES,
+        ttl_s=RECOMMENDATION_CURSOR_TTL_S or None,
+    )
+    app.state.embedding_executor = ThreadPoolExecutor(
+        max_workers=max(1, EMBEDDING_EXECUTOR_WORKERS),
+        thread_name_prefix="embed",
+    )
     yield
+    for task in list(_prefetch_tasks):
+        task.cancel()
+    app.state.embedding_executor.shutdown(wait=False, cancel_futures=True)
+    if isinstance(app.state.vector_store.embeddings, CachedQueryEmbeddings):
+        app.state.vector_store.embeddings.save()
+    shutdown_refreshes()
+    app.state.enrichment_cache.close()
+    close_session()
+    await close_async_session()
 
 
 app = FastAPI(title="Product RAG API", lifespan=lifespan)
 
 
 @app.post("/api/recommendations")
-def recommend_products(user_query: str = Body(..., embed=False)):
-    """Main endpoint for product recommendations using RAG pipeline."""
-    try:
-        
-        # Get pre-initialized vector store
-        vector_store = app.state.vector_store
+async def recommend_products(
+    request: Request,
+    user_query: str = Body(..., embed=False),
+    brand: Optional[List[str]] = Query(None),
+    product_type: Optional[List[str]] = Query(None),
+):
+    """Main endpoint for product recommendations using RAG pipeline.
 
-        # Step 1: Retrieve relevant products
-        retrieved_products = retrieve_top_products(vector_store, user_query, 5)
-        print(f"Retrieved {len(retrieved_products)} candidate products")
-        
-        if retrieved_products:
-            print(f"Sample metadata: {retrieved_products[0].metadata}")
-        
-        # Step 2: Enrich product data
-        enriched_products = get_enriched_products(retrieved_products, user_query)
-        print(f"Enriched {len(enriched_products)} products")
-        
-        if enriched_products:
-            print(f"Sample enriched product: {enriched_products[0]}")
-        
-        # Step 3: Generate final response
-        recommendations = format_recommendation_response(user_query, enriched_products)
-        recommended_count = len(recommendations.get('products', []))
-        print(f"Returning {recommended_count} recommended products")
-        print(f"{'=' * 80}\n")
-
-        return recommendations
+    Optional ?brand=...&product_type=... (repeatable) restrict the search to
+    matching products. If the client disconnects first, the pipeline is
+    cancelled (in-flight upstream calls included) and 499 is returned.
 
+    Returns the first page of results plus "next_cursor" (null when there are
+    no more) for /api/recommendations/page.
+    """
+    try:
+        recommendations = await _run_until_disconnect(
+            request,
+            _recommend(user_query, {"brand": brand or [], "product_type": product_type or []}),
+        )
     except Exception as error:
         # Log and handle unexpected errors
         print(f"Recommendation error: {error}")
-        raise HTTPException(status_code=500, detail=str(error))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(error))
+
+    if recommendations is None:
+        print(f"Client disconnected; cancelled recommendation for query: {user_query}")
+        return Response(status_code=499)
+    return recommendations
+
+
+async def _run_until_disconnect(request: Request, coroutine):
+    """Await coroutine, cancelling it if the client disconnects first (None is returned then)."""
+    task = asyncio.ensure_future(coroutine)
+    try:
+        return task.result() if await _wait_or_disconnect(request, task) else None
+    finally:
+        task.cancel()
+
+
+async def _wait_or_disconnect(request: Request, task) -> bool:
+    """Wait for task to finish; False as soon as the client disconnects instead."""
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=CLIENT_DISCONNECT_POLL_S)
+        if done:
+            return True
+        if await request.is_disconnected():
+            return False
+
+
+async def _cached_response(user_query: str, scope: str):
+    """Step 0 of the pipeline: (cached response or None, query embedding if one was computed)."""
+    vector_store = app.state.vector_store
+    response_cache = app.state.response_cache
+
+    # Serve identical / near-identical queries from the response cache
+    cached_response = response_cache.get(user_query, scope)
+    query_embedding = None
+    if cached_response is None and response_cache.semantic_enabled:
+        query_embedding = await asyncio.get_running_loop().run_in_executor(
+            app.state.embedding_executor,
+            vector_store.embeddings.embed_query,
+            user_query,
+        )
+        cached_response = response_cache.get_similar(user_query, query_embedding, scope)
+    if cached_response is not None:
+        print(f"Serving cached response for query: {user_query}")
+        cached_response = _with_live_cursor(user_query, cached_response)
+    return cached_response, query_embedding
+
+
+def _cache_entry(recommendations: dict, ranking: List[str]) -> dict:
+    """What the response cache stores for a response: the body plus the full ranking.
+
+    A cached response can outlive its cursor (the two caches expire and
+    evict independently), so the ranking is kept to reopen it.
+    """
+    return {**recommendations, "ranking": ranking}
+
+
+def _with_live_cursor(user_query: str, cached_response: dict) -> dict:
+    """A response-cache hit with "ranking" replaced by a next_cursor that still resolves."""
+    ranking = cached_response.pop("ranking", [])
+    cached_response["next_cursor"] = app.state.result_cursors.resume(
+        cached_response.get("next_cursor"),
+        user_query,
+        ranking,
+        RECOMMENDATION_PAGE_SIZE,
+    )
+    return cached_response
+
+
+async def _retrieve(user_query: str, query_embedding, filters, scope: str):
+    """Step 1 of the pipeline, on the embedding executor.
+
+    Ranks up to RECOMMENDATION_MAX_RESULTS products once. Returns (first
+    page, documents on the next page, docstore ids of the whole ranking).
+    """
+    ranked = await asyncio.get_running_loop().run_in_executor(
+        app.state.embedding_executor,
+        partial(
+            retrieve_ranked_products,
+            app.state.vector_store,
+            user_query,
+            RECOMMENDATION_PAGE_SIZE,
+            RECOMMENDATION_MAX_RESULTS,
+            query_embedding,
+            filters=filters if scope else None,
+            metadata_index=app.state.metadata_index,
+            lexical_index=app.state.lexical_index,
+        ),
+    )
+    print(f"Retrieved {len(ranked)} candidate products")
+
+    if ranked:
+        print(f"Sample metadata: {ranked[0].metadata}")
+    next_page = ranked[RECOMMENDATION_PAGE_SIZE:2 * RECOMMENDATION_PAGE_SIZE]
+    return ranked[:RECOMMENDATION_PAGE_SIZE], next_page, [document.id for document in ranked]
+
+
+def _prefetch(documents, user_query: str) -> None:
+    """Enrich the next page in the background so it is in the enrichment cache when requested.
+
+    Runs detached from the request, so a disconnect does not cancel it; a
+    page request arriving mid-prefetch joins the in-flight lookups.
+    """
+    if not (RECOMMENDATION_PREFETCH and documents):
+        return
+    task = asyncio.ensure_future(
+        get_enriched_products_async(documents, user_query, cache=app.state.enrichment_cache)
+    )
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_done)
+
+
+def _prefetch_done(task) -> None:
+    _prefetch_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Next-page prefetch failed: {task.exception()}")
+
+
+async def _recommend(user_query: str, filters) -> dict:
+    """The recommendation pipeline; CPU-bound steps run on the embedding executor."""
+    scope = filter_key(filters)
+
+    # Step 0: Serve identical / near-identical queries from the response cache
+    cached_response, query_embedding = await _cached_response(user_query, scope)
+    if cached_response is not None:
+        return cached_response
+
+    # Step 1: Retrieve relevant products (first page; the full ranking stays under the cursor)
+    retrieved_products, next_page, ranking = await _retrieve(user_query, query_embedding, filters, scope)
+
+    # Step 2: Enrich product data (upstream calls are cancelled with this task)
+    enriched_products = await get_enriched_products_async(
+        retrieved_products,
+        user_query,
+        cache=app.state.enrichment_cache,
+    )
+    print(f"Enriched {len(enriched_products)} products")
+
+    if enriched_products:
+        print(f"Sample enriched product: {enriched_products[0]}")
+
+    # Step 3: Generate final response
+    recommendations = {
+        **format_recommendation_response(user_query, enriched_products),
+        "next_cursor": app.state.result_cursors.open(user_query, ranking, RECOMMENDATION_PAGE_SIZE),
+    }
+    recommended_count = len(recommendations.get('products', []))
+    print(f"Returning {recommended_count} recommended products")
+    print(f"{'=' * 80}\n")
+
+    app.state.response_cache.put(user_query, _cache_entry(recommendations, ranking), query_embedding, scope)
+    _prefetch(next_page, user_query)
+    return recommendations
+
+
+@app.get("/api/recommendations/page")
+async def recommendation_page(request: Request, cursor: str = Query(...)):
+    """A later page of a search, from the "next_cursor" of the previous page.
+
+    The ranking saved by the search is reused (no new embedding or index
+    search) and only this page's products are enriched. Returns the same
+    body as /api/recommendations. 410 once the cursor has expired (search
+    again), 499 if the client disconnects first.
+    """
+    try:
+        resolved = app.state.result_cursors.page(cursor, RECOMMENDATION_PAGE_SIZE)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    if resolved is None:
+        raise HTTPException(status_code=410, detail="Cursor expired; search again")
+    user_query, ids, next_cursor, upcoming_ids = resolved
+
+    try:
+        recommendations = await _run_until_disconnect(
+            request,
+            _recommend_page(user_query, ids, next_cursor, upcoming_ids),
+        )
+    except Exception as error:
+        print(f"Recommendation page error: {error}")
+        raise HTTPException(status_code=500, detail=str(error))
+
+    if recommendations is None:
+        print(f"Client disconnected; cancelled recommendation page for query: {user_query}")
+        return Response(status_code=499)
+    return recommendations
+
+
+async def _recommend_page(user_query: str, ids, next_cursor: Optional[str], upcoming_ids) -> dict:
+    vector_store = app.state.vector_store
+    documents = documents_by_id(vector_store, ids)
+    enriched_products = await get_enriched_products_async(
+        documents,
+        user_query,
+        cache=app.state.enrichment_cache,
+    )
+    print(f"Returning page of {len(enriched_products)} products for query: {user_query}")
+    _prefetch(documents_by_id(vector_store, upcoming_ids), user_query)
+    return {
+        **format_recommendation_response(user_query, enriched_products),
+        "next_cursor": next_cursor,
+    }
+
+
+@app.post("/api/recommendations/stream")
+async def recommend_products_stream(
+    request: Request,
+    user_query: str = Body(..., embed=False),
+    brand: Optional[List[str]] = Query(None),
+    product_type: Optional[List[str]] = Query(None),
+):
+    """/api/recommendations as a stream of newline-delimited JSON events.
+
+    {"type": "products", "query", "products"}: retrieved products, not yet
+    enriched, in retrieval order (sent as soon as the search finishes).
+    {"type": "product", "position", "product"}: one product with its
+    enrichment (cached ones first, then in the order lookups finish).
+    {"type": "done", "query", "products", "next_cursor"}: the final
+    response, in display order (same body as /api/recommendations).
+    {"type": "error", "detail"}: the pipeline failed; nothing follows.
+
+    A cached response is sent as a single "done" event. Closing the
+    connection cancels the pipeline.
+    """
+    filters = {"brand": brand or [], "product_type": product_type or []}
+    return StreamingResponse(
+        _stream_until_disconnect(request, _recommendation_events(user_query, filters)),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _stream_until_disconnect(request: Request, events):
+    """Relay events, cancelling the pending one (and the work behind it) if the client disconnects.
+
+    Servers on ASGI 2.4 only report a disconnect when a write fails, which
+    can be seconds away while products are being enriched.
+    """
+    while True:
+        step = asyncio.ensure_future(anext(events))
+        try:
+            connected = await _wait_or_disconnect(request, step)
+        finally:
+            if not step.done():
+                step.cancel()
+        if not connected:
+            # Let the pipeline unwind: upstream calls cancelled, finished enrichments cached
+            await asyncio.wait({step})
+            print("Client disconnected; cancelled recommendation stream")
+            return
+        try:
+            event = step.result()
+        except StopAsyncIteration:
+            return
+        yield event
+
+
+def _event(payload: dict) -> str:
+    return json.dumps(payload) + "\n"
+
+
+async def _recommendation_events(user_query: str, filters):
+    scope = filter_key(filters)
+    try:
+        cached_response, query_embedding = await _cached_response(user_query, scope)
+        if cached_response is not None:
+            yield _event({"type": "done", **cached_response})
+            return
+
+        retrieved_products, next_page, ranking = await _retrieve(user_query, query_embedding, filters, scope)
+        cache = app.state.enrichment_cache
+        formatted = [format_product(product) for product in unenriched_products(retrieved_products, cache)]
+        yield _event({"type": "products", "query": user_query, "products": formatted})
+
+        async with aclosing(iter_enriched_products_async(retrieved_products, user_query, cache=cache)) as results:
+            async for position, product in results:
+                formatted[position] = format_product(product)
+                yield _event({"type": "product", "position": position, "product": formatted[position]})
+
+        recommendations = {
+            "query": user_query,
+            "products": sort_products(formatted),
+            "next_cursor": app.state.result_cursors.open(user_query, ranking, RECOMMENDATION_PAGE_SIZE),
+        }
+        print(f"Streamed {len(formatted)} recommended products")
+        app.state.response_cache.put(user_query, _cache_entry(recommendations, ranking), query_embedding, scope)
+        _prefetch(next_page, user_query)
+        yield _event({"type": "done", **recommendations})
+
+    except Exception as error:
+        # Headers are already sent; report the failure in-band
+        print(f"Recommendation stream error: {error}")
+        yield _event({"type": "error", "detail": str(error)})
+
+
+def _product_key(document) -> str:
+    return str(document.metadata.get("id") or document.page_content)
+
+
+@app.post("/api/recommendations/batch")
+def recommend_products_batch(
+    queries: List[str] = Body(..., embed=True),
+    brand: Optional[List[str]] = Query(None),
+    product_type: Optional[List[str]] = Query(None),
+):
+    """Recommendations for many queries in one call (e.g. prefetching popular queries).
+
+    Body: {"queries": [...]}. Returns {"results": [...]} with one
+    /api/recommendations response per query, in order (first page and
+    "next_cursor" each). Queries are embedded and searched together, and a
+    product shared by several queries is enriched once.
+    """
+    if len(queries) > RECOMMENDATION_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {RECOMMENDATION_BATCH_MAX_QUERIES} queries per batch",
+        )
+
+    try:
+        vector_store = app.state.vector_store
+        response_cache = app.state.response_cache
+        filters = {"brand": brand or [], "product_type": product_type or []}
+        scope = filter_key(filters)
+        unique_queries = list(dict.fromkeys(queries))
+
+        # Step 0: Serve what we can from the response cache (one embedding call for the rest)
+        responses = {}
+        for query in unique_queries:
+            cached_response = response_cache.get(query, scope)
+            if cached_response is not None:
+                responses[query] = _with_live_cursor(query, cached_response)
+        pending = [query for query in unique_queries if query not in responses]
+
+        query_embeddings = {}
+        if pending:
+            query_embeddings = dict(zip(pending, embed_queries(vector_store.embeddings, pending)))
+            if response_cache.semantic_enabled:
+                for query in pending:
+                    cached_response = response_cache.get_similar(query, query_embeddings[query], scope)
+                    if cached_response is not None:
+                        responses[query] = _with_live_cursor(query, cached_response)
+                pending = [query for query in pending if query not in responses]
+        print(f"Batch of {len(queries)} queries: {len(unique_queries) - len(pending)} served from cache")
+
+        if pending:
+            # Step 1: Rank for all remaining queries with multi-query index searches
+            ranked = retrieve_ranked_products_batch(
+                vector_store,
+                pending,
+                RECOMMENDATION_PAGE_SIZE,
+                RECOMMENDATION_MAX_RESULTS,
+                [query_embeddings[query] for query in pending],
+                filters=filters if scope else None,
+                metadata_index=app.state.metadata_index,
+                lexical_index=app.state.lexical_index,
+            )
+            retrieved = [documents[:RECOMMENDATION_PAGE_SIZE] for documents in ranked]
+
+            # Step 2: Enrich each distinct product once (single bulk cache lookup)
+            distinct = {}
+            for documents in retrieved:
+                for document in documents:
+                    distinct.setdefault(_product_key(document), document)
+            enriched = dict(zip(
+                distinct,
+                get_enriched_products(list(distinct.values()), cache=app.state.enrichment_cache),
+            ))
+            print(f"Enriched {len(distinct)} distinct products for {len(pending)} queries")
+
+            # Step 3: Format each query's response
+            for query, documents, ranking in zip(pending, retrieved, ranked):
+                ranking = [document.id for document in ranking]
+                recommendations = {
+                    **format_recommendation_response(
+                        query,
+                        [enriched[_product_key(document)] for document in documents],
+                    ),
+                    "next_cursor": app.state.result_cursors.open(query, ranking, RECOMMENDATION_PAGE_SIZE),
+                }
+                response_cache.put(query, _cache_entry(recommendations, ranking), query_embeddings[query], scope)
+                responses[query] = recommendations
+
+        return {"results": [responses[query] for query in queries]}
+
+    except Exception as error:
+        print(f"Batch recommendation error: {error}")
+        raise HTTPException(status_code=500, detail=str(error))
+
+
+@app.get("/api/stats")
+def get_stats():
+    """Cache and enrichment counters for monitoring."""
+    embeddings = app.state.vector_store.embeddings
+    return {
+        "enrichment_cache": app.state.enrichment_cache.stats(),
+        "enrichment": get_enrichment_stats(),
+        "retrieval": get_retrieval_stats(),
+        "response_cache": app.state.response_cache.stats(),
+        "result_cursors": app.state.result_cursors.stats(),
+        "query_embeddings": (
+            embeddings.stats() if isinstance(embeddings, CachedQueryEmbeddings) else None
+        ),
+    }
+
+
+@app.post("/api/cache/invalidate")
+def invalidate_response_cache():
+    """Drop all cached responses (e.g. after editing enrichment data by hand)."""
+    app.state.response_cache.clear()
+    return {"status": "ok"}
+
+
+@app.post("/api/index/sync")
+def sync_vector_index():
+    """Apply CSV changes to the FAISS index, re-embedding only changed products."""
+    with _index_sync_lock:
+        if index_is_current(str(CSV_DATA_PATH), str(FAISS_INDEX_DIR)):
+            return {"added": 0, "updated": 0, "removed": 0, "changed": False}
+
+        # Update a separate copy so in-flight searches never see a half-applied change
+        vector_store = load_index(str(FAISS_INDEX_DIR), app.state.vector_store.embeddings)
+        try:
+            summary = sync_index(vector_store, str(CSV_DATA_PATH), str(FAISS_INDEX_DIR))
+        except ValueError as error:
+            raise HTTPException(status_code=409, detail=f"{error}; rebuild the index instead")
+
+        if summary["changed"]:
+            # Row-aligned side indexes first, so requests never pair the new store with old ones
+            metadata_index = MetadataIndex.from_vector_store(vector_store)
+            lexical_index = (
+                load_lexical_index(str(FAISS_INDEX_DIR), vector_store)
+                if app.state.lexical_index is not None else None
+            )
+            app.state.vector_store = vector_store
+            app.state.metadata_index = metadata_index
+            app.state.lexical_index = lexical_index
+            # Cached responses and saved rankings were ranked against the old index
+            app.state.response_cache.clear()
+            app.state.result_cursors.clear()
+    return summary
@@ -0,0 +1,111 @@
+import argparse
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from services.ann_index import create_index, describe_index, index_config_from_env
+from services.index_builder import DEFAULT_FAISS_DIR
+
+DEFAULT_CONFIGS = [
+    "flat",
+    "ivf-flat:nprobe=8",
+    "ivf-flat:nprobe=32",
+    "hnsw:M=32,efSearch=32",
+    "hnsw:M=32,efSearch=128",
+    "ivf-pq:pq_m=16,nprobe=16",
+    "ivf-pq:pq_m=48,nprobe=32",
+]
+
+
+def _parse_config(spec: str) -> Dict[str, Any]:
+    """'hnsw:M=32,efSearch=64' -> index config (unspecified values from FAISS_* settings)."""
+    kind, _, params = spec.partition(":")
+    config = index_config_from_env()
+    config["type"] = kind
+    for pair in filter(None, params.split(",")):
+        key, _, value = pair.partition("=")
+        config[key.strip()] = int(value)
+    return config
+
+
+def _load_vectors(faiss_dir: str) -> np.ndarray:
+    index = faiss.read_index(f"{faiss_dir}/index.faiss")
+    print(f"Loaded vectors from saved index: {describe_index(index)}")
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def _synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    # Clustered unit vectors, closer to real embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 200), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Compare FAISS index types: build time, recall@k against the exact flat
+    index, single-query latency and index size.
+
+    Run from backend/: python -m benchmarks.ann_index --configs flat hnsw:M=32,efSearch=64
+    Vectors come from the saved index, or --synthetic N to test larger catalogs.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--faiss-dir", default=str(DEFAULT_FAISS_DIR))
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    vectors = _synthetic_vectors(args.synthetic, args.dim) if args.synthetic else _load_vectors(args.faiss_dir)
+    rng = np.random.default_rng(1)
+    # Queries: perturbed catalog vectors, like a user query phrased close to a product
+    queries = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries = np.ascontiguousarray(queries / np.linalg.norm(queries, axis=1, keepdims=True), dtype=np.float32)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{len(vectors)} vectors, {args.queries} queries, recall@{args.k} vs flat")
+    header = f"{'config':<28} {'build s':>8} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7} {'MB':>7}"
+    print(header)
+    print("-" * len(header))
+
+    for spec in args.configs:
+        config = _parse_config(spec)
+        started = time.perf_counter()
+        try:
+            index = create_index(vectors, config)
+        except (ValueError, RuntimeError) as error:
+            print(f"{spec:<28} failed: {error}")
+            continue
+        build_s = time.perf_counter() - started
+
+        latencies = []
+        found = np.empty_like(truth)
+        for row, query in enumerate(queries):
+            t0 = time.perf_counter()
+            _, ids = index.search(query[None, :], args.k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            found[row] = ids[0]
+
+        recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+        size_mb = len(faiss.serialize_index(index)) / 1e6
+        latencies.sort()
+        print(
+            f"{spec:<28} {build_s:>8.2f} {recall:>7.3f} {statistics.median(latencies):>7.3f} "
+            f"{latencies[int(len(latencies) * 0.95) - 1]:>7.3f} {size_mb:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from services import product_api
+from services.http_client import close_async_session
+
+
+def _serve(latency_s: float) -> ThreadingHTTPServer:
+    """Local stand-in for SerpAPI that answers every search after latency_s."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency_s)
+            body = json.dumps({"organic_results": [{"link": "https://example.com/p", "title": "p"}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        # Accept every concurrent connection instead of refusing past the default backlog of 5
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Compare concurrent SerpAPI lookups made with blocking requests on a
+    bounded thread pool (how sync endpoints run) against coroutines on one
+    event loop (the async pipeline), using a local server with fixed latency.
+
+    Run from backend/: python -m benchmarks.async_upstream --requests 200
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--requests", type=int, default=200, help="Concurrent lookups")
+    parser.add_argument("--latency", type=float, default=0.5, help="Upstream latency in seconds")
+    parser.add_argument("--threads", type=int, default=40, help="Thread pool size for the sync run")
+    args = parser.parse_args(argv)
+
+    server = _serve(args.latency)
+    product_api.SERPAPI_URL = f"http://127.0.0.1:{server.server_address[1]}/search"
+    product_api.SERPAPI_KEY = product_api.SERPAPI_KEY or "benchmark"
+    engine = product_api.SEARCH_ENGINES[0]
+    queries = [f"product {i}" for i in range(args.requests)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        sync_results = list(executor.map(lambda q: product_api._fetch_engine(engine, q, 3), queries))
+    sync_s = time.perf_counter() - started
+
+    async def run_async():
+        try:
+            return await asyncio.gather(*(product_api._fetch_engine_async(engine, q, 3) for q in queries))
+        finally:
+            await close_async_session()
+
+    started = time.perf_counter()
+    async_results = asyncio.run(run_async())
+    async_s = time.perf_counter() - started
+    server.shutdown()
+
+    print(f"{args.requests} lookups, {args.latency * 1000:.0f} ms upstream latency")
+    header = f"{'mode':<22} {'ok':>5} {'wall s':>7} {'lookups/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for mode, results, seconds in (
+        (f"sync ({args.threads} threads)", sync_results, sync_s),
+        ("async (1 thread)", async_results, async_s),
+    ):
+        ok = sum(1 for result in results if result)
+        print(f"{mode:<22} {ok:>5} {seconds:>7.2f} {len(results) / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
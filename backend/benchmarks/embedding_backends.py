@@ -0,0 +1,128 @@
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Representative search-box queries (each embedded uncached)
+QUERIES = [
+    "lightweight moisturizer for dry skin",
+    "long lasting matte lipstick",
+    "cuticle oil",
+    "fragrance free sunscreen spf 50",
+    "volumizing mascara that doesn't smudge",
+    "gentle cleanser for sensitive skin",
+    "hair mask for damaged curly hair",
+    "nail polish pastel pink",
+    "vitamin c serum for dark spots",
+    "waterproof eyeliner",
+]
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, falling back to peak RSS)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1e6
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def _run_backend(backend: str, threads: int, batch_size: int, rounds: int) -> Dict[str, Any]:
+    """Measure one backend inside this process."""
+    started = time.perf_counter()
+    from services.embedding_backends import create_embeddings, warm_up
+
+    embeddings = create_embeddings(backend=backend, threads=threads, batch_size=batch_size)
+    warm_up(embeddings)
+    load_s = time.perf_counter() - started
+
+    latencies: List[float] = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            t0 = time.perf_counter()
+            embeddings.embed_query(query)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    batch = QUERIES * 10
+    t0 = time.perf_counter()
+    vectors = embeddings.embed_documents(batch)
+    batch_s = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "batch_docs_per_s": round(len(batch) / batch_s, 1),
+        "rss_mb": round(_rss_mb(), 1),
+        "vectors": np.asarray(vectors[: len(QUERIES)], dtype=np.float32).tolist(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Compare embedding backends: load time, per-query latency, batch throughput,
+    process RSS, and cosine parity against the first backend.
+
+    Run from backend/: python -m benchmarks.embedding_backends --backends torch onnx onnx-int8
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(_run_backend(args.worker, args.threads, args.batch_size, args.rounds)))
+        return
+
+    # One fresh process per backend so load time and RSS aren't polluted by the others
+    results = []
+    for backend in args.backends:
+        proc = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.embedding_backends",
+                "--worker", backend,
+                "--threads", str(args.threads),
+                "--batch-size", str(args.batch_size),
+                "--rounds", str(args.rounds),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    if not results:
+        return
+
+    reference = np.asarray(results[0]["vectors"], dtype=np.float32)
+    header = f"{'backend':<10} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'docs/s':>8} {'RSS MB':>7} {'min cos':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        vectors = np.asarray(result["vectors"], dtype=np.float32)
+        cosine = (vectors * reference).sum(axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1) + 1e-12
+        )
+        print(
+            f"{result['backend']:<10} {result['load_s']:>7} {result['query_p50_ms']:>7} "
+            f"{result['query_p95_ms']:>7} {result['batch_docs_per_s']:>8} {result['rss_mb']:>7} "
+            f"{float(cosine.min()):>8.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
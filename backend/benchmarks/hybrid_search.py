@@ -0,0 +1,81 @@
+import argparse
+import statistics
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from services.columnar_store import load_index, metadata_column
+from services.embedding_backends import create_embeddings
+from services.index_builder import DEFAULT_FAISS_DIR
+from services.lexical_index import load_lexical_index, reciprocal_rank_fusion
+from services.retrieval import HYBRID_CANDIDATES, HYBRID_LEXICAL_WEIGHT, HYBRID_RRF_K, HYBRID_VECTOR_WEIGHT
+
+
+def _percentiles(values: List[float]) -> str:
+    values = sorted(values)
+    return f"{statistics.median(values):>7.3f} {values[max(0, int(len(values) * 0.95) - 1)]:>7.3f}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Measure what hybrid retrieval costs and buys over vector-only search:
+    per-stage latency (BM25, vector search, rank fusion) and hit@k for
+    known-item queries ("<brand> <name>" of a sampled product).
+
+    Run from backend/: python -m benchmarks.hybrid_search --queries 300
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--faiss-dir", default=str(DEFAULT_FAISS_DIR))
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=HYBRID_CANDIDATES)
+    args = parser.parse_args(argv)
+
+    vector_store = load_index(args.faiss_dir, create_embeddings())
+    lexical = load_lexical_index(args.faiss_dir, vector_store)
+    ntotal = vector_store.index.ntotal
+
+    brands = metadata_column(vector_store, "brand")
+    names = metadata_column(vector_store, "name")
+    rng = np.random.default_rng(0)
+    targets = rng.choice(ntotal, size=min(args.queries, ntotal), replace=False)
+    queries = [f"{brands[row]} {names[row]}" for row in targets]
+
+    # Embedding cost is the same with or without the lexical stage; keep it out of the timings
+    query_vectors = np.asarray(vector_store.embeddings.embed_documents(queries), dtype=np.float32)
+    candidates = max(args.k, args.candidates)
+
+    timings = {"bm25": [], "vector": [], "fusion": []}
+    vector_hits = hybrid_hits = 0
+    for target, query, vector in zip(targets, queries, query_vectors):
+        t0 = time.perf_counter()
+        _, lexical_rows = lexical.search(query, candidates)
+        t1 = time.perf_counter()
+        _, vector_rows = vector_store.index.search(vector[None, :], candidates)
+        vector_rows = vector_rows[0][vector_rows[0] >= 0]
+        t2 = time.perf_counter()
+        fused = reciprocal_rank_fusion(
+            [vector_rows, lexical_rows],
+            [HYBRID_VECTOR_WEIGHT, HYBRID_LEXICAL_WEIGHT],
+            k=HYBRID_RRF_K,
+        )[:args.k]
+        t3 = time.perf_counter()
+
+        timings["bm25"].append((t1 - t0) * 1000)
+        timings["vector"].append((t2 - t1) * 1000)
+        timings["fusion"].append((t3 - t2) * 1000)
+        vector_hits += int(target in vector_rows[:args.k])
+        hybrid_hits += int(target in fused)
+
+    print(f"{ntotal} products, {len(queries)} known-item queries, {candidates} candidates per ranking")
+    header = f"{'stage':<10} {'p50 ms':>7} {'p95 ms':>7}"
+    print(header)
+    print("-" * len(header))
+    for stage, values in timings.items():
+        print(f"{stage:<10} {_percentiles(values)}")
+    print(f"\nhit@{args.k}: vector {vector_hits / len(queries):.3f}, hybrid {hybrid_hits / len(queries):.3f}")
+
+
+if __name__ == "__main__":
+    main()
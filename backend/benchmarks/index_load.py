@@ -0,0 +1,130 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from services.columnar_store import load_columnar
+from services.index_builder import DEFAULT_FAISS_DIR
+
+MODES = ("pickle", "columnar", "columnar-nommap")
+
+
+class _VectorOnly(Embeddings):
+    """Searches here go by vector, so no model needs to be loaded."""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+def _memory_mb() -> Dict[str, float]:
+    """RSS split into anonymous (heap) and file-backed (mmap, shareable) pages."""
+    fields = {}
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+
+def _run_mode(mode: str, directory: str, searches: int, k: int) -> Dict[str, Any]:
+    baseline = _memory_mb()
+    started = time.perf_counter()
+    if mode == "pickle":
+        store = FAISS.load_local(directory, _VectorOnly(), allow_dangerous_deserialization=True)
+    else:
+        store = load_columnar(directory, _VectorOnly(), mmap_vectors=mode == "columnar")
+    load_s = time.perf_counter() - started
+    loaded = _memory_mb()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((searches, store.index.d)).astype(np.float32)
+    started = time.perf_counter()
+    for query in queries:
+        store.similarity_search_with_score_by_vector(query.tolist(), k=k)
+    search_ms = (time.perf_counter() - started) * 1000 / max(1, searches)
+    searched = _memory_mb()
+
+    return {
+        "mode": mode,
+        "load_s": round(load_s, 3),
+        "load_rss_mb": round(loaded["VmRSS"] - baseline["VmRSS"], 1),
+        "heap_mb": round(searched["RssAnon"] - baseline["RssAnon"], 1),
+        "file_mb": round(searched["RssFile"] - baseline["RssFile"], 1),
+        "search_ms": round(search_ms, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Compare loading the index from the pickled LangChain docstore with the
+    columnar store (memory-mapped and not): load time, resident memory after
+    loading, and heap vs file-backed memory after top-k searches.
+
+    Run from backend/: python -m benchmarks.index_load
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--faiss-dir", default=str(DEFAULT_FAISS_DIR), help="Columnar index directory")
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        mode, directory = args.worker
+        print(json.dumps(_run_mode(mode, directory, args.searches, args.k)))
+        return
+
+    with tempfile.TemporaryDirectory() as pickle_dir:
+        # Same index and Documents, saved the old way (index.faiss + pickled InMemoryDocstore)
+        columnar = load_columnar(args.faiss_dir, _VectorOnly(), mmap_vectors=False)
+        ids = [columnar.index_to_docstore_id[row] for row in range(columnar.index.ntotal)]
+        FAISS(
+            embedding_function=_VectorOnly(),
+            index=columnar.index,
+            docstore=InMemoryDocstore({doc_id: columnar.docstore.search(doc_id) for doc_id in ids}),
+            index_to_docstore_id=dict(enumerate(ids)),
+        ).save_local(pickle_dir)
+
+        # One fresh process per mode so memory numbers aren't shared
+        results = []
+        for mode in MODES:
+            directory = pickle_dir if mode == "pickle" else args.faiss_dir
+            proc = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.index_load",
+                    "--worker", mode, directory,
+                    "--searches", str(args.searches),
+                    "-k", str(args.k),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{mode}: failed\n{proc.stderr.strip()}")
+                continue
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    header = f"{'mode':<16} {'load s':>7} {'load MB':>8} {'heap MB':>8} {'file MB':>8} {'search ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['mode']:<16} {r['load_s']:>7} {r['load_rss_mb']:>8} {r['heap_mb']:>8} "
+            f"{r['file_mb']:>8} {r['search_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
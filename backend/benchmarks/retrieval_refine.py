@@ -0,0 +1,94 @@
+import argparse
+import statistics
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from services.columnar_store import load_index, metadata_column
+from services.embedding_backends import create_embeddings
+from services.index_builder import DEFAULT_FAISS_DIR
+from services.lexical_index import load_lexical_index
+from services.retrieval import RETRIEVAL_MODE, get_retrieval_stats, retrieve_top_products
+
+# Typical free-text requests, alongside the known-item queries sampled from the catalog
+SAMPLE_QUERIES = [
+    "red matte lipstick",
+    "moisturizer for dry skin",
+    "waterproof mascara",
+    "setting powder for oily skin",
+    "nude eyeshadow palette",
+    "long lasting foundation full coverage",
+    "cuticle oil",
+    "gentle cleanser for sensitive skin",
+    "vitamin c serum",
+    "lip gloss that isn't sticky",
+    "highlighter for a dewy glow",
+    "brow pencil",
+    "sunscreen for face",
+    "hair mask for damaged hair",
+    "clear nail polish top coat",
+]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Compare retrieval with and without refinement (over-fetch, similarity
+    threshold, near-duplicate collapse): products handed to enrichment per
+    request (each uncached one costs upstream search/retailer calls),
+    distinct brand+name pairs among them, and retrieval latency.
+
+    Run from backend/: python -m benchmarks.retrieval_refine
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--faiss-dir", default=str(DEFAULT_FAISS_DIR))
+    parser.add_argument("--sampled", type=int, default=100, help="Known-item queries sampled from the catalog")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--mode", default=RETRIEVAL_MODE, choices=("hybrid", "vector"))
+    args = parser.parse_args(argv)
+
+    vector_store = load_index(args.faiss_dir, create_embeddings())
+    lexical = load_lexical_index(args.faiss_dir, vector_store) if args.mode == "hybrid" else None
+
+    brands = metadata_column(vector_store, "brand")
+    names = metadata_column(vector_store, "name")
+    rng = np.random.default_rng(0)
+    sampled = rng.choice(vector_store.index.ntotal, size=min(args.sampled, vector_store.index.ntotal), replace=False)
+    queries = SAMPLE_QUERIES + [f"{brands[row]} {names[row]}" for row in sampled]
+    query_vectors = vector_store.embeddings.embed_documents(queries)
+
+    print(f"{vector_store.index.ntotal} products, {len(queries)} queries, k={args.k}, mode={args.mode}")
+    header = f"{'refine':<8} {'products/req':>13} {'distinct/req':>13} {'p50 ms':>7} {'p95 ms':>7}"
+    print(header)
+    print("-" * len(header))
+    for refine in (False, True):
+        returned, distinct, latencies = [], [], []
+        for query, vector in zip(queries, query_vectors):
+            started = time.perf_counter()
+            documents = retrieve_top_products(
+                vector_store,
+                query,
+                args.k,
+                vector,
+                lexical_index=lexical,
+                mode=args.mode,
+                refine=refine,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            returned.append(len(documents))
+            distinct.append(len({(d.metadata.get("brand"), d.metadata.get("name")) for d in documents}))
+        latencies.sort()
+        print(
+            f"{str(refine):<8} {statistics.mean(returned):>13.2f} {statistics.mean(distinct):>13.2f} "
+            f"{statistics.median(latencies):>7.3f} {latencies[int(len(latencies) * 0.95) - 1]:>7.3f}"
+        )
+
+    stats = get_retrieval_stats()
+    print(
+        f"\nrefinement removed {stats['below_threshold']} below-threshold and "
+        f"{stats['duplicates']} near-duplicate candidates"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,449 @@
 import json
+import queue
 import sqlite3
 import hashlib
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from data.cache.memory_lru_cache import MemoryLRUCache
+
+
+# SQLite caps bound parameters per statement (999 on older builds)
+_MAX_SQL_VARS = 500
+
+# On-disk format version (stored in PRAGMA user_version)
+#   0/1: key, value_json TEXT, retrieved_at ISO-8601 TEXT
+#   2:   key, value BLOB + encoding, epoch retrieved_at/last_access, size
+SCHEMA_VERSION = 2
+
+# Value encodings
+ENCODING_JSON = 0
+ENCODING_ZLIB_JSON = 1
+
+
+def _encode_value(value: Dict[str, Any], compress: bool, compress_min_bytes: int) -> Tuple[bytes, int]:
+    raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    if compress and len(raw) >= compress_min_bytes:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return packed, ENCODING_ZLIB_JSON
+    return raw, ENCODING_JSON
+
+
+def _decode_value(blob: bytes, encoding: int) -> Dict[str, Any]:
+    if encoding == ENCODING_ZLIB_JSON:
+        blob = zlib.decompress(blob)
+    return json.loads(blob)
+
+
+def _days_ago(days: float) -> int:
+    return int(time.time() - days * 86400)
 
 
 class SQLiteEnrichmentCache:
+    """Enrichment cache backed by SQLite in WAL mode.
+
+    Connections are long-lived and pooled, so one instance should be created
+    at startup and shared across threads. Readers never block on the writer.
+
+    Values are stored as compact (optionally zlib-compressed) JSON blobs with
+    epoch timestamps, so expiry is evaluated in SQL. When max_rows/max_bytes
+    are set, least-recently-accessed entries are evicted on write.
+
+    An optional in-memory LRU tier sits in front of SQLite: reads are served
+    from it without disk I/O or deserialization, writes go through to both
+    tiers, and delete/prune invalidate it. Values returned from the memory
+    tier are shared objects and must be treated as read-only. Memory hits
+    still refresh last_access on disk (at most once per access_resolution_s),
+    so the disk LRU doesn't evict the hottest entries first.
+    """
+
     def __init__(
         self,
         db_dir: str = "data/cache",
         db_name: str = "enrichment_cache.sqlite3",
+        pool_size: int = 8,
+        compress: bool = True,
+        compress_min_bytes: int = 256,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        access_resolution_s: int = 3600,
+        memory_max_entries: Optional[int] = None,
+        memory_max_bytes: Optional[int] = None,
+        memory_ttl_s: Optional[float] = None,
     ):
         db_dir_path = Path(db_dir)
         db_dir_path.mkdir(parents=True, exist_ok=True)
 
         self.db_path = db_dir_path / db_name
+        self.pool_size = pool_size
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        # last_access is only rewritten when older than this (avoids a write per read)
+        self.access_resolution_s = access_resolution_s
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._closed = False
+
+        # Memory tier holds key -> (value, retrieved_at epoch); disabled when unbounded
+        self.memory: Optional[MemoryLRUCache] = None
+        if memory_max_entries or memory_max_bytes:
+            self.memory = MemoryLRUCache(
+                max_entries=memory_max_entries,
+                max_bytes=memory_max_bytes,
+                ttl_s=memory_ttl_s,
+            )
+        # key -> last_access known to be on disk, for refreshing it on memory hits
+        self._disk_access: Dict[str, int] = {}
+        self._disk_hits = 0
+        self._disk_misses = 0
+        self._disk_evictions = 0
+        self._stats_lock = threading.Lock()
+
         self._init_db()
 
-    def _conn(self):
-        return sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-8000")
+        conn.execute("PRAGMA mmap_size=67108864")
+        return conn
+
+    @contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection; the block runs as one transaction."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        try:
+            with conn:
+                yield conn
+        finally:
+            if self._closed or self._pool.qsize() >= self.pool_size:
+                conn.close()
+            else:
+                self._pool.put(conn)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._closed = True
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
 
     def _init_db(self):
         with self._conn() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS enrichment_cache (
-                    key TEXT PRIMARY KEY,
-                    value_json TEXT NOT NULL,
-                    retrieved_at TEXT NOT NULL
+            conn.execute("BEGIN IMMEDIATE")
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            columns = {
+                row[1] for row in conn.execute("PRAGMA table_info(enrichment_cache)").fetchall()
+            }
+
+            if columns and "value_json" in columns:
+                self._migrate_v1(conn)
+            elif version > SCHEMA_VERSION:
+                raise RuntimeError(
+                    f"{self.db_path} uses cache format v{version}; this code supports up to v{SCHEMA_VERSION}"
                 )
-                """
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_retrieved_at ON enrichment_cache(retrieved_at)"
-            )
+
+            self._create_schema(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS enrichment_cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                encoding INTEGER NOT NULL,
+                retrieved_at INTEGER NOT NULL,
+                last_access INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_retrieved_at ON enrichment_cache(retrieved_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON enrichment_cache(last_access)"
+        )
+
+    def _migrate_v1(self, conn: sqlite3.Connection) -> None:
+        """Convert the original JSON-text/ISO-timestamp table in place."""
+        conn.execute("ALTER TABLE enrichment_cache RENAME TO enrichment_cache_v1")
+        conn.execute("DROP INDEX IF EXISTS idx_retrieved_at")
+        self._create_schema(conn)
+
+        now = int(time.time())
+        rows = []
+        for key, value_json, retrieved_at_str in conn.execute(
+            "SELECT key, value_json, retrieved_at FROM enrichment_cache_v1"
+        ):
+            try:
+                value = json.loads(value_json)
+                retrieved_at = datetime.fromisoformat(retrieved_at_str)
+            except (TypeError, ValueError):
+                continue
+            if retrieved_at.tzinfo is None:
+                retrieved_at = retrieved_at.replace(tzinfo=timezone.utc)
+            blob, encoding = _encode_value(value, self.compress, self.compress_min_bytes)
+            rows.append((key, blob, encoding, int(retrieved_at.timestamp()), now, len(blob)))
+
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO enrichment_cache(key, value, encoding, retrieved_at, last_access, size)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        conn.execute("DROP TABLE enrichment_cache_v1")
+        print(f"[CACHE] Migrated {len(rows)} enrichment cache entries to format v{SCHEMA_VERSION}")
 
     def get(self, key: str, max_age_days: int = 365) -> Optional[Dict[str, Any]]:
         """Return cached value if present and not older than max_age_days."""
-        cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+        return self.get_many([key], max_age_days).get(key)
+
+    def get_many(self, keys: Iterable[str], max_age_days: int = 365) -> Dict[str, Dict[str, Any]]:
+        """Return {key: value} for every key present and not older than max_age_days."""
+        return {
+            key: value
+            for key, (value, _) in self._lookup_many(keys, _days_ago(max_age_days)).items()
+        }
+
+    def lookup_many(
+        self,
+        keys: Iterable[str],
+        max_age_days: int = 365,
+        stale_grace_days: float = 0,
+    ) -> Dict[str, Tuple[Dict[str, Any], bool]]:
+        """Return {key: (value, is_stale)} for entries younger than max_age_days + stale_grace_days.
+
+        is_stale is True for entries past max_age_days but still within the grace window.
+        """
+        fresh_cutoff = _days_ago(max_age_days)
+        found = self._lookup_many(keys, _days_ago(max_age_days + stale_grace_days))
+        return {
+            key: (value, retrieved_at < fresh_cutoff)
+            for key, (value, retrieved_at) in found.items()
+        }
+
+    def _lookup_many(self, keys: Iterable[str], cutoff: int) -> Dict[str, Tuple[Dict[str, Any], int]]:
+        """Two-tier read: {key: (value, retrieved_at)} for entries retrieved at or after cutoff."""
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, Tuple[Dict[str, Any], int]] = {}
+
+        # Tier 1: memory
+        disk_keys = unique_keys
+        if self.memory is not None:
+            disk_keys = []
+            for key in unique_keys:
+                entry = self.memory.get(key)
+                if entry is not None and entry[1] >= cutoff:
+                    found[key] = entry
+                else:
+                    disk_keys.append(key)
+            if found:
+                self._touch_memory_hits(list(found))
+            if not disk_keys:
+                return found
+
+        # Tier 2: SQLite
+        for key, (value, retrieved_at, size) in self._select_many(disk_keys, cutoff).items():
+            found[key] = (value, retrieved_at)
+            if self.memory is not None:
+                self.memory.set(key, (value, retrieved_at), size=size)
+
+        return found
+
+    def _select_many(self, keys: List[str], cutoff: int) -> Dict[str, Tuple[Dict[str, Any], int, int]]:
+        """Read non-expired rows from SQLite: {key: (value, retrieved_at, size)}."""
+        now = int(time.time())
+        found: Dict[str, Tuple[Dict[str, Any], int, int]] = {}
+        touched: List[str] = []
 
         with self._conn() as conn:
-            row = conn.execute(
-                "SELECT value_json, retrieved_at FROM enrichment_cache WHERE key = ?",
-                (key,),
-            ).fetchone()
+            for start in range(0, len(keys), _MAX_SQL_VARS):
+                chunk = keys[start:start + _MAX_SQL_VARS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"""
+                    SELECT key, value, encoding, retrieved_at, last_access, size FROM enrichment_cache
+                    WHERE key IN ({placeholders}) AND retrieved_at >= ?
+                    """,
+                    (*chunk, cutoff),
+                ).fetchall()
+
+                for key, blob, encoding, retrieved_at, last_access, size in rows:
+                    found[key] = (_decode_value(blob, encoding), retrieved_at, size)
+                    if now - last_access >= self.access_resolution_s:
+                        touched.append(key)
+                    else:
+                        self._record_disk_access([key], last_access)
 
-        if not row:
-            return None
+            if touched:
+                self._touch(conn, touched, now)
+                self._record_disk_access(touched, now)
 
-        value_json, retrieved_at_str = row
-        retrieved_at = datetime.fromisoformat(retrieved_at_str)
+        with self._stats_lock:
+            self._disk_hits += len(found)
+            self._disk_misses += len(keys) - len(found)
+        return found
 
-        if retrieved_at < cutoff:
-            return None
+    def _touch_memory_hits(self, keys: List[str]) -> None:
+        """Refresh last_access on disk for memory hits whose disk copy hasn't been touched lately."""
+        now = int(time.time())
+        with self._stats_lock:
+            stale = [
+                key for key in keys
+                if now - self._disk_access.get(key, 0) >= self.access_resolution_s
+            ]
+        if not stale:
+            return
+        with self._conn() as conn:
+            self._touch(conn, stale, now)
+        self._record_disk_access(stale, now)
 
-        return json.loads(value_json)
+    def _record_disk_access(self, keys: Iterable[str], last_access: int) -> None:
+        if self.memory is None:
+            return
+        with self._stats_lock:
+            # Bounded by the memory tier; forgetting a key only costs one extra touch
+            if len(self._disk_access) > 2 * (self.memory.max_entries or 65536):
+                self._disk_access.clear()
+            for key in keys:
+                self._disk_access[key] = last_access
+
+    @staticmethod
+    def _touch(conn: sqlite3.Connection, keys: List[str], now: int) -> None:
+        for start in range(0, len(keys), _MAX_SQL_VARS):
+            chunk = keys[start:start + _MAX_SQL_VARS]
+            placeholders = ",".join("?" * len(chunk))
+            conn.execute(
+                f"UPDATE enrichment_cache SET last_access = ? WHERE key IN ({placeholders})",
+                (now, *chunk),
+            )
 
     def set(self, key: str, value: Dict[str, Any], retrieved_at: Optional[datetime] = None) -> None:
-        if retrieved_at is None:
-            retrieved_at = datetime.now(timezone.utc)
+        self.set_many({key: value}, retrieved_at)
 
+    def set_many(
+        self,
+        items: Union[Mapping[str, Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]],
+        retrieved_at: Optional[datetime] = None,
+    ) -> None:
+        """Upsert many entries in a single transaction."""
+        now = int(time.time())
+        retrieved_at_ts = now if retrieved_at is None else int(retrieved_at.timestamp())
+
+        pairs = items.items() if isinstance(items, Mapping) else items
+        rows = []
+        for key, value in pairs:
+            blob, encoding = _encode_value(value, self.compress, self.compress_min_bytes)
+            rows.append((key, blob, encoding, retrieved_at_ts, now, len(blob)))
+            if self.memory is not None:
+                self.memory.set(key, (value, retrieved_at_ts), size=len(blob))
+        if not rows:
+            return
+
+        self._record_disk_access((row[0] for row in rows), now)
         with self._conn() as conn:
-            conn.execute(
+            conn.executemany(
                 """
-                INSERT INTO enrichment_cache(key, value_json, retrieved_at)
-                VALUES (?, ?, ?)
+                INSERT INTO enrichment_cache(key, value, encoding, retrieved_at, last_access, size)
+                VALUES (?, ?, ?, ?, ?, ?)
                 ON CONFLICT(key) DO UPDATE SET
-                    value_json=excluded.value_json,
-                    retrieved_at=excluded.retrieved_at
+                    value=excluded.value,
+                    encoding=excluded.encoding,
+                    retrieved_at=excluded.retrieved_at,
+                    last_access=excluded.last_access,
+                    size=excluded.size
                 """,
-                (key, json.dumps(value), retrieved_at.isoformat()),
+                rows,
             )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Drop least-recently-accessed entries until max_rows/max_bytes hold."""
+        if self.max_rows is None and self.max_bytes is None:
+            return 0
+
+        count, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM enrichment_cache"
+        ).fetchone()
+        excess_rows = max(0, count - self.max_rows) if self.max_rows is not None else 0
+        excess_bytes = max(0, total_bytes - self.max_bytes) if self.max_bytes is not None else 0
+        if not excess_rows and not excess_bytes:
+            return 0
+
+        victims: List[str] = []
+        freed = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM enrichment_cache ORDER BY last_access ASC"
+        ):
+            if len(victims) >= excess_rows and freed >= excess_bytes:
+                break
+            victims.append(key)
+            freed += size
+
+        for start in range(0, len(victims), _MAX_SQL_VARS):
+            chunk = victims[start:start + _MAX_SQL_VARS]
+            placeholders = ",".join("?" * len(chunk))
+            conn.execute(f"DELETE FROM enrichment_cache WHERE key IN ({placeholders})", chunk)
+        with self._stats_lock:
+            self._disk_evictions += len(victims)
+        return len(victims)
 
     def delete(self, key: str) -> None:
+        if self.memory is not None:
+            self.memory.delete(key)
         with self._conn() as conn:
             conn.execute("DELETE FROM enrichment_cache WHERE key = ?", (key,))
 
     def prune(self, max_age_days: int = 365) -> int:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+        cutoff = _days_ago(max_age_days)
+        if self.memory is not None:
+            self.memory.remove_where(lambda _key, entry: entry[1] < cutoff)
         with self._conn() as conn:
             cur = conn.execute(
                 "DELETE FROM enrichment_cache WHERE retrieved_at < ?",
-                (cutoff.isoformat(),),
+                (cutoff,),
             )
             return cur.rowcount
 
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-tier counters plus disk row count and stored value bytes."""
+        with self._conn() as conn:
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM enrichment_cache"
+            ).fetchone()
+        with self._stats_lock:
+            disk = {
+                "rows": count,
+                "bytes": total_bytes,
+                "hits": self._disk_hits,
+                "misses": self._disk_misses,
+                "evictions": self._disk_evictions,
+            }
+        stats = {"disk": disk}
+        if self.memory is not None:
+            stats["memory"] = self.memory.stats()
+        return stats
+
     def generate_key(self, metadata: Dict[str, Any]) -> str:
         """Fallback product id if metadata doesn't include an explicit id."""
         relevant_parts = [
@@ -0,0 +1,125 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+class SQLiteImageCache:
+    """Persistent cache of image lookups keyed by URL.
+
+    Two kinds of entries are stored:
+    - OG_IMAGE:   product page URL -> resolved og:image URL ("" if the page had none)
+    - RENDERABLE: image URL -> whether it serves image/*
+
+    Positive and negative results expire separately, and the table is kept
+    under max_rows by evicting the oldest checks.
+    """
+
+    OG_IMAGE = "og_image"
+    RENDERABLE = "renderable"
+
+    def __init__(
+        self,
+        db_dir: str = "data/cache",
+        db_name: str = "image_cache.sqlite3",
+        positive_ttl_s: float = 30 * 24 * 3600,
+        negative_ttl_s: float = 12 * 3600,
+        max_rows: int = 50_000,
+    ):
+        db_dir_path = Path(db_dir)
+        db_dir_path.mkdir(parents=True, exist_ok=True)
+
+        self.db_path = db_dir_path / db_name
+        self.positive_ttl_s = positive_ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.max_rows = max_rows
+        self._writes_since_evict = 0
+        self._init_db()
+
+    def _conn(self):
+        return sqlite3.connect(self.db_path, timeout=5.0)
+
+    def _init_db(self):
+        with self._conn() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS image_cache (
+                    kind TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    ok INTEGER NOT NULL,
+                    value TEXT NOT NULL,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY (kind, url)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_image_checked_at ON image_cache(checked_at)"
+            )
+
+    def get(self, kind: str, url: str) -> Optional[Tuple[bool, str]]:
+        """Return (ok, value) if a non-expired entry exists, else None."""
+        now = time.time()
+        with self._conn() as conn:
+            row = conn.execute(
+                """
+                SELECT ok, value FROM image_cache
+                WHERE kind = ? AND url = ?
+                  AND checked_at >= CASE WHEN ok THEN ? ELSE ? END
+                """,
+                (kind, url, now - self.positive_ttl_s, now - self.negative_ttl_s),
+            ).fetchone()
+
+        if not row:
+            return None
+        return bool(row[0]), row[1]
+
+    def set(self, kind: str, url: str, ok: bool, value: str = "") -> None:
+        with self._conn() as conn:
+            conn.execute(
+                """
+                INSERT INTO image_cache(kind, url, ok, value, checked_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(kind, url) DO UPDATE SET
+                    ok=excluded.ok,
+                    value=excluded.value,
+                    checked_at=excluded.checked_at
+                """,
+                (kind, url, int(bool(ok)), value or "", time.time()),
+            )
+
+        # Counting rows on every write is wasteful; check the bound periodically
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= 100:
+            self._writes_since_evict = 0
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete the oldest entries beyond max_rows. Returns rows removed."""
+        with self._conn() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM image_cache").fetchone()
+            excess = count - self.max_rows
+            if excess <= 0:
+                return 0
+            cur = conn.execute(
+                """
+                DELETE FROM image_cache WHERE rowid IN (
+                    SELECT rowid FROM image_cache ORDER BY checked_at ASC LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+            return cur.rowcount
+
+    def prune(self) -> int:
+        """Delete all expired entries. Returns rows removed."""
+        now = time.time()
+        with self._conn() as conn:
+            cur = conn.execute(
+                """
+                DELETE FROM image_cache
+                WHERE checked_at < CASE WHEN ok THEN ? ELSE ? END
+                """,
+                (now - self.positive_ttl_s, now - self.negative_ttl_s),
+            )
+            return cur.rowcount
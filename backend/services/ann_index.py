@@ -0,0 +1,172 @@
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import faiss
+import numpy as np
+
+# Saved next to index.faiss so the index's build/search parameters are visible without loading it
+INDEX_CONFIG_FILE = "index_config.json"
+
+INDEX_TYPES = ("flat", "ivf-flat", "hnsw", "ivf-pq")
+
+# Index type: exact "flat" scan, or approximate "ivf-flat" / "hnsw" / "ivf-pq"
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+# IVF: number of clusters (0 = about 4*sqrt(n)) and clusters scanned per query
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", "0"))
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+# HNSW: graph degree, build-time and query-time beam width
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+# IVF-PQ: sub-quantizers (must divide the embedding dimension) and bits per code
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "16"))
+FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+
+# Parameters baked in at build time; changing one of these requires a rebuild
+_BUILD_PARAMS = {
+    "flat": (),
+    "ivf-flat": ("nlist",),
+    "hnsw": ("M",),
+    "ivf-pq": ("nlist", "pq_m", "pq_nbits"),
+}
+
+
+def index_config_from_env() -> Dict[str, Any]:
+    """The index configuration requested by the FAISS_* settings."""
+    return {
+        "type": FAISS_INDEX_TYPE,
+        "nlist": FAISS_NLIST,
+        "nprobe": FAISS_NPROBE,
+        "M": FAISS_HNSW_M,
+        "efConstruction": FAISS_HNSW_EF_CONSTRUCTION,
+        "efSearch": FAISS_HNSW_EF_SEARCH,
+        "pq_m": FAISS_PQ_M,
+        "pq_nbits": FAISS_PQ_NBITS,
+    }
+
+
+def _auto_nlist(n: int) -> int:
+    # ~4*sqrt(n) clusters, but at least ~39 training points per cluster
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def create_index(vectors: np.ndarray, config: Dict[str, Any]) -> faiss.Index:
+    """Build (train + add) a FAISS index of the configured type over vectors.
+
+    Args:
+        vectors: float32 matrix, one row per document (row i gets index id i)
+        config: Index configuration (see index_config_from_env)
+
+    Returns:
+        The populated FAISS index
+    """
+    kind = config.get("type", "flat")
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS_INDEX_TYPE {kind!r}; expected one of {INDEX_TYPES}")
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config["M"])
+        index.hnsw.efConstruction = config["efConstruction"]
+    else:
+        nlist = config.get("nlist") or _auto_nlist(n)
+        quantizer = faiss.IndexFlatL2(dim)
+        if kind == "ivf-flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            if dim % config["pq_m"]:
+                raise ValueError(f"FAISS_PQ_M={config['pq_m']} must divide the embedding dimension {dim}")
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, config["pq_m"], config["pq_nbits"])
+        index.train(vectors)
+        # reconstruct() (used by the embedding parity check) needs an id -> list map;
+        # set before add() so later additions are mapped too
+        index.set_direct_map_type(faiss.DirectMap.Array)
+
+    apply_search_params(index, config)
+    index.add(vectors)
+    return index
+
+
+def apply_search_params(index: faiss.Index, config: Dict[str, Any]) -> None:
+    """Set query-time knobs (nprobe / efSearch); these don't require a rebuild."""
+    if isinstance(index, faiss.IndexIVF) and config.get("nprobe"):
+        index.nprobe = min(config["nprobe"], index.nlist)
+    elif isinstance(index, faiss.IndexHNSW) and config.get("efSearch"):
+        index.hnsw.efSearch = config["efSearch"]
+
+
+def describe_index(index: faiss.Index) -> Dict[str, Any]:
+    """Type and parameters of an existing index, in index_config_from_env() terms."""
+    config: Dict[str, Any] = {"type": "flat", "dim": index.d, "ntotal": index.ntotal}
+    if isinstance(index, faiss.IndexHNSW):
+        config.update(
+            type="hnsw",
+            M=index.hnsw.nb_neighbors(1),
+            efConstruction=index.hnsw.efConstruction,
+            efSearch=index.hnsw.efSearch,
+        )
+    elif isinstance(index, faiss.IndexIVFPQ):
+        config.update(
+            type="ivf-pq",
+            nlist=index.nlist,
+            nprobe=index.nprobe,
+            pq_m=index.pq.M,
+            pq_nbits=index.pq.nbits,
+        )
+    elif isinstance(index, faiss.IndexIVF):
+        config.update(type="ivf-flat", nlist=index.nlist, nprobe=index.nprobe)
+    return config
+
+
+def config_mismatch(index: Union[faiss.Index, Dict[str, Any]], config: Dict[str, Any]) -> Optional[str]:
+    """Why an existing index doesn't match the requested configuration (None if it does).
+
+    index is the index itself or its describe_index() output (e.g. from
+    load_index_config, to check a saved index without loading it).
+    """
+    current = index if isinstance(index, dict) else describe_index(index)
+    if current["type"] != config.get("type", "flat"):
+        return f"index type is {current['type']!r}, configured {config.get('type')!r}"
+    for param in _BUILD_PARAMS[current["type"]]:
+        # 0 means "automatic" and accepts whatever the index was built with
+        if config.get(param) and config[param] != current.get(param):
+            return f"{param} is {current.get(param)}, configured {config[param]}"
+    return None
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """
+    Whether vectors can be deleted in place. Only the flat index renumbers
+    ids after remove_ids the way the LangChain store expects; HNSW can't
+    remove at all.
+    """
+    return isinstance(index, faiss.IndexFlat)
+
+
+def quantize_like(index: faiss.Index, vectors: np.ndarray) -> np.ndarray:
+    """Round-trip vectors through a lossy index's codec so they compare with reconstruct()."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if isinstance(index, faiss.IndexIVFPQ):
+        return index.sa_decode(index.sa_encode(vectors))
+    return vectors
+
+
+def save_index_config(directory: str, index: faiss.Index) -> None:
+    with open(Path(directory) / INDEX_CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump(describe_index(index), f, indent=2)
+
+
+def load_index_config(directory: str) -> Optional[Dict[str, Any]]:
+    """describe_index() of the index saved in directory (None for saves that predate index_config.json)."""
+    try:
+        with open(Path(directory) / INDEX_CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,285 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.csv_loader import get_documents
+from services.enrichment import ENRICHMENT_STALE_GRACE_DAYS, enrich_product, get_enrichment_cache
+from services.http_client import HTTP_MAX_RETRIES
+from services.product_api import SEARCH_ENGINES, set_serpapi_call_hook
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CSV_PATH = BASE_DIR / "data" / "csv" / "beautyProducts.csv"
+DEFAULT_CHECKPOINT_PATH = BASE_DIR / "data" / "cache" / "catalog_enrichment_checkpoint.json"
+
+# Worst case SerpAPI requests for one product (every engine tried, every attempt retried)
+CALLS_PER_PRODUCT = len(SEARCH_ENGINES) * (HTTP_MAX_RETRIES + 1)
+
+
+class SerpApiBudget:
+    """Rate limit and monthly quota shared by all enrichment workers.
+
+    acquire() is installed as the SerpAPI call hook: it spaces requests
+    (retries included) to rate_per_s and counts them. Workers reserve a product's worst-case call
+    count before starting it, so the budget is never overshot.
+    """
+
+    def __init__(self, monthly_budget: int, calls_used: int = 0, rate_per_s: float = 1.0):
+        self.monthly_budget = monthly_budget
+        self.calls_used = calls_used
+        self.interval_s = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self._reserved = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval_s
+            self.calls_used += 1
+        if slot > now:
+            time.sleep(slot - now)
+
+    def reserve(self, calls: int) -> bool:
+        with self._lock:
+            if self.calls_used + self._reserved + calls > self.monthly_budget:
+                return False
+            self._reserved += calls
+            return True
+
+    def release(self, calls: int) -> None:
+        with self._lock:
+            self._reserved -= calls
+
+
+def _current_month() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _load_checkpoint(path: Path) -> Dict[str, Any]:
+    """Load checkpoint state; usage and progress reset when the month changes."""
+    state: Dict[str, Any] = {"month": _current_month(), "serpapi_calls": 0, "completed": []}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("month") == state["month"]:
+            state.update(saved)
+    return state
+
+
+def _save_checkpoint(path: Path, state: Dict[str, Any]) -> None:
+    """Write the checkpoint atomically (write temp file, then rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m {secs:02d}s"
+
+
+def _select_products(
+    csv_path: str,
+    brands: Optional[Iterable[str]],
+    product_types: Optional[Iterable[str]],
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Load the catalog and apply case-insensitive brand / product type filters."""
+    brand_set = {b.strip().lower() for b in brands or []}
+    type_set = {t.strip().lower() for t in product_types or []}
+    cache = get_enrichment_cache()
+
+    selected: List[Tuple[str, Dict[str, Any]]] = []
+    for document in get_documents(csv_path):
+        metadata = document.metadata or {}
+        if brand_set and str(metadata.get("brand", "")).strip().lower() not in brand_set:
+            continue
+        if type_set and str(metadata.get("product_type", "")).strip().lower() not in type_set:
+            continue
+        product_id = metadata.get("id") or cache.generate_key(metadata)
+        selected.append((product_id, metadata))
+    return selected
+
+
+def enrich_catalog(
+    csv_path: str = str(DEFAULT_CSV_PATH),
+    brands: Optional[Iterable[str]] = None,
+    product_types: Optional[Iterable[str]] = None,
+    workers: int = 4,
+    rate_per_s: float = 1.0,
+    monthly_budget: int = 250,
+    checkpoint_path: str = str(DEFAULT_CHECKPOINT_PATH),
+    max_age_days: int = 365,
+    limit: Optional[int] = None,
+    flush_every: int = 25,
+) -> Dict[str, int]:
+    """Enrich (a subset of) the catalog into the enrichment cache.
+
+    Products with a fresh cache entry or already completed this month are
+    skipped. Results are flushed to the cache together with the checkpoint
+    every flush_every products, so an interrupted run resumes where it stopped.
+    A failed lookup is not checkpointed and doesn't replace a stale entry
+    that still holds enrichment data, so a rerun retries that product.
+
+    Returns:
+        Summary counters for the run
+    """
+    cache = get_enrichment_cache()
+    checkpoint = Path(checkpoint_path)
+    state = _load_checkpoint(checkpoint)
+    completed: Set[str] = set(state["completed"])
+
+    products = _select_products(csv_path, brands, product_types)
+    candidates = [(pid, meta) for pid, meta in products if pid not in completed]
+    cached = cache.lookup_many(
+        [pid for pid, _ in candidates],
+        max_age_days=max_age_days,
+        stale_grace_days=ENRICHMENT_STALE_GRACE_DAYS,
+    )
+    fresh = {pid for pid, (_, is_stale) in cached.items() if not is_stale}
+    # Stale entries with data are still served; a failed lookup must not overwrite them
+    previously_enriched = {
+        pid for pid, (value, is_stale) in cached.items() if is_stale and value.get("enrichment")
+    }
+    todo = [(pid, meta) for pid, meta in candidates if pid not in fresh]
+    if limit is not None:
+        todo = todo[:limit]
+
+    print(
+        f"[CATALOG] {len(products)} products selected, {len(products) - len(candidates)} completed earlier, "
+        f"{len(fresh)} fresh in cache, {len(todo)} to enrich"
+    )
+
+    budget = SerpApiBudget(monthly_budget, state["serpapi_calls"], rate_per_s)
+    print(f"[CATALOG] SerpAPI budget {_current_month()}: {budget.calls_used}/{monthly_budget} used")
+
+    def flush(buffer: Dict[str, Dict[str, Any]]) -> None:
+        if buffer:
+            cache.set_many(buffer)
+            buffer.clear()
+        state["serpapi_calls"] = budget.calls_used
+        state["completed"] = sorted(completed)
+        _save_checkpoint(checkpoint, state)
+
+    buffer: Dict[str, Dict[str, Any]] = {}
+    enriched = 0
+    failed = 0
+    budget_exhausted = False
+    started_at = time.monotonic()
+    remaining = iter(todo)
+
+    set_serpapi_call_hook(budget.acquire)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="catalog") as executor:
+            in_flight: Dict[Any, str] = {}
+            while True:
+                # Keep the pool busy without queueing far ahead of the budget
+                while not budget_exhausted and len(in_flight) < workers:
+                    item = next(remaining, None)
+                    if item is None:
+                        break
+                    if not budget.reserve(CALLS_PER_PRODUCT):
+                        budget_exhausted = True
+                        break
+                    product_id, metadata = item
+                    in_flight[executor.submit(enrich_product, product_id, metadata)] = product_id
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    product_id = in_flight.pop(future)
+                    budget.release(CALLS_PER_PRODUCT)
+                    product = future.result()
+                    # enrich_product swallows upstream errors (missing key, outage, retries exhausted)
+                    if product.get("enrichment") is None:
+                        failed += 1
+                        if product_id not in previously_enriched:
+                            buffer[product_id] = product
+                    else:
+                        buffer[product_id] = product
+                        completed.add(product_id)
+                        enriched += 1
+
+                    processed = enriched + failed
+                    if processed % flush_every == 0:
+                        flush(buffer)
+                        elapsed = time.monotonic() - started_at
+                        rate = processed / elapsed if elapsed > 0 else 0.0
+                        eta = (len(todo) - processed) / rate if rate > 0 else 0.0
+                        print(
+                            f"[CATALOG] {processed}/{len(todo)} processed ({failed} failed) | {rate:.2f} products/s | "
+                            f"ETA {_format_duration(eta)} | SerpAPI {budget.calls_used}/{monthly_budget}"
+                        )
+    finally:
+        set_serpapi_call_hook(None)
+        flush(buffer)
+
+    elapsed = time.monotonic() - started_at
+    if budget_exhausted:
+        print("[CATALOG] Monthly SerpAPI budget reached; rerun next month or raise --monthly-budget to resume")
+    print(
+        f"[CATALOG] Done: {enriched} enriched, {failed} failed in {_format_duration(elapsed)}, "
+        f"SerpAPI {budget.calls_used}/{monthly_budget} used"
+    )
+
+    return {
+        "selected": len(products),
+        "skipped_fresh": len(fresh),
+        "skipped_completed": len(products) - len(candidates),
+        "enriched": enriched,
+        "failed": failed,
+        "remaining": len(todo) - enriched - failed,
+        "serpapi_calls": budget.calls_used,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI entry point: python -m services.catalog_enrichment [options] (run from backend/)."""
+    parser = argparse.ArgumentParser(
+        description="Pre-enrich the product catalog into the enrichment cache.",
+    )
+    parser.add_argument("--csv", default=str(DEFAULT_CSV_PATH), help="Catalog CSV path")
+    parser.add_argument("--brand", action="append", help="Only enrich this brand (repeatable)")
+    parser.add_argument("--product-type", action="append", help="Only enrich this product type (repeatable)")
+    parser.add_argument("--workers", type=int, default=4, help="Products enriched concurrently")
+    parser.add_argument("--rate", type=float, default=1.0, help="Max SerpAPI requests per second")
+    parser.add_argument(
+        "--monthly-budget",
+        type=int,
+        default=int(os.getenv("SERPAPI_MONTHLY_BUDGET", "250")),
+        help="Max SerpAPI requests per calendar month (including earlier runs)",
+    )
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT_PATH), help="Checkpoint file")
+    parser.add_argument("--max-age-days", type=int, default=365, help="Cache entries newer than this are skipped")
+    parser.add_argument("--limit", type=int, default=None, help="Enrich at most this many products")
+    args = parser.parse_args(argv)
+
+    enrich_catalog(
+        csv_path=args.csv,
+        brands=args.brand,
+        product_types=args.product_type,
+        workers=args.workers,
+        rate_per_s=args.rate,
+        monthly_budget=args.monthly_budget,
+        checkpoint_path=args.checkpoint,
+        max_age_days=args.max_age_days,
+        limit=args.limit,
+    )
+
+
+if __name__ == "__main__":
+    main()
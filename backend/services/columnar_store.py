@@ -0,0 +1,208 @@
+import json
+import mmap
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.ann_index import apply_search_params, index_config_from_env
+from services.csv_loader import document_text
+
+# Files written inside the index directory (no pickle anywhere)
+INDEX_FILE = "index.faiss"
+STORE_FILE = "store.json"
+COLUMNS_DIR = "columns"
+STORE_VERSION = 1
+
+# Memory-map index vectors instead of reading them into the heap
+INDEX_MMAP = os.getenv("INDEX_MMAP", "1").lower() in ("1", "true", "yes")
+
+# Reserved column names (metadata fields are stored under their own names)
+DOCSTORE_ID_COLUMN = "_id"
+PAGE_CONTENT_COLUMN = "_page_content"
+
+
+def _write_column(directory: Path, name: str, values: List[str]) -> None:
+    """Write strings as one UTF-8 blob plus an int64 offsets array."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    with open(directory / f"{name}.bin", "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(directory / f"{name}.offsets.npy", offsets)
+
+
+class StringColumn:
+    """Read-only, memory-mapped column of strings written by _write_column."""
+
+    def __init__(self, directory: Path, name: str):
+        # Offsets are 8 bytes per row; keep them in memory and map only the string data
+        self.offsets = np.load(directory / f"{name}.offsets.npy")
+        with open(directory / f"{name}.bin", "rb") as f:
+            # mmap can't map an empty file
+            if os.fstat(f.fileno()).st_size:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._data = b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self._data[int(self.offsets[row]):int(self.offsets[row + 1])].decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        return [self[row] for row in range(len(self))]
+
+
+class ColumnarDocstore(Docstore, AddableMixin):
+    """Docstore over memory-mapped metadata columns.
+
+    Documents are assembled only when searched for (i.e. for search hits);
+    page_content is rebuilt from the metadata unless the store had to keep
+    it. Documents added or deleted after loading (incremental index updates)
+    are held in memory until the next save.
+    """
+
+    def __init__(self, columns: Dict[str, StringColumn]):
+        self.columns = columns
+        self._fields = [name for name in columns if name not in (DOCSTORE_ID_COLUMN, PAGE_CONTENT_COLUMN)]
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(columns[DOCSTORE_ID_COLUMN].tolist())}
+        self._added: Dict[str, Document] = {}
+        self._deleted: set = set()
+
+    def _document(self, row: int, doc_id: str) -> Document:
+        metadata = {field: self.columns[field][row] for field in self._fields}
+        if PAGE_CONTENT_COLUMN in self.columns:
+            page_content = self.columns[PAGE_CONTENT_COLUMN][row]
+        else:
+            page_content = document_text(metadata)
+        return Document(id=doc_id, page_content=page_content, metadata=metadata)
+
+    def _contains(self, doc_id: str) -> bool:
+        return doc_id in self._added or (doc_id in self._row_by_id and doc_id not in self._deleted)
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search in self._added:
+            return self._added[search]
+        row = self._row_by_id.get(search)
+        if row is None or search in self._deleted:
+            return f"ID {search} not found."
+        return self._document(row, search)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        overlapping = [doc_id for doc_id in texts if self._contains(doc_id)]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._added.update(texts)
+
+    def delete(self, ids: List) -> None:
+        missing = [doc_id for doc_id in ids if not self._contains(doc_id)]
+        if missing:
+            raise ValueError(f"Tried to delete ids that does not exist: {missing}")
+        for doc_id in ids:
+            if self._added.pop(doc_id, None) is None:
+                self._deleted.add(doc_id)
+
+    def __len__(self) -> int:
+        return len(self._row_by_id) - len(self._deleted) + len(self._added)
+
+    @property
+    def modified(self) -> bool:
+        """True once documents were added or deleted (columns no longer match index rows)."""
+        return bool(self._added or self._deleted)
+
+
+def has_columnar_store(directory: str) -> bool:
+    return (Path(directory) / STORE_FILE).exists()
+
+
+def save_columnar(vector_store: FAISS, directory: str) -> None:
+    """Write the index plus metadata columns, in index row order."""
+    out = Path(directory)
+    (out / COLUMNS_DIR).mkdir(parents=True, exist_ok=True)
+    faiss.write_index(vector_store.index, str(out / INDEX_FILE))
+
+    ids = [vector_store.index_to_docstore_id[row] for row in range(vector_store.index.ntotal)]
+    documents = [vector_store.docstore.search(doc_id) for doc_id in ids]
+
+    fields: List[str] = []
+    for document in documents:
+        fields.extend(field for field in document.metadata if field not in fields)
+    columns = {DOCSTORE_ID_COLUMN: ids}
+    for field in fields:
+        columns[field] = [str(d.metadata.get(field, "")) for d in documents]
+    # Only store page_content if it can't be rebuilt from the metadata
+    if any(d.page_content != document_text(d.metadata) for d in documents):
+        columns[PAGE_CONTENT_COLUMN] = [d.page_content for d in documents]
+
+    for name, values in columns.items():
+        _write_column(out / COLUMNS_DIR, name, values)
+    with open(out / STORE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": STORE_VERSION, "rows": len(ids), "columns": list(columns)}, f, indent=2)
+
+
+def load_columnar(directory: str, embeddings: Embeddings, mmap_vectors: bool = INDEX_MMAP) -> FAISS:
+    """Load an index saved by save_columnar, memory-mapping vectors and metadata."""
+    started = time.perf_counter()
+    source = Path(directory)
+    with open(source / STORE_FILE, "r", encoding="utf-8") as f:
+        store = json.load(f)
+    if store.get("version") != STORE_VERSION:
+        raise ValueError(f"Unsupported index store version {store.get('version')} in {directory}")
+
+    index = faiss.read_index(str(source / INDEX_FILE), faiss.IO_FLAG_MMAP_IFC if mmap_vectors else 0)
+    columns = {name: StringColumn(source / COLUMNS_DIR, name) for name in store["columns"]}
+    docstore = ColumnarDocstore(columns)
+
+    vector_store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(columns[DOCSTORE_ID_COLUMN].tolist())),
+    )
+    print(
+        f"Loaded {index.ntotal} vectors ({'memory-mapped' if mmap_vectors else 'in memory'}) "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return vector_store
+
+
+def load_index(directory: str, embeddings: Embeddings) -> FAISS:
+    """Load a saved index: the columnar format, or an older pickled LangChain save."""
+    if has_columnar_store(directory):
+        vector_store = load_columnar(directory, embeddings)
+    else:
+        vector_store = FAISS.load_local(
+            folder_path=directory,
+            embeddings=embeddings,
+            allow_dangerous_deserialization=True,
+        )
+    # nprobe / efSearch come from the current settings, not the saved index
+    apply_search_params(vector_store.index, index_config_from_env())
+    return vector_store
+
+
+def make_writable(vector_store: FAISS) -> None:
+    """Copy a memory-mapped index into owned memory so vectors can be added or removed."""
+    vector_store.index = faiss.deserialize_index(faiss.serialize_index(vector_store.index))
+
+
+def metadata_column(vector_store: FAISS, field: str) -> List[str]:
+    """One metadata field for every index row, read straight from the columns when possible."""
+    docstore = vector_store.docstore
+    if isinstance(docstore, ColumnarDocstore) and not docstore.modified and field in docstore.columns:
+        return docstore.columns[field].tolist()
+
+    values = []
+    for row in range(vector_store.index.ntotal):
+        document = docstore.search(vector_store.index_to_docstore_id[row])
+        values.append(str(document.metadata.get(field, "")) if isinstance(document, Document) else "")
+    return values
@@ -1,44 +1,89 @@
+from typing import Dict, Iterator, Optional
+
 import pandas as pd
 from langchain_core.documents import Document
 
+# CSV column -> metadata field
+CSV_COLUMNS = {
+    "ID": "id",
+    "Brand": "brand",
+    "Name": "name",
+    "Product": "product_type",
+    "Description": "description",
+}
+
+# (label, metadata field) lines that make up a document's page_content
+TEXT_FIELDS = (
+    ("Brand", "brand"),
+    ("Name", "name"),
+    ("Category", "product_type"),
+    ("Description", "description"),
+)
+
 
-def get_documents(csv_path: str) -> list[Document]:
+def document_text(metadata: Dict[str, str]) -> str:
+    """Build a product's page_content from its metadata (same text the CSV loader produces)."""
+    return "\n".join(f"{label}: {metadata.get(field, '')}" for label, field in TEXT_FIELDS)
+
+
+def get_documents(csv_path: str, chunksize: Optional[int] = None) -> list[Document]:
     """Load and convert CSV data into LangChain Document objects.
-    
+
     Args:
         csv_path: Path to the CSV file containing product data
-    
+        chunksize: If set, read the CSV in chunks of this many rows
+
     Returns:
         List of Document objects with combined text content and structured metadata
     """
-    # Read CSV data
-    df = pd.read_csv(csv_path)
-    documents = []
-    
-    # Convert each row to a Document
-    for _, row in df.iterrows():
-        # Create combined text representation for embedding/search
-        document_text = (
-            f"Brand: {row.get('Brand', '')}\n"
-            f"Name: {row.get('Name', '')}\n"
-            f"Category: {row.get('Product', '')}\n"
-            f"Description: {row.get('Description', '')}"
-        )
-        
-        # Extract structured metadata
-        metadata = {
-            "id": str(row.get("ID", "")),
-            "brand": str(row.get("Brand", "")),
-            "name": str(row.get("Name", "")),
-            "product_type": str(row.get("Product", "")),
-            "description": str(row.get("Description", "")),
-        }
-        
-        documents.append(
-            Document(
-                page_content=document_text,
-                metadata=metadata,
-            )
-        )
-    
-    return documents
\ No newline at end of file
+    documents: list[Document] = []
+    for batch in iter_document_batches(csv_path, chunksize):
+        documents.extend(batch)
+    return documents
+
+
+def iter_document_batches(csv_path: str, chunksize: Optional[int] = None) -> Iterator[list[Document]]:
+    """Stream Documents from the CSV, one list per chunk of rows.
+
+    Args:
+        csv_path: Path to the CSV file containing product data
+        chunksize: Rows per chunk (None reads the whole file as one chunk)
+
+    Yields:
+        Lists of Document objects in file order
+    """
+    # Read everything as text so every chunk parses identically
+    if chunksize:
+        for df in pd.read_csv(csv_path, dtype=str, chunksize=chunksize):
+            yield frame_to_documents(df)
+    else:
+        yield frame_to_documents(pd.read_csv(csv_path, dtype=str))
+
+
+def frame_to_documents(df: pd.DataFrame) -> list[Document]:
+    """Convert a product DataFrame to Documents using column-wise string ops.
+
+    Args:
+        df: DataFrame with the CSV_COLUMNS columns (missing ones are treated as empty)
+
+    Returns:
+        List of Document objects, one per row
+    """
+    # Missing columns behave like row.get(col, ""); missing cells stringify as "nan"
+    columns = {
+        field: (df[col].fillna("nan").astype(str) if col in df.columns else pd.Series("", index=df.index))
+        for col, field in CSV_COLUMNS.items()
+    }
+
+    # Create combined text representation for embedding/search (vectorized)
+    texts = None
+    for label, field in TEXT_FIELDS:
+        line = f"{label}: " + columns[field]
+        texts = line if texts is None else texts + "\n" + line
+
+    # Extract structured metadata
+    fields = list(columns)
+    return [
+        Document(page_content=text, metadata=dict(zip(fields, values)))
+        for text, *values in zip(texts.tolist(), *(columns[f].tolist() for f in fields))
+    ]
@@ -0,0 +1,232 @@
+import argparse
+import os
+from pathlib import Path
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.ann_index import quantize_like
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Backend: "torch" (sentence-transformers eager PyTorch), "onnx" (exported fp32), "onnx-int8" (quantized)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Inference threads (0 = library default) and encode batch size
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Where `python -m services.embedding_backends export` writes the ONNX model + tokenizer
+ONNX_MODEL_DIR = os.getenv(
+    "EMBEDDING_ONNX_DIR",
+    str(Path(__file__).resolve().parents[1] / "models" / "all-MiniLM-L6-v2-onnx"),
+)
+
+# all-MiniLM-L6-v2 truncates inputs at 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """MiniLM sentence embeddings served by ONNX Runtime.
+
+    Reproduces the sentence-transformers pipeline (mean pooling over the
+    attention mask, then L2 normalization) so vectors stay compatible with an
+    index built by the torch backend.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = ONNX_MODEL_DIR,
+        quantized: bool = False,
+        threads: int = 0,
+        batch_size: int = 32,
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as error:
+            raise RuntimeError(
+                "The ONNX embedding backend requires `pip install onnxruntime tokenizers`"
+            ) from error
+
+        model_path = Path(model_dir) / ("model_int8.onnx" if quantized else "model.onnx")
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"{model_path} not found; export it with `python -m services.embedding_backends export`"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(Path(model_dir) / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self.batch_size = max(1, batch_size)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + self.batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": input_ids,
+                "attention_mask": attention_mask,
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(
+                None, {name: value for name, value in feeds.items() if name in self.input_names}
+            )[0]
+
+            # Mean pooling over real tokens, then L2 normalize (sentence-transformers Normalize module)
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+
+        return np.vstack(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def create_embeddings(
+    backend: str = EMBEDDING_BACKEND,
+    threads: int = EMBEDDING_THREADS,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    model_name: str = EMBEDDING_MODEL_NAME,
+) -> Embeddings:
+    """Build the embedding model for the configured backend."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {BACKENDS}")
+
+    if backend == "torch":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        if threads > 0:
+            import torch
+
+            torch.set_num_threads(threads)
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            encode_kwargs={"batch_size": batch_size},
+        )
+
+    return OnnxMiniLMEmbeddings(
+        model_dir=ONNX_MODEL_DIR,
+        quantized=backend == "onnx-int8",
+        threads=threads,
+        batch_size=batch_size,
+    )
+
+
+def warm_up(embeddings: Embeddings) -> None:
+    """Run one inference so the first user request doesn't pay lazy initialization."""
+    # embed_documents bypasses the query cache
+    embeddings.embed_documents(["warm up"])
+
+
+def check_index_parity(vector_store: Any, samples: int = 8, threshold: float = 0.98) -> bool:
+    """
+    Check that the current embedder reproduces vectors stored in the index:
+    re-embed a few indexed documents and compare (cosine) with the stored vectors.
+    Returns False if any sample falls below threshold.
+    """
+    index = vector_store.index
+    total = index.ntotal
+    if total == 0:
+        return True
+
+    rows = sorted({int(i) for i in np.linspace(0, total - 1, num=min(samples, total))})
+    texts, stored = [], []
+    for row in rows:
+        document = vector_store.docstore.search(vector_store.index_to_docstore_id[row])
+        if not hasattr(document, "page_content"):
+            continue
+        texts.append(document.page_content)
+        stored.append(index.reconstruct(row))
+    if not texts:
+        return True
+
+    current = np.asarray(vector_store.embeddings.embed_documents(texts), dtype=np.float32)
+    # Lossy (PQ) indexes store approximations; compare like with like
+    current = quantize_like(index, current)
+    stored_matrix = np.vstack(stored).astype(np.float32)
+    cosine = (current * stored_matrix).sum(axis=1) / (
+        np.linalg.norm(current, axis=1) * np.linalg.norm(stored_matrix, axis=1) + 1e-12
+    )
+    worst = float(cosine.min())
+    print(f"Embedding parity vs index: min cosine {worst:.4f} over {len(texts)} documents")
+    return worst >= threshold
+
+
+def export_onnx_model(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    output_dir: str = ONNX_MODEL_DIR,
+    quantize: bool = True,
+) -> None:
+    """Export the transformer to ONNX (and an int8 dynamically quantized copy)."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["export sample text"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(out / "model.onnx"),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+        )
+    tokenizer.save_pretrained(str(out))
+    print(f"Exported ONNX model to: {out / 'model.onnx'}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            str(out / "model.onnx"),
+            str(out / "model_int8.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+        print(f"Wrote int8 quantized model to: {out / 'model_int8.onnx'}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI: python -m services.embedding_backends export [--output DIR] [--no-quantize]"""
+    parser = argparse.ArgumentParser(description="Embedding backend utilities.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Export MiniLM to ONNX (+ int8)")
+    export.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    export.add_argument("--output", default=ONNX_MODEL_DIR)
+    export.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_onnx_model(args.model, args.output, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
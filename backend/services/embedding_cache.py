@@ -0,0 +1,127 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from data.cache.memory_lru_cache import MemoryLRUCache
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Query normalization modes for cache keys
+NORMALIZE_NONE = "none"            # exact string
+NORMALIZE_WHITESPACE = "whitespace"  # trim + collapse runs of whitespace
+NORMALIZE_LOWER = "lower"          # whitespace + case-insensitive
+
+
+def normalize_text(text: str, mode: str) -> str:
+    if mode == NORMALIZE_NONE:
+        return text
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if mode == NORMALIZE_LOWER:
+        text = text.lower()
+    return text
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper that caches query vectors in a bounded LRU.
+
+    Only embed_query is cached (documents are embedded once at index build).
+    The cache can be persisted to an .npz file and reloaded on startup; the
+    saved file is tagged with `namespace` (model id) and ignored if it differs.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        max_entries: int = 4096,
+        normalize: str = NORMALIZE_LOWER,
+        namespace: str = "",
+        persist_path: Optional[str] = None,
+    ):
+        self.base = base
+        self.normalize = normalize
+        self.namespace = namespace
+        self.persist_path = persist_path
+        self._cache = MemoryLRUCache(max_entries=max_entries)
+
+        if persist_path and os.path.exists(persist_path):
+            self.load(persist_path)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_text(text, self.normalize)
+        vector = self._cache.get(key)
+        if vector is None:
+            vector = np.asarray(self.base.embed_query(key), dtype=np.float32)
+            self._cache.set(key, vector, size=vector.nbytes)
+        return vector.tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries, sending only the cache misses to the model in one batch."""
+        keys = [normalize_text(text, self.normalize) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        for key in keys:
+            vector = self._cache.get(key)
+            if vector is not None:
+                vectors[key] = vector
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing:
+            # Queries and documents share one encoder for sentence-transformers models
+            for key, embedded in zip(missing, self.base.embed_documents(missing)):
+                vector = np.asarray(embedded, dtype=np.float32)
+                self._cache.set(key, vector, size=vector.nbytes)
+                vectors[key] = vector
+
+        return [vectors[key].tolist() for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write cached query vectors to an .npz file (atomically)."""
+        path = path or self.persist_path
+        if not path:
+            return
+        items = self._cache.items()
+        if not items:
+            return
+
+        keys = np.array([key for key, _ in items], dtype=object)
+        vectors = np.vstack([vector for _, vector in items]).astype(np.float32)
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            keys=keys.astype(str),
+            vectors=vectors,
+            namespace=np.array(self.namespace),
+            normalize=np.array(self.normalize),
+        )
+        os.replace(tmp_path, path)
+        print(f"Saved {len(items)} cached query embeddings to: {path}")
+
+    def load(self, path: str) -> int:
+        """Load vectors saved by save(); returns how many were loaded."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["namespace"]) != self.namespace or str(data["normalize"]) != self.normalize:
+                    print(f"Ignoring query embedding cache {path}: different model or normalization")
+                    return 0
+                keys = data["keys"]
+                vectors = data["vectors"]
+        except Exception as error:
+            print(f"Could not load query embedding cache {path}: {error}")
+            return 0
+
+        # Saved least-recently-used first, so insertion order restores recency
+        for key, vector in zip(keys, vectors):
+            self._cache.set(str(key), vector, size=vector.nbytes)
+        print(f"Loaded {len(keys)} cached query embeddings from: {path}")
+        return len(keys)
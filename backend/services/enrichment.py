@@ -1,79 +1,443 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
 from langchain_core.documents import Document
-from services.product_api import get_product_from_apis
+from services.product_api import get_product_from_apis, get_product_from_apis_async
+from services.single_flight import SingleFlight
 from data.cache.sqlite_enrichment_cache import SQLiteEnrichmentCache
 
+# Upper bound on products enriched at the same time (each one fans out to SerpAPI)
+ENRICHMENT_MAX_WORKERS = int(os.getenv("ENRICHMENT_MAX_WORKERS", "4"))
+
+# Enrichment cache storage policy (0 = unbounded)
+ENRICHMENT_CACHE_COMPRESS = os.getenv("ENRICHMENT_CACHE_COMPRESS", "1").lower() in ("1", "true", "yes")
+ENRICHMENT_CACHE_MAX_ROWS = int(os.getenv("ENRICHMENT_CACHE_MAX_ROWS", "0"))
+ENRICHMENT_CACHE_MAX_BYTES = int(os.getenv("ENRICHMENT_CACHE_MAX_BYTES", "0"))
+
+# In-memory LRU tier in front of SQLite (0 entries and 0 bytes = disabled)
+ENRICHMENT_MEMORY_CACHE_ENTRIES = int(os.getenv("ENRICHMENT_MEMORY_CACHE_ENTRIES", "2048"))
+ENRICHMENT_MEMORY_CACHE_BYTES = int(os.getenv("ENRICHMENT_MEMORY_CACHE_BYTES", "0"))
+ENRICHMENT_MEMORY_CACHE_TTL_S = float(os.getenv("ENRICHMENT_MEMORY_CACHE_TTL_S", "3600"))
+
+# Seconds a finished enrichment is reused by late duplicate requests (covers the bulk cache write)
+ENRICHMENT_SINGLE_FLIGHT_LINGER_S = float(os.getenv("ENRICHMENT_SINGLE_FLIGHT_LINGER_S", "30"))
+
+# Stale-while-revalidate: entries older than MAX_AGE but within the grace window are
+# served immediately (marked "stale") while a background refresh runs
+ENRICHMENT_MAX_AGE_DAYS = int(os.getenv("ENRICHMENT_MAX_AGE_DAYS", "365"))
+ENRICHMENT_STALE_GRACE_DAYS = int(os.getenv("ENRICHMENT_STALE_GRACE_DAYS", "30"))
+ENRICHMENT_REFRESH_WORKERS = int(os.getenv("ENRICHMENT_REFRESH_WORKERS", "2"))
+# After a failed refresh the entry stays stale and is retried once this many seconds have passed
+ENRICHMENT_REFRESH_RETRY_S = float(os.getenv("ENRICHMENT_REFRESH_RETRY_S", "3600"))
+
+# Concurrent requests for the same product share one upstream enrichment
+_enrichment_flight = SingleFlight(linger_s=ENRICHMENT_SINGLE_FLIGHT_LINGER_S)
+
+# Background refreshes of stale entries (deduplicated per product id)
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=max(1, ENRICHMENT_REFRESH_WORKERS),
+    thread_name_prefix="enrich-refresh",
+)
+_refreshing: Set[str] = set()
+# Callbacks told which product ids got new enrichment data (e.g. response cache invalidation)
+_invalidation_listeners: List[Callable[[List[str]], Any]] = []
+_stats_lock = threading.Lock()
+_stale_stats = {
+    "stale_served": 0,
+    "refreshes_scheduled": 0,
+    "refreshes_completed": 0,
+    "refreshes_failed": 0,
+}
+
+_enrichment_cache: Optional[SQLiteEnrichmentCache] = None
+_enrichment_cache_lock = threading.Lock()
+
+
+def get_enrichment_cache() -> SQLiteEnrichmentCache:
+    """Return the process-wide enrichment cache (created on first use)."""
+    global _enrichment_cache
+    if _enrichment_cache is None:
+        with _enrichment_cache_lock:
+            if _enrichment_cache is None:
+                _enrichment_cache = SQLiteEnrichmentCache(
+                    compress=ENRICHMENT_CACHE_COMPRESS,
+                    max_rows=ENRICHMENT_CACHE_MAX_ROWS or None,
+                    max_bytes=ENRICHMENT_CACHE_MAX_BYTES or None,
+                    memory_max_entries=ENRICHMENT_MEMORY_CACHE_ENTRIES or None,
+                    memory_max_bytes=ENRICHMENT_MEMORY_CACHE_BYTES or None,
+                    memory_ttl_s=ENRICHMENT_MEMORY_CACHE_TTL_S or None,
+                )
+    return _enrichment_cache
+
+
+def get_enrichment_stats() -> Dict[str, Any]:
+    """Counters for the enrichment pipeline (coalesced duplicates, stale serving)."""
+    with _stats_lock:
+        stale = dict(_stale_stats, refreshing=len(_refreshing))
+    return {"single_flight": _enrichment_flight.stats(), "stale_while_revalidate": stale}
+
+
+def add_invalidation_listener(listener: Callable[[List[str]], Any]) -> None:
+    """Register a callback run with product ids whose cached enrichment was replaced."""
+    _invalidation_listeners.append(listener)
+
+
+def _notify_invalidation(product_ids: List[str]) -> None:
+    for listener in list(_invalidation_listeners):
+        try:
+            listener(product_ids)
+        except Exception as error:
+            print(f"Invalidation listener failed: {error}")
+
+
+def shutdown_refreshes() -> None:
+    """Stop background refreshes (pending ones are dropped)."""
+    _refresh_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _schedule_refresh(
+    product_id: str,
+    metadata: Dict[str, Any],
+    stale_product: Dict[str, Any],
+    cache: SQLiteEnrichmentCache,
+) -> None:
+    """Queue a background re-enrichment of a stale entry unless one is already queued."""
+    with _stats_lock:
+        if product_id in _refreshing:
+            return
+        _refreshing.add(product_id)
+        _stale_stats["refreshes_scheduled"] += 1
+
+    try:
+        _refresh_executor.submit(_refresh_product, product_id, metadata, stale_product, cache)
+    except RuntimeError:
+        # Executor shut down (app stopping)
+        with _stats_lock:
+            _refreshing.discard(product_id)
+
+
+def _refresh_product(
+    product_id: str,
+    metadata: Dict[str, Any],
+    stale_product: Dict[str, Any],
+    cache: SQLiteEnrichmentCache,
+) -> None:
+    outcome = "refreshes_completed"
+    try:
+        product_data = _enrich_product_once(product_id, metadata)
+        if product_data.get("enrichment") is None and stale_product.get("enrichment"):
+            # Don't replace good data with a failed lookup
+            print(f"Refresh for product {product_id} found nothing; keeping previous enrichment")
+            outcome = "refreshes_failed"
+            _defer_refresh(product_id, stale_product, cache)
+        else:
+            cache.set(product_id, product_data)
+            _notify_invalidation([product_id])
+    except Exception as error:
+        print(f"Background refresh failed for product {product_id}: {error}")
+        outcome = "refreshes_failed"
+        _defer_refresh(product_id, stale_product, cache)
+    finally:
+        with _stats_lock:
+            _refreshing.discard(product_id)
+            _stale_stats[outcome] += 1
+
+
+def _defer_refresh(product_id: str, stale_product: Dict[str, Any], cache: SQLiteEnrichmentCache) -> None:
+    """Keep a stale entry after a failed refresh, dated so it turns stale again
+    (and is refreshed again) ENRICHMENT_REFRESH_RETRY_S from now rather than
+    after a full ENRICHMENT_MAX_AGE_DAYS.
+    """
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=ENRICHMENT_REFRESH_RETRY_S)
+    retrieved_at = retry_at - timedelta(days=ENRICHMENT_MAX_AGE_DAYS)
+    try:
+        cache.set(product_id, stale_product, retrieved_at=retrieved_at)
+    except Exception as cache_error:
+        print(f"Cache write failed for product {product_id}: {cache_error}")
+
+
+def _product_ids(products: List[Document], cache: SQLiteEnrichmentCache) -> List[str]:
+    """Generate or retrieve product identifiers."""
+    product_ids: List[str] = []
+    for product in products:
+        metadata = product.metadata or {}
+        product_ids.append(metadata.get("id") or cache.generate_key(metadata))
+    return product_ids
+
+
+def _apply_cached(
+    products: List[Document],
+    product_ids: List[str],
+    cached_products: Dict[str, Tuple[Any, bool]],
+    cache: SQLiteEnrichmentCache,
+) -> Tuple[List[Optional[Dict[str, Any]]], List[Tuple[int, str, Dict[str, Any]]]]:
+    """Fill in cache hits (scheduling refreshes for stale ones); return them with the misses."""
+    enriched_products: List[Optional[Dict[str, Any]]] = [None] * len(products)
+    misses: List[Tuple[int, str, Dict[str, Any]]] = []
+    for position, (product, product_id) in enumerate(zip(products, product_ids)):
+        cached_product, is_stale = cached_products.get(product_id, (None, False))
+        if isinstance(cached_product, dict) and cached_product.get("id"):
+            if is_stale:
+                with _stats_lock:
+                    _stale_stats["stale_served"] += 1
+                _schedule_refresh(product_id, product.metadata or {}, cached_product, cache)
+                # Cached values may be shared (memory tier); mark a copy
+                cached_product = {**cached_product, "stale": True}
+            enriched_products[position] = cached_product
+            continue
+
+        misses.append((position, product_id, product.metadata or {}))
+    return enriched_products, misses
+
+
 # TODO: Reset cache
-def get_enriched_products(products: List[Document], user_query: str = "") -> List[Dict[str, Any]]:
+def get_enriched_products(
+    products: List[Document],
+    user_query: str = "",
+    max_workers: Optional[int] = None,
+    cache: Optional[SQLiteEnrichmentCache] = None,
+) -> List[Dict[str, Any]]:
     """Enrich product documents with external data and caching.
     
+    All cache lookups happen in one bulk read; cache misses are enriched
+    concurrently on a bounded thread pool and written back in one transaction.
+    Expired entries still within ENRICHMENT_STALE_GRACE_DAYS are returned
+    immediately with "stale": True and refreshed in the background.
+    
     Args:
         products: List of Document objects with product metadata
+        user_query: Original user query (unused, kept for logging/compat)
+        max_workers: Concurrency limit for cache misses (defaults to
+            ENRICHMENT_MAX_WORKERS; 1 enriches sequentially)
+        cache: Enrichment cache to use (defaults to the shared instance)
         
     Returns:
-        List of enriched product dictionaries with optional enrichment data
+        List of enriched product dictionaries in retrieval order
     """
-    enriched_products: List[Dict[str, Any]] = []
-    cache = SQLiteEnrichmentCache()
+    if cache is None:
+        cache = get_enrichment_cache()
 
-    for product in products:
-        metadata = product.metadata or {}
-        
-        # Generate or retrieve product identifier
-        product_id = metadata.get("id") or cache.generate_key(metadata)
-        
-        # Check cache first
-        cached_product = cache.get(product_id)
-        if isinstance(cached_product, dict) and cached_product.get("id"):
-            enriched_products.append(cached_product)
-            continue
+    product_ids = _product_ids(products, cache)
 
-        # Extract base product information
-        brand = metadata.get("brand", "") or ""
-        name = metadata.get("name", "") or ""
-        product_type = metadata.get("product_type", "") or ""
-        description = metadata.get("description", "") or ""
-
-        # Create base product object
-        product_data: Dict[str, Any] = {
-            "id": product_id,
-            "brand": brand,
-            "name": name,
-            "product_type": product_type,
-            "product_description": description,
-            "enrichment": None,
-        }
-
-        # Skip enrichment if required fields are missing
-        has_required_fields = all([brand, name, product_type, description])
-        if not has_required_fields:
-            print(f"Skipping enrichment for product {product_id}: missing required fields")
-            cache.set(product_id, product_data)
-            enriched_products.append(product_data)
-            continue
+    # Check cache first (single bulk lookup, stale entries included)
+    cached_products = cache.lookup_many(
+        product_ids,
+        max_age_days=ENRICHMENT_MAX_AGE_DAYS,
+        stale_grace_days=ENRICHMENT_STALE_GRACE_DAYS,
+    )
+    enriched_products, misses = _apply_cached(products, product_ids, cached_products, cache)
 
-        try:
-            # Fetch enrichment data from product APIs
-            raw_enrichment = get_product_from_apis(brand, name, product_type, max_results=3)
-            
-            # Clean and validate enrichment data
-            validated = _validate_enrichment_data(raw_enrichment)
-            print(f"Validated enrichment for product {product_id}: {validated}")
-            product_data["enrichment"] = validated
-            
-            cache.set(product_id, product_data)
-            enriched_products.append(product_data)
+    if not misses:
+        return enriched_products
 
-        except Exception as error:
-            # Handle enrichment failures
-            print(f"Enrichment error for product {product_id}: {error}")
-            import traceback
-            traceback.print_exc()
-            cache.set(product_id, product_data)
-            enriched_products.append(product_data)
+    workers = max(1, min(max_workers or ENRICHMENT_MAX_WORKERS, len(misses)))
+    if workers == 1:
+        for position, product_id, metadata in misses:
+            enriched_products[position] = _enrich_product_once(product_id, metadata)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enrich") as executor:
+            futures = {
+                executor.submit(_enrich_product_once, product_id, metadata): position
+                for position, product_id, metadata in misses
+            }
+            for future in as_completed(futures):
+                # enrich_product isolates its own errors, so result() does not raise
+                enriched_products[futures[future]] = future.result()
+
+    # Write all fresh results back in one transaction
+    try:
+        cache.set_many(
+            (product_id, enriched_products[position])
+            for position, product_id, _ in misses
+        )
+    except Exception as cache_error:
+        print(f"Cache write failed for {len(misses)} products: {cache_error}")
 
     return enriched_products
 
+
+async def get_enriched_products_async(
+    products: List[Document],
+    user_query: str = "",
+    max_workers: Optional[int] = None,
+    cache: Optional[SQLiteEnrichmentCache] = None,
+) -> List[Dict[str, Any]]:
+    """get_enriched_products on the event loop.
+
+    Cache misses are enriched as coroutines (at most max_workers at a time)
+    and cache reads/writes run in worker threads. If the calling task is
+    cancelled, in-flight upstream calls are abandoned and only enrichments
+    that already finished are written back.
+    """
+    enriched_products: List[Optional[Dict[str, Any]]] = [None] * len(products)
+    async with aclosing(iter_enriched_products_async(products, user_query, max_workers, cache)) as results:
+        async for position, product in results:
+            enriched_products[position] = product
+    return enriched_products
+
+
+async def iter_enriched_products_async(
+    products: List[Document],
+    user_query: str = "",
+    max_workers: Optional[int] = None,
+    cache: Optional[SQLiteEnrichmentCache] = None,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (position, enriched product) as each product becomes available.
+
+    Cache hits come first, in retrieval order, then cache misses in the
+    order their enrichment finishes. Fresh results are written back in one
+    transaction once the iterator finishes or is closed. Close it with
+    contextlib.aclosing when stopping early.
+    """
+    if cache is None:
+        cache = get_enrichment_cache()
+
+    product_ids = _product_ids(products, cache)
+    cached_products = await asyncio.to_thread(
+        cache.lookup_many,
+        product_ids,
+        max_age_days=ENRICHMENT_MAX_AGE_DAYS,
+        stale_grace_days=ENRICHMENT_STALE_GRACE_DAYS,
+    )
+    enriched_products, misses = _apply_cached(products, product_ids, cached_products, cache)
+
+    for position, product in enumerate(enriched_products):
+        if product is not None:
+            yield position, product
+
+    if not misses:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, max_workers or ENRICHMENT_MAX_WORKERS))
+
+    async def enrich(position: int, product_id: str, metadata: Dict[str, Any]):
+        async with semaphore:
+            return position, product_id, await _enrich_product_once_async(product_id, metadata)
+
+    tasks = [asyncio.ensure_future(enrich(*miss)) for miss in misses]
+    finished: List[Tuple[str, Dict[str, Any]]] = []
+    try:
+        for next_finished in asyncio.as_completed(tasks):
+            position, product_id, product = await next_finished
+            finished.append((product_id, product))
+            yield position, product
+    finally:
+        for task in tasks:
+            task.cancel()
+        if finished:
+            try:
+                await asyncio.to_thread(cache.set_many, finished)
+            except Exception as cache_error:
+                print(f"Cache write failed for {len(finished)} products: {cache_error}")
+
+
+def unenriched_products(
+    products: List[Document],
+    cache: Optional[SQLiteEnrichmentCache] = None,
+) -> List[Dict[str, Any]]:
+    """Product dictionaries for retrieved documents before enrichment (same ids as get_enriched_products)."""
+    if cache is None:
+        cache = get_enrichment_cache()
+    return [
+        _base_product(product_id, product.metadata or {})
+        for product, product_id in zip(products, _product_ids(products, cache))
+    ]
+
+
+def _enrich_product_once(product_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """enrich_product, coalesced with any in-flight enrichment of the same product."""
+    return _enrichment_flight.do(product_id, enrich_product, product_id, metadata)
+
+
+async def _enrich_product_once_async(product_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """enrich_product_async, coalesced with in-flight enrichments (sync or async) of the same product."""
+    return await _enrichment_flight.do_async(product_id, enrich_product_async, product_id, metadata)
+
+
+def enrich_product(product_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Enrich a single cache-missed product.
+    
+    Errors are contained here so one failing product never affects the
+    others in the same request. The caller is responsible for caching.
+    
+    Args:
+        product_id: Cache key for the product
+        metadata: Product metadata from the retrieved Document
+        
+    Returns:
+        Product dictionary with an "enrichment" field (None if unavailable)
+    """
+    product_data = _base_product(product_id, metadata)
+
+    # Skip enrichment if required fields are missing
+    if not _has_required_fields(product_data):
+        print(f"Skipping enrichment for product {product_id}: missing required fields")
+        return product_data
+
+    try:
+        # Fetch enrichment data from product APIs
+        raw_enrichment = get_product_from_apis(
+            product_data["brand"], product_data["name"], product_data["product_type"], max_results=3
+        )
+        _apply_enrichment(product_data, raw_enrichment)
+
+    except Exception as error:
+        # Handle enrichment failures
+        print(f"Enrichment error for product {product_id}: {error}")
+        traceback.print_exc()
+
+    return product_data
+
+
+async def enrich_product_async(product_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """enrich_product with non-blocking upstream calls (cancellable)."""
+    product_data = _base_product(product_id, metadata)
+
+    # Skip enrichment if required fields are missing
+    if not _has_required_fields(product_data):
+        print(f"Skipping enrichment for product {product_id}: missing required fields")
+        return product_data
+
+    try:
+        raw_enrichment = await get_product_from_apis_async(
+            product_data["brand"], product_data["name"], product_data["product_type"], max_results=3
+        )
+        _apply_enrichment(product_data, raw_enrichment)
+
+    except Exception as error:
+        print(f"Enrichment error for product {product_id}: {error}")
+        traceback.print_exc()
+
+    return product_data
+
+
+def _base_product(product_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Product dictionary from retrieved metadata, not yet enriched."""
+    return {
+        "id": product_id,
+        "brand": metadata.get("brand", "") or "",
+        "name": metadata.get("name", "") or "",
+        "product_type": metadata.get("product_type", "") or "",
+        "product_description": metadata.get("description", "") or "",
+        "enrichment": None,
+    }
+
+
+def _has_required_fields(product_data: Dict[str, Any]) -> bool:
+    return all(product_data[field] for field in ("brand", "name", "product_type", "product_description"))
+
+
+def _apply_enrichment(product_data: Dict[str, Any], raw_enrichment: Any) -> None:
+    # Clean and validate enrichment data
+    validated = _validate_enrichment_data(raw_enrichment)
+    print(f"Validated enrichment for product {product_data['id']}: {validated}")
+    product_data["enrichment"] = validated
+
 def _validate_enrichment_data(enrichment_data: Any) -> Optional[Dict[str, Any]]:
     """Clean and validate enrichment data.
     
@@ -126,51 +126,59 @@ def _pick_num(top_level_val: Any, nested_val: Any, cast_fn, default):
         return default
 
 
+def format_product(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one enriched product into the shape the app reads."""
+    enrichment = product.get("enrichment") or {}
+
+    # --- Flatten: prefer top-level fields if present, else enrichment fields ---
+    product_url = _pick_str(product.get("product_url"), enrichment.get("product_url"))
+    image_url = _pick_str(product.get("image_url"), enrichment.get("image_url"))
+    price = _pick_str(product.get("price"), enrichment.get("price"))
+    source_name = _pick_str(product.get("source_name"), enrichment.get("source_name"))
+    explanation = _pick_str(product.get("explanation"), enrichment.get("explanation"))
+
+    rating = _pick_num(product.get("rating"), enrichment.get("rating"), float, 0.0)
+    rating_count = _pick_num(product.get("rating_count"), enrichment.get("rating_count"), int, 0)
+
+    # --- Enforce URL sanity (optional but strongly recommended) ---
+    if product_url and not _is_valid_http_url(product_url):
+        print(f"[FORMAT] Product {product.get('id')} has invalid product_url; blanking: {product_url[:120]}")
+        product_url = ""
+
+    if image_url and not _is_rn_renderable_image_url(image_url):
+        print(
+            f"[FORMAT] Product {product.get('id')} ({product.get('brand')} {product.get('name')}): "
+            f"image_url not RN-renderable; blanking: {image_url[:120]}"
+        )
+        image_url = ""
+
+    formatted = {
+        "id": str(product.get("id", "") or ""),
+        "name": _pick_str(product.get("name"), enrichment.get("name")),
+        "brand": _pick_str(product.get("brand"), enrichment.get("brand")),
+
+        # flattened fields (what your RN app should read)
+        "product_url": product_url,
+        "image_url": image_url,
+        "price": price,
+        "rating": rating,
+        "rating_count": rating_count,
+        "source_name": source_name,
+        "explanation": explanation,
+
+        # True when served from an expired cache entry that is being refreshed
+        "stale": bool(product.get("stale")),
+    }
+
+    print(f"[DEBUG] Product {product.get('id')} image_url: '{image_url}'")
+    return formatted
+
+
+def sort_products(formatted_products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Final display order of formatted products (see _sort_key)."""
+    return sorted(formatted_products, key=_sort_key)
+
+
 def format_recommendation_response(query: str, enriched_products: List[Dict[str, Any]]) -> Dict[str, Any]:
-    formatted_products: List[Dict[str, Any]] = []
-
-    for product in enriched_products:
-        enrichment = product.get("enrichment") or {}
-
-        # --- Flatten: prefer top-level fields if present, else enrichment fields ---
-        product_url = _pick_str(product.get("product_url"), enrichment.get("product_url"))
-        image_url = _pick_str(product.get("image_url"), enrichment.get("image_url"))
-        price = _pick_str(product.get("price"), enrichment.get("price"))
-        source_name = _pick_str(product.get("source_name"), enrichment.get("source_name"))
-        explanation = _pick_str(product.get("explanation"), enrichment.get("explanation"))
-
-        rating = _pick_num(product.get("rating"), enrichment.get("rating"), float, 0.0)
-        rating_count = _pick_num(product.get("rating_count"), enrichment.get("rating_count"), int, 0)
-
-        # --- Enforce URL sanity (optional but strongly recommended) ---
-        if product_url and not _is_valid_http_url(product_url):
-            print(f"[FORMAT] Product {product.get('id')} has invalid product_url; blanking: {product_url[:120]}")
-            product_url = ""
-
-        if image_url and not _is_rn_renderable_image_url(image_url):
-            print(
-                f"[FORMAT] Product {product.get('id')} ({product.get('brand')} {product.get('name')}): "
-                f"image_url not RN-renderable; blanking: {image_url[:120]}"
-            )
-            image_url = ""
-
-        formatted = {
-            "id": str(product.get("id", "") or ""),
-            "name": _pick_str(product.get("name"), enrichment.get("name")),
-            "brand": _pick_str(product.get("brand"), enrichment.get("brand")),
-
-            # flattened fields (what your RN app should read)
-            "product_url": product_url,
-            "image_url": image_url,
-            "price": price,
-            "rating": rating,
-            "rating_count": rating_count,
-            "source_name": source_name,
-            "explanation": explanation,
-        }
-
-        print(f"[DEBUG] Product {product.get('id')} image_url: '{image_url}'")
-        formatted_products.append(formatted)
-
-    formatted_products.sort(key=_sort_key)
-    return {"query": query, "products": formatted_products}
+    formatted_products = [format_product(product) for product in enriched_products]
+    return {"query": query, "products": sort_products(formatted_products)}
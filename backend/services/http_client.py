@@ -0,0 +1,215 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool sizing (per host; requests keeps one pool per scheme+host+port)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "16"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+
+# Separate connect / read timeouts (seconds)
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "3.05"))
+HTTP_READ_TIMEOUT_S = float(os.getenv("HTTP_READ_TIMEOUT_S", "10"))
+
+# Retry with exponential backoff on throttling / transient server errors
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Async client (one shared pool across all hosts, unlike requests' per-host pools)
+HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv("HTTP_ASYNC_MAX_CONNECTIONS", "100"))
+
+_session: Optional[requests.Session] = None
+# Same pools without adapter retries, for callers that see every attempt (http_get's on_attempt)
+_single_attempt_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# One ClientSession per event loop (its connections can't be shared across loops)
+_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+def _build_session(retries: bool = True) -> requests.Session:
+    """Create a Session with pooled keep-alive connections and (unless retries=False) retry policy."""
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        # Hand the final 429/5xx back to the caller instead of raising RetryError
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry if retries else 0,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled Session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _get_single_attempt_session() -> requests.Session:
+    global _single_attempt_session
+    if _single_attempt_session is None:
+        with _session_lock:
+            if _single_attempt_session is None:
+                _single_attempt_session = _build_session(retries=False)
+    return _single_attempt_session
+
+
+def close_session() -> None:
+    """Close pooled connections (e.g. on app shutdown)."""
+    global _session, _single_attempt_session
+    with _session_lock:
+        for session in (_session, _single_attempt_session):
+            if session is not None:
+                session.close()
+        _session = None
+        _single_attempt_session = None
+
+
+def make_timeout(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """Build a (connect, read) timeout tuple, overriding the read part if given."""
+    read = HTTP_READ_TIMEOUT_S if read_timeout is None else read_timeout
+    return (min(HTTP_CONNECT_TIMEOUT_S, read), read)
+
+
+def http_get(
+    url: str,
+    timeout: Optional[float] = None,
+    on_attempt: Optional[Callable[[], None]] = None,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    GET through the shared pooled Session.
+    `timeout` is the read timeout; the connect timeout is always HTTP_CONNECT_TIMEOUT_S
+    (capped at the read timeout). Callers using stream=True must close the response.
+    `on_attempt` runs before the first request and before every retry (e.g. to
+    meter a paid API); it may block or raise to abort.
+    """
+    if on_attempt is None:
+        return get_session().get(url, timeout=make_timeout(timeout), **kwargs)
+
+    # Retried here instead of by the adapter so each attempt goes through on_attempt
+    session = _get_single_attempt_session()
+    for attempt in range(HTTP_MAX_RETRIES):
+        on_attempt()
+        try:
+            response = session.get(url, timeout=make_timeout(timeout), **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            time.sleep(_retry_delay(None, attempt))
+            continue
+        if response.status_code not in HTTP_RETRY_STATUSES:
+            return response
+        response.close()
+        time.sleep(_retry_delay(response, attempt))
+    # Last attempt: errors and the final 429/5xx go back to the caller
+    on_attempt()
+    return session.get(url, timeout=make_timeout(timeout), **kwargs)
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """
+    Return the running event loop's pooled ClientSession (created on first
+    use); call close_async_session() before the loop ends.
+    """
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=HTTP_ASYNC_MAX_CONNECTIONS),
+            timeout=make_async_timeout(),
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session() -> None:
+    """Close the running event loop's ClientSession, if it has one."""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def make_async_timeout(read_timeout: Optional[float] = None) -> aiohttp.ClientTimeout:
+    """aiohttp equivalent of make_timeout()."""
+    connect, read = make_timeout(read_timeout)
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+
+
+def _retry_delay(response: Optional[Any], attempt: int) -> float:
+    """Retry-After if the server sent one, else exponential backoff (like urllib3's Retry)."""
+    if response is not None:
+        try:
+            return max(0.0, float(response.headers.get("Retry-After", "")))
+        except ValueError:
+            pass
+    return HTTP_BACKOFF_FACTOR * (2 ** attempt)
+
+
+async def _get_and_read(url: str, timeout: Optional[float], **kwargs: Any) -> aiohttp.ClientResponse:
+    async with get_async_session().get(url, timeout=make_async_timeout(timeout), **kwargs) as response:
+        # Body is kept on the response, so .json() / .text() still work after release
+        await response.read()
+    return response
+
+
+async def async_http_get(
+    url: str,
+    timeout: Optional[float] = None,
+    on_attempt: Optional[Callable[[], Awaitable[None]]] = None,
+    **kwargs: Any,
+) -> aiohttp.ClientResponse:
+    """
+    Non-blocking GET through the shared ClientSession, with the same
+    timeouts and retry policy as http_get (connection errors, timeouts and
+    429/5xx are retried with backoff). The body is read before returning.
+    `on_attempt` is awaited before every attempt, as in http_get.
+    """
+    for attempt in range(HTTP_MAX_RETRIES):
+        if on_attempt is not None:
+            await on_attempt()
+        try:
+            response = await _get_and_read(url, timeout, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            await asyncio.sleep(_retry_delay(None, attempt))
+            continue
+        if response.status not in HTTP_RETRY_STATUSES:
+            return response
+        await asyncio.sleep(_retry_delay(response, attempt))
+    # Last attempt: errors and the final 429/5xx go back to the caller
+    if on_attempt is not None:
+        await on_attempt()
+    return await _get_and_read(url, timeout, **kwargs)
+
+
+def async_http_stream(url: str, timeout: Optional[float] = None, **kwargs: Any):
+    """
+    Streaming GET (async context manager yielding the response); the
+    connection is released when the block exits, whether or not the body
+    was read.
+    """
+    return get_async_session().get(url, timeout=make_async_timeout(timeout), **kwargs)
@@ -0,0 +1,265 @@
+import argparse
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.ann_index import INDEX_TYPES, create_index, index_config_from_env
+from services.columnar_store import load_columnar, load_index
+from services.csv_loader import iter_document_batches
+from services.embedding_backends import EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, create_embeddings
+from services.index_manifest import build_manifest, save_index, sync_index
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CSV_PATH = BASE_DIR / "data" / "csv" / "beautyProducts.csv"
+DEFAULT_FAISS_DIR = BASE_DIR / "vectorstores" / "faiss_beauty"
+
+# Texts per embedding task sent to a worker (and per progress update)
+INDEX_BUILD_BATCH_SIZE = int(os.getenv("INDEX_BUILD_BATCH_SIZE", "512"))
+# Embedding worker processes (0 = embed in-process with the caller's model)
+INDEX_BUILD_WORKERS = int(os.getenv("INDEX_BUILD_WORKERS", "0"))
+# CSV rows read per chunk (0 = read the whole file at once)
+INDEX_BUILD_CSV_CHUNKSIZE = int(os.getenv("INDEX_BUILD_CSV_CHUNKSIZE", "0"))
+
+# Per-process embedder, created once by _init_worker
+_worker_embeddings: Optional[Embeddings] = None
+
+
+def _init_worker(backend: str, threads: int, batch_size: int) -> None:
+    global _worker_embeddings
+    _worker_embeddings = create_embeddings(backend=backend, threads=threads, batch_size=batch_size)
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def _batches(documents: Iterator[List[Document]], size: int) -> Iterator[List[Document]]:
+    """Re-slice streamed CSV chunks into fixed-size embedding batches."""
+    pending: List[Document] = []
+    for chunk in documents:
+        pending.extend(chunk)
+        while len(pending) >= size:
+            yield pending[:size]
+            pending = pending[size:]
+    if pending:
+        yield pending
+
+
+class _Progress:
+    """Prints documents embedded, throughput and ETA."""
+
+    def __init__(self, total: Optional[int]):
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def update(self, count: int) -> None:
+        self.done += count
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            eta = (self.total - self.done) / rate if rate > 0 else 0.0
+            print(
+                f"[INDEX] {self.done}/{self.total} documents embedded "
+                f"({rate:.1f} docs/s, ETA {eta:.0f}s)"
+            )
+        else:
+            print(f"[INDEX] {self.done} documents embedded ({rate:.1f} docs/s)")
+
+
+def embed_documents(
+    documents: Iterator[List[Document]],
+    embeddings: Optional[Embeddings] = None,
+    workers: int = INDEX_BUILD_WORKERS,
+    batch_size: int = INDEX_BUILD_BATCH_SIZE,
+    total: Optional[int] = None,
+    backend: str = EMBEDDING_BACKEND,
+) -> Tuple[List[Document], np.ndarray]:
+    """Embed streamed documents in batches, optionally across worker processes.
+
+    Args:
+        documents: Iterator of Document lists (e.g. iter_document_batches)
+        embeddings: Model used when workers == 0
+        workers: Number of embedding processes; each loads its own model
+        batch_size: Texts per embedding task
+        total: Expected document count, for the ETA
+        backend: EMBEDDING_BACKEND the worker processes load
+
+    Returns:
+        Tuple of (documents in input order, float32 matrix of their vectors)
+    """
+    progress = _Progress(total)
+    embedded: List[Document] = []
+    vectors: List[np.ndarray] = []
+
+    if workers <= 0:
+        if embeddings is None:
+            embeddings = create_embeddings(backend=backend)
+        for batch in _batches(documents, batch_size):
+            vectors.append(
+                np.asarray(embeddings.embed_documents([d.page_content for d in batch]), dtype=np.float32)
+            )
+            embedded.extend(batch)
+            progress.update(len(batch))
+    else:
+        # Split cores between workers so their inference threads don't oversubscribe the CPU
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        # spawn: forking a parent that already holds torch/onnxruntime thread pools can deadlock
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend, threads, EMBEDDING_BATCH_SIZE),
+        ) as executor:
+            # Keep a bounded number of batches in flight so streamed reads stay streamed
+            in_flight = []
+            for batch in _batches(documents, batch_size):
+                in_flight.append((batch, executor.submit(_embed_batch, [d.page_content for d in batch])))
+                if len(in_flight) >= workers * 2:
+                    done_batch, future = in_flight.pop(0)
+                    vectors.append(future.result())
+                    embedded.extend(done_batch)
+                    progress.update(len(done_batch))
+            for done_batch, future in in_flight:
+                vectors.append(future.result())
+                embedded.extend(done_batch)
+                progress.update(len(done_batch))
+
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return embedded, matrix
+
+
+def build_index(
+    csv_path: str,
+    faiss_dir: Optional[str],
+    embeddings: Optional[Embeddings] = None,
+    workers: int = INDEX_BUILD_WORKERS,
+    batch_size: int = INDEX_BUILD_BATCH_SIZE,
+    chunksize: int = INDEX_BUILD_CSV_CHUNKSIZE,
+    index_config: Optional[Dict[str, Any]] = None,
+) -> FAISS:
+    """Build (and save) the FAISS product index from the CSV.
+
+    Args:
+        csv_path: Path to CSV file containing product data
+        faiss_dir: Directory to save the index to (None to skip saving)
+        embeddings: Embedding model attached to the returned store (and used
+            for in-process embedding); created from EMBEDDING_BACKEND if omitted
+        workers: Embedding worker processes (0 embeds in-process)
+        batch_size: Texts per embedding task
+        chunksize: CSV rows per streamed chunk (0 reads the whole file)
+        index_config: FAISS index type/parameters (defaults to the FAISS_* settings)
+
+    Returns:
+        The built FAISS vector store
+    """
+    started = time.perf_counter()
+    if embeddings is None:
+        embeddings = create_embeddings()
+
+    total = _count_rows(csv_path)
+    print(f"[INDEX] Embedding {total} product documents (workers={workers}, batch={batch_size})")
+    documents, vectors = embed_documents(
+        iter_document_batches(csv_path, chunksize or None),
+        embeddings=embeddings,
+        workers=workers,
+        batch_size=batch_size,
+        total=total,
+    )
+    embed_s = time.perf_counter() - started
+
+    # Product ids as docstore ids make later per-product lookups/updates possible
+    ids = [d.metadata.get("id") for d in documents]
+    if len(set(ids)) != len(ids) or not all(ids):
+        ids = [str(uuid.uuid4()) for _ in documents]
+
+    config = index_config or index_config_from_env()
+    index_started = time.perf_counter()
+    index = create_index(vectors, config)
+    print(f"[INDEX] Built {config['type']} index in {time.perf_counter() - index_started:.1f}s")
+
+    vector_store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore({
+            doc_id: Document(id=doc_id, page_content=d.page_content, metadata=d.metadata)
+            for doc_id, d in zip(ids, documents)
+        }),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+    if faiss_dir:
+        # The manifest lets later CSV edits be applied incrementally (see index_manifest)
+        save_index(vector_store, faiss_dir, build_manifest(csv_path, documents))
+        print(f"FAISS index saved to: {faiss_dir}")
+        # Serve from the saved (memory-mapped) store rather than the in-memory Documents
+        vector_store = load_columnar(faiss_dir, embeddings)
+
+    elapsed = time.perf_counter() - started
+    rate = len(documents) / embed_s if embed_s > 0 else 0.0
+    print(f"[INDEX] Built index of {len(documents)} documents in {elapsed:.1f}s ({rate:.1f} docs/s embedding)")
+    return vector_store
+
+
+def _count_rows(csv_path: str) -> Optional[int]:
+    """Data rows in the CSV (quoted newlines make this approximate; used only for ETA)."""
+    try:
+        return len(pd.read_csv(csv_path, usecols=[0]))
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI: python -m services.index_builder [--workers N] [--batch-size N] [--chunksize N] [--sync]"""
+    parser = argparse.ArgumentParser(description="Build the FAISS product index from the catalog CSV.")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV_PATH), help="Catalog CSV path")
+    parser.add_argument("--out", default=str(DEFAULT_FAISS_DIR), help="FAISS index directory")
+    parser.add_argument("--workers", type=int, default=INDEX_BUILD_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=INDEX_BUILD_BATCH_SIZE)
+    parser.add_argument("--chunksize", type=int, default=INDEX_BUILD_CSV_CHUNKSIZE)
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="Overrides FAISS_INDEX_TYPE")
+    parser.add_argument("--nlist", type=int, help="IVF clusters (overrides FAISS_NLIST)")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW graph degree (overrides FAISS_HNSW_M)")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ sub-quantizers (overrides FAISS_PQ_M)")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Update an existing index with only the products that changed in the CSV",
+    )
+    args = parser.parse_args(argv)
+
+    if args.sync and os.path.exists(args.out):
+        vector_store = load_index(args.out, create_embeddings())
+        try:
+            sync_index(vector_store, args.csv, args.out)
+            return
+        except ValueError as error:
+            print(f"[INDEX] Cannot update incrementally ({error}); rebuilding")
+
+    index_config = index_config_from_env()
+    overrides = {"type": args.index_type, "nlist": args.nlist, "M": args.hnsw_m, "pq_m": args.pq_m}
+    index_config.update({key: value for key, value in overrides.items() if value is not None})
+
+    build_index(
+        args.csv,
+        args.out,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        chunksize=args.chunksize,
+        index_config=index_config,
+    )
+
+
+if __name__ == "__main__":
+    main()
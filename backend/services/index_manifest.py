@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from services.ann_index import save_index_config, supports_remove
+from services.columnar_store import make_writable, save_columnar
+from services.csv_loader import get_documents
+from services.lexical_index import LexicalIndex
+
+# Saved inside the FAISS directory next to index.faiss / index.pkl
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Texts embedded per call while applying an incremental update
+SYNC_EMBED_BATCH_SIZE = 256
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(document: Document) -> str:
+    """Hash of everything that is embedded for a product."""
+    return hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()[:16]
+
+
+def build_manifest(csv_path: str, documents: List[Document]) -> Dict[str, Any]:
+    return {
+        "version": MANIFEST_VERSION,
+        "csv_sha256": file_checksum(csv_path),
+        "products": {str(d.metadata.get("id")): content_hash(d) for d in documents},
+    }
+
+
+def load_manifest(faiss_dir: str) -> Optional[Dict[str, Any]]:
+    path = Path(faiss_dir) / MANIFEST_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(directory: Path, manifest: Dict[str, Any]) -> None:
+    tmp_path = directory / f"{MANIFEST_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, directory / MANIFEST_FILE)
+
+
+def save_index(vector_store: Any, faiss_dir: str, manifest: Dict[str, Any]) -> None:
+    """
+    Save the index and its manifest without ever leaving a half-written
+    directory: write to a sibling temp dir, then swap it into place.
+    """
+    target = Path(faiss_dir)
+    tmp = target.with_name(f"{target.name}.tmp")
+    backup = target.with_name(f"{target.name}.old")
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    save_columnar(vector_store, str(tmp))
+    save_index_config(str(tmp), vector_store.index)
+    # BM25 postings for hybrid retrieval, in the same row order as the vectors
+    LexicalIndex.from_vector_store(vector_store).save(str(tmp))
+    _write_manifest(tmp, manifest)
+
+    if target.exists():
+        shutil.rmtree(backup, ignore_errors=True)
+        os.replace(target, backup)
+    os.replace(tmp, target)
+    shutil.rmtree(backup, ignore_errors=True)
+
+
+def recover_index_dir(faiss_dir: str) -> None:
+    """Restore the previous index if a save was interrupted mid-swap."""
+    target = Path(faiss_dir)
+    backup = target.with_name(f"{target.name}.old")
+    if not target.exists() and backup.exists():
+        os.replace(backup, target)
+        print(f"Restored FAISS index from interrupted save: {faiss_dir}")
+
+
+def index_is_current(csv_path: str, faiss_dir: str) -> bool:
+    """True if the saved manifest was written for exactly this CSV."""
+    manifest = load_manifest(faiss_dir)
+    return manifest is not None and manifest.get("csv_sha256") == file_checksum(csv_path)
+
+
+def _indexed_products(vector_store: Any) -> Dict[str, Tuple[str, Document]]:
+    """Product id -> (docstore id, Document) for everything in the index."""
+    indexed = {}
+    for docstore_id in vector_store.index_to_docstore_id.values():
+        document = vector_store.docstore.search(docstore_id)
+        if not isinstance(document, Document):
+            continue
+        product_id = str(document.metadata.get("id"))
+        if product_id in indexed:
+            raise ValueError(f"product {product_id} appears more than once in the index")
+        indexed[product_id] = (docstore_id, document)
+    return indexed
+
+
+def sync_index(vector_store: Any, csv_path: str, faiss_dir: Optional[str]) -> Dict[str, Any]:
+    """Bring an index up to date with the CSV, re-embedding only changed products.
+
+    Args:
+        vector_store: Loaded FAISS store (modified in place)
+        csv_path: Path to CSV file containing product data
+        faiss_dir: Directory the index and manifest are saved to (None to skip saving)
+
+    Returns:
+        Dict with added/updated/removed counts and whether the index changed
+
+    Raises:
+        ValueError: If products can't be matched by id (duplicate or missing
+            ids), or an approximate index would need deletions; the caller
+            should rebuild the index instead
+    """
+    started = time.perf_counter()
+    summary = {"added": 0, "updated": 0, "removed": 0, "changed": False}
+
+    manifest = load_manifest(faiss_dir) if faiss_dir else None
+    checksum = file_checksum(csv_path)
+    if manifest is not None and manifest.get("csv_sha256") == checksum:
+        return summary
+
+    documents = get_documents(csv_path)
+    current = {}
+    for document in documents:
+        product_id = str(document.metadata.get("id") or "")
+        if not product_id or product_id in current:
+            raise ValueError(f"CSV product id {product_id!r} is missing or duplicated")
+        current[product_id] = document
+
+    indexed = _indexed_products(vector_store)
+    # Hashes from the manifest; indexes saved before manifests existed are hashed from the docstore
+    previous = (manifest or {}).get("products") or {
+        product_id: content_hash(document) for product_id, (_, document) in indexed.items()
+    }
+
+    added = [pid for pid in current if pid not in indexed]
+    removed = [pid for pid in indexed if pid not in current]
+    updated = [
+        pid for pid in current
+        if pid in indexed and previous.get(pid) != content_hash(current[pid])
+    ]
+
+    if added or removed or updated:
+        # A memory-mapped index is read-only
+        make_writable(vector_store)
+    if removed or updated:
+        if not supports_remove(vector_store.index):
+            raise ValueError(
+                f"{len(removed) + len(updated)} products changed or were removed, "
+                "and this index type can't delete vectors in place"
+            )
+        vector_store.delete([indexed[pid][0] for pid in removed + updated])
+
+    to_embed = [current[pid] for pid in added + updated]
+    for start in range(0, len(to_embed), SYNC_EMBED_BATCH_SIZE):
+        batch = to_embed[start:start + SYNC_EMBED_BATCH_SIZE]
+        texts = [d.page_content for d in batch]
+        vector_store.add_embeddings(
+            text_embeddings=list(zip(texts, vector_store.embeddings.embed_documents(texts))),
+            metadatas=[d.metadata for d in batch],
+            ids=[str(d.metadata["id"]) for d in batch],
+        )
+
+    summary.update(
+        added=len(added),
+        updated=len(updated),
+        removed=len(removed),
+        changed=bool(added or updated or removed),
+    )
+
+    if faiss_dir:
+        new_manifest = {
+            "version": MANIFEST_VERSION,
+            "csv_sha256": checksum,
+            "products": {pid: content_hash(d) for pid, d in current.items()},
+        }
+        if summary["changed"]:
+            save_index(vector_store, faiss_dir, new_manifest)
+        else:
+            # CSV bytes changed but no product did (e.g. reordered rows)
+            _write_manifest(Path(faiss_dir), new_manifest)
+
+    print(
+        f"[INDEX] Synced with {csv_path}: {summary['added']} added, {summary['updated']} updated, "
+        f"{summary['removed']} removed in {time.perf_counter() - started:.1f}s"
+    )
+    return summary
@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import time
+import unicodedata
+import weakref
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.columnar_store import INDEX_MMAP, metadata_column
+from services.csv_loader import TEXT_FIELDS
+
+# Saved inside the index directory, next to index.faiss and columns/
+LEXICAL_DIR = "lexical"
+LEXICAL_VERSION = 1
+
+# BM25 term-frequency saturation and length normalization; baked into the saved weights
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, accent-stripped alphanumeric tokens ("L'Oréal Paris" -> ["l", "oreal", "paris"])."""
+    decomposed = unicodedata.normalize("NFKD", (text or "").lower())
+    return _TOKEN_RE.findall("".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+class LexicalIndex:
+    """BM25 inverted index over product text, rows aligned with the FAISS index.
+
+    Postings are stored term by term (CSR layout) with their BM25 weight
+    precomputed, so scoring a query is a sum of array slices. Rebuild it
+    whenever the vector store is replaced.
+    """
+
+    def __init__(
+        self,
+        terms: Sequence[str],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        weights: np.ndarray,
+        ntotal: int,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        vector_store=None,
+    ):
+        self.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+        # Postings of term t: rows[offsets[t]:offsets[t + 1]], with matching weights
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+        self.ntotal = ntotal
+        self.k1 = k1
+        self.b = b
+        self._store_ref = weakref.ref(vector_store) if vector_store is not None else None
+
+    @classmethod
+    def build(cls, texts: Sequence[str], k1: float = BM25_K1, b: float = BM25_B, vector_store=None) -> "LexicalIndex":
+        """Index one text per row (row i = FAISS index row i)."""
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        rows: List[int] = []
+        frequencies: List[int] = []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[row] = sum(counts.values())
+            for term, count in counts.items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                rows.append(row)
+                frequencies.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.lexsort((rows, term_ids))
+        term_ids = term_ids[order]
+        posting_rows = np.asarray(rows, dtype=np.int32)[order]
+        tf = np.asarray(frequencies, dtype=np.float32)[order]
+
+        doc_freq = np.bincount(term_ids, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=offsets[1:])
+
+        n = len(texts)
+        idf = np.log1p((n - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        avg_length = float(lengths.mean()) if n and lengths.mean() > 0 else 1.0
+        norm = k1 * (1 - b + b * lengths[posting_rows] / avg_length)
+        weights = (idf[term_ids] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+        return cls(list(vocabulary), offsets, posting_rows, weights, n, k1, b, vector_store)
+
+    @classmethod
+    def from_vector_store(cls, vector_store, k1: float = BM25_K1, b: float = BM25_B) -> "LexicalIndex":
+        """Index the brand / name / category / description values of every row."""
+        columns = [metadata_column(vector_store, field) for _, field in TEXT_FIELDS]
+        return cls.build([" ".join(values) for values in zip(*columns)], k1, b, vector_store)
+
+    def covers(self, vector_store) -> bool:
+        """Whether this index belongs to vector_store (row ids line up)."""
+        return self._store_ref is not None and self._store_ref() is vector_store
+
+    def save(self, directory: str) -> None:
+        out = Path(directory) / LEXICAL_DIR
+        out.mkdir(parents=True, exist_ok=True)
+        np.save(out / "offsets.npy", self.offsets)
+        np.save(out / "rows.npy", self.rows)
+        np.save(out / "weights.npy", self.weights)
+        with open(out / "terms.json", "w", encoding="utf-8") as f:
+            json.dump(list(self.vocabulary), f)
+        with open(out / "lexical.json", "w", encoding="utf-8") as f:
+            json.dump({"version": LEXICAL_VERSION, "rows": self.ntotal, "k1": self.k1, "b": self.b}, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, vector_store=None, mmap: bool = INDEX_MMAP) -> Optional["LexicalIndex"]:
+        """Load a saved index; None if there is none or it was saved with other BM25 settings."""
+        source = Path(directory) / LEXICAL_DIR
+        try:
+            with open(source / "lexical.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != LEXICAL_VERSION or (meta.get("k1"), meta.get("b")) != (BM25_K1, BM25_B):
+            return None
+
+        with open(source / "terms.json", "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        # np.load can't map an empty array
+        mmap_mode = "r" if mmap and meta["rows"] else None
+        return cls(
+            terms,
+            np.load(source / "offsets.npy"),
+            np.load(source / "rows.npy", mmap_mode=mmap_mode),
+            np.load(source / "weights.npy", mmap_mode=mmap_mode),
+            meta["rows"],
+            meta["k1"],
+            meta["b"],
+            vector_store,
+        )
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 top-k.
+
+        Args:
+            query: Free-text query
+            k: Number of results wanted
+            mask: Optional boolean array over rows; only True rows can match
+
+        Returns:
+            Tuple of (scores, row ids), best first; only rows sharing a term with the query
+        """
+        scores = np.zeros(self.ntotal, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # A term appears once per row in its postings, so fancy-index += is safe
+            scores[self.rows[start:end]] += self.weights[start:end]
+        if mask is not None:
+            scores[~mask] = 0
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return scores[hits], hits
+
+
+def load_lexical_index(directory: Optional[str], vector_store) -> LexicalIndex:
+    """The saved lexical index for vector_store, or one built from its metadata if missing or stale."""
+    started = time.perf_counter()
+    lexical = LexicalIndex.load(directory, vector_store) if directory else None
+    if lexical is not None and lexical.ntotal == vector_store.index.ntotal:
+        print(f"[INDEX] Loaded BM25 index ({len(lexical.vocabulary)} terms) in {time.perf_counter() - started:.2f}s")
+        return lexical
+
+    lexical = LexicalIndex.from_vector_store(vector_store)
+    print(f"[INDEX] Built BM25 index ({len(lexical.vocabulary)} terms) in {time.perf_counter() - started:.2f}s")
+    return lexical
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]],
+    weights: Sequence[float],
+    k: int = 60,
+) -> List[int]:
+    """Merge ranked row lists: score(row) = sum of weight / (k + rank), rank starting at 1.
+
+    Ties keep the order in which rows were first seen (earlier rankings first).
+    """
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, row in enumerate(ranking, start=1):
+            fused[int(row)] = fused.get(int(row), 0.0) + weight / (k + rank)
+    return sorted(fused, key=lambda row: -fused[row])
@@ -0,0 +1,132 @@
+import os
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from services.columnar_store import metadata_column
+
+# Metadata fields (from csv_loader) that searches can be restricted by
+FILTER_FIELDS = ("brand", "product_type")
+
+# Approximate indexes: filters matching at most this many products are searched
+# exactly over just those vectors (IVF/HNSW can miss hits when few rows pass the filter)
+FILTER_EXACT_MAX_ROWS = int(os.getenv("FILTER_EXACT_MAX_ROWS", "4096"))
+
+
+def normalize_value(value: str) -> str:
+    """Case- and whitespace-insensitive form of a metadata value ("\\nLipstick\\n" -> "lipstick")."""
+    return " ".join(str(value).split()).casefold()
+
+
+def filter_key(filters: Optional[Dict[str, Iterable[str]]]) -> str:
+    """Canonical string for a filter set (e.g. for cache keys); "" when unfiltered."""
+    if not filters:
+        return ""
+    parts = []
+    for field in sorted(filters):
+        values = sorted({normalize_value(v) for v in filters[field] or ()})
+        if values:
+            parts.append(f"{field}={','.join(values)}")
+    return ";".join(parts)
+
+
+class MetadataIndex:
+    """Inverted index from brand / product type values to FAISS row ids.
+
+    Built from the vector store's metadata (index row order); rebuild it
+    whenever the store is replaced.
+    """
+
+    def __init__(self, columns: Dict[str, List[str]], ntotal: int, vector_store=None):
+        self.ntotal = ntotal
+        self._store_ref = weakref.ref(vector_store) if vector_store is not None else None
+        # field -> normalized value -> sorted row ids
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+        for field, values in columns.items():
+            rows_by_value: Dict[str, List[int]] = {}
+            for row, value in enumerate(values):
+                rows_by_value.setdefault(normalize_value(value), []).append(row)
+            self.postings[field] = {
+                value: np.asarray(rows, dtype=np.int64) for value, rows in rows_by_value.items()
+            }
+
+    @classmethod
+    def from_vector_store(cls, vector_store, fields: Tuple[str, ...] = FILTER_FIELDS) -> "MetadataIndex":
+        return cls(
+            {field: metadata_column(vector_store, field) for field in fields},
+            vector_store.index.ntotal,
+            vector_store,
+        )
+
+    def covers(self, vector_store) -> bool:
+        """Whether this index was built from vector_store (row ids line up)."""
+        return self._store_ref is not None and self._store_ref() is vector_store
+
+    def mask(self, filters: Optional[Dict[str, Iterable[str]]]) -> Optional[np.ndarray]:
+        """
+        Boolean row mask: any of the values within a field, all fields
+        together. None if there is nothing to filter on.
+        """
+        mask = None
+        for field, values in (filters or {}).items():
+            values = [normalize_value(v) for v in values or ()]
+            if not values:
+                continue
+            if field not in self.postings:
+                raise ValueError(f"Cannot filter on {field!r}; expected one of {list(self.postings)}")
+            field_mask = np.zeros(self.ntotal, dtype=bool)
+            for value in values:
+                field_mask[self.postings[field].get(value, np.empty(0, dtype=np.int64))] = True
+            mask = field_mask if mask is None else mask & field_mask
+        return mask
+
+
+def _exact_search(index: faiss.Index, query: np.ndarray, k: int, rows: np.ndarray):
+    """Brute-force L2 over just the given rows."""
+    vectors = index.reconstruct_batch(rows)
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    top = np.argsort(distances)[:k]
+    return distances[top], rows[top]
+
+
+def filtered_search(index: faiss.Index, query_vector, k: int, mask: np.ndarray):
+    """Search only rows where mask is True.
+
+    Args:
+        index: FAISS index (flat, IVF or HNSW)
+        query_vector: Query embedding
+        k: Number of results wanted
+        mask: Boolean array over index rows (MetadataIndex.mask)
+
+    Returns:
+        Tuple of (distances, row ids); min(k, matching rows) results,
+        nearest first
+    """
+    query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+    rows = np.flatnonzero(mask)
+    wanted = min(k, len(rows))
+    if wanted == 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    approximate = not isinstance(index, faiss.IndexFlat)
+    if approximate and len(rows) <= FILTER_EXACT_MAX_ROWS:
+        return _exact_search(index, query[0], wanted, rows)
+
+    # Selector is checked inside the search, so filtered-out rows never take a result slot
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    if isinstance(index, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    elif isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=max(index.hnsw.efSearch, k))
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    distances, ids = index.search(query, k, params=params)
+    found = ids[0] >= 0
+
+    if found.sum() < wanted:
+        # The probed clusters / graph walk didn't reach enough matching rows
+        return _exact_search(index, query[0], wanted, rows)
+    return distances[0][found], ids[0][found]
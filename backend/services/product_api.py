@@ -1,17 +1,70 @@
+import asyncio
+import html
 import os
-from typing import Any, Dict, Optional
-import requests
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from services.http_client import async_http_get, async_http_stream, http_get
+from data.cache.sqlite_image_cache import SQLiteImageCache
 
 load_dotenv()
 
 # TODO: Polish
 # API Keys
 SERPAPI_KEY = os.getenv("SERPAPI_KEY", "")
+SERPAPI_URL = "https://serpapi.com/search"
 
 # Networking defaults
 DEFAULT_TIMEOUT_S = 10
 
+# Engine fan-out: run SEARCH_ENGINES in parallel (optionally staggered) instead of one by one.
+# Off by default because every launched engine costs a SerpAPI search.
+ENGINE_FAN_OUT = os.getenv("PRODUCT_API_FAN_OUT", "0").lower() in ("1", "true", "yes")
+# Delay between launching successive engines (0 = all at once, >0 = hedged)
+ENGINE_HEDGE_DELAY_S = float(os.getenv("PRODUCT_API_HEDGE_DELAY_S", "0"))
+# Max time a single engine (search + image resolution) may take before it is ignored
+ENGINE_BUDGET_S = float(os.getenv("PRODUCT_API_ENGINE_BUDGET_S", "12"))
+# Max time for the whole lookup across all engines
+OVERALL_BUDGET_S = float(os.getenv("PRODUCT_API_OVERALL_BUDGET_S", "15"))
+
+# og:image extraction only reads the page <head>, capped at this many bytes
+OG_MAX_BYTES = int(os.getenv("PRODUCT_API_OG_MAX_BYTES", str(256 * 1024)))
+OG_CHUNK_SIZE = 16 * 1024
+
+# Persistent og:image / image-validation cache (separate TTLs for hits and misses)
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+IMAGE_CACHE_POSITIVE_TTL_S = float(os.getenv("IMAGE_CACHE_POSITIVE_TTL_S", str(30 * 24 * 3600)))
+IMAGE_CACHE_NEGATIVE_TTL_S = float(os.getenv("IMAGE_CACHE_NEGATIVE_TTL_S", str(12 * 3600)))
+IMAGE_CACHE_MAX_ROWS = int(os.getenv("IMAGE_CACHE_MAX_ROWS", "50000"))
+# Statuses that say a page / image is gone for good; any other non-200 is treated as
+# transient (rate limiting, outages) and never cached as a miss
+_GONE_STATUSES = (404, 410)
+
+# Optional callable invoked before every SerpAPI request (rate limiting / quota accounting)
+_serpapi_call_hook: Optional[Callable[[], None]] = None
+
+_image_cache: Optional[SQLiteImageCache] = None
+_image_cache_lock = threading.Lock()
+
+# Precompiled (bytes) patterns for head-only image extraction
+_HEAD_END_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+_META_TAG_RE = re.compile(rb"<meta\b[^>]*>", re.IGNORECASE)
+_LINK_TAG_RE = re.compile(rb"<link\b[^>]*>", re.IGNORECASE)
+_ATTR_RE = re.compile(rb"""([a-zA-Z_:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_OG_IMAGE_HINT_RE = re.compile(rb"og:image", re.IGNORECASE)
+
+# Lower value wins: og:image (property= or name=) > twitter:image
+_META_IMAGE_PRIORITY = {
+    "og:image": 0,
+    "og:image:url": 0,
+    "og:image:secure_url": 0,
+    "twitter:image": 1,
+    "twitter:image:src": 1,
+}
+
 # More “browser-like” headers help Amazon/retailers return the real HTML + OG tags
 UA_HEADERS = {
     "User-Agent": (
@@ -57,90 +110,350 @@ def _normalize_url(url: str) -> str:
 def is_renderable_image_url(url: str, timeout: float = 6.0) -> bool:
     """
     Returns True only if the URL can be fetched and the response Content-Type is image/*.
-    Uses a lightweight GET with stream=True (HEAD is often unsupported).
+    Uses a lightweight GET with stream=True (HEAD is often unsupported); the body is
+    never read and the connection is always released.
     """
+    return _check_image(url, timeout) is True
+
+
+def _check_image(url: str, timeout: float = 6.0) -> Optional[bool]:
+    """is_renderable_image_url, but None if the check failed transiently (timeout, 429, 5xx...)."""
     url = _normalize_url(url)
     if not url:
         return False
 
     try:
-        r = requests.get(
+        with http_get(
             url,
             timeout=timeout,
             allow_redirects=True,
             stream=True,
             headers=UA_HEADERS,
-        )
-        if r.status_code != 200:
-            return False
-        content_type = (r.headers.get("Content-Type") or "").lower()
-        return content_type.startswith("image/")
+        ) as r:
+            return _image_status(r.status_code, r.headers)
     except Exception:
+        return None
+
+
+async def is_renderable_image_url_async(url: str, timeout: float = 6.0) -> bool:
+    """is_renderable_image_url over the async client."""
+    return await _check_image_async(url, timeout) is True
+
+
+async def _check_image_async(url: str, timeout: float = 6.0) -> Optional[bool]:
+    url = _normalize_url(url)
+    if not url:
         return False
 
+    try:
+        async with async_http_stream(url, timeout=timeout, headers=UA_HEADERS) as r:
+            return _image_status(r.status, r.headers)
+    except Exception:
+        return None
+
+
+def _image_status(status: int, headers) -> Optional[bool]:
+    if status in _GONE_STATUSES:
+        return False
+    if status != 200:
+        return None
+    content_type = (headers.get("Content-Type") or "").lower()
+    return content_type.startswith("image/")
+
+
+def _tag_attrs(tag: bytes) -> Dict[str, str]:
+    """Parse the quoted attributes of a single HTML tag (names lower-cased)."""
+    attrs: Dict[str, str] = {}
+    for m in _ATTR_RE.finditer(tag):
+        name = m.group(1).decode("ascii", "ignore").lower()
+        value = m.group(2) if m.group(2) is not None else m.group(3)
+        attrs[name] = html.unescape(value.decode("utf-8", "replace")).strip()
+    return attrs
+
 
-def get_og_image(product_url: str, timeout: float = 8.0) -> str:
+def _extract_head_image(head: bytes) -> Tuple[str, int]:
     """
-    Fetch the product page HTML and extract <meta property="og:image" content="...">.
-    Returns "" if unavailable.
+    Find the best page image in (part of) an HTML head.
+    Returns (url, priority) where priority is 0 for og:image, 1 for twitter:image,
+    2 for <link rel="image_src">, or ("", -1) if nothing was found.
+    """
+    best_url, best_priority = "", -1
+
+    for m in _META_TAG_RE.finditer(head):
+        attrs = _tag_attrs(m.group(0))
+        key = (attrs.get("property") or attrs.get("name") or "").lower()
+        priority = _META_IMAGE_PRIORITY.get(key)
+        content = attrs.get("content", "")
+        if priority is None or not content:
+            continue
+        if priority == 0:
+            return content, 0
+        if best_priority == -1 or priority < best_priority:
+            best_url, best_priority = content, priority
+
+    if best_priority == -1:
+        for m in _LINK_TAG_RE.finditer(head):
+            attrs = _tag_attrs(m.group(0))
+            if "image_src" in attrs.get("rel", "").lower().split() and attrs.get("href"):
+                return attrs["href"], 2
+
+    return best_url, best_priority
+
+
+class _HeadReader:
+    """Accumulates a streamed page until its preview image can be read from the <head>."""
+
+    def __init__(self, byte_cap: int):
+        self.byte_cap = byte_cap
+        self.head = bytearray()
+        self._og_image: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add the next chunk; True once the rest of the page isn't needed."""
+        if not chunk:
+            return False
+        # Re-scan a few bytes of overlap so a tag split across chunks is still seen
+        scan_from = max(0, len(self.head) - 16)
+        self.head.extend(chunk)
+
+        head_end = _HEAD_END_RE.search(self.head, scan_from)
+        if head_end:
+            del self.head[head_end.start():]
+            return True
+        if _OG_IMAGE_HINT_RE.search(self.head, max(0, scan_from - 512)):
+            url, priority = _extract_head_image(bytes(self.head))
+            if priority == 0:
+                self._og_image = url
+                return True
+        if len(self.head) >= self.byte_cap:
+            del self.head[self.byte_cap:]
+            return True
+        return False
+
+    def image_url(self) -> str:
+        if self._og_image is not None:
+            return _normalize_url(self._og_image)
+        url, _ = _extract_head_image(bytes(self.head))
+        return _normalize_url(url)
+
+
+def get_og_image(product_url: str, timeout: float = 8.0, max_bytes: Optional[int] = None) -> str:
+    """
+    Stream the product page and extract its preview image from the <head>:
+    og:image, then twitter:image, then <link rel="image_src">.
+    Reading stops at </head>, once og:image is found, or after max_bytes
+    (default OG_MAX_BYTES). Returns "" if unavailable.
 
     Fix 1: Prefer retailer product page og:image over CDN thumbnails.
     """
+    return _fetch_og_image(product_url, timeout, max_bytes) or ""
+
+
+def _fetch_og_image(product_url: str, timeout: float = 8.0, max_bytes: Optional[int] = None) -> Optional[str]:
+    """get_og_image, but None if the page couldn't be read (timeout, 429, 5xx...) rather than ""."""
     product_url = _normalize_url(product_url)
     if not product_url:
         return ""
 
+    byte_cap = OG_MAX_BYTES if max_bytes is None else max_bytes
+
     try:
-        resp = requests.get(
+        with http_get(
             product_url,
             timeout=timeout,
             allow_redirects=True,
+            stream=True,
             headers=UA_HEADERS,
-        )
-        if resp.status_code != 200:
-            return ""
+        ) as resp:
+            if resp.status_code != 200:
+                return "" if resp.status_code in _GONE_STATUSES else None
+
+            reader = _HeadReader(byte_cap)
+            for chunk in resp.iter_content(chunk_size=OG_CHUNK_SIZE):
+                if reader.feed(chunk):
+                    break
+        return reader.image_url()
+    except Exception:
+        return None
 
-        html = resp.text or ""
-        if not html:
-            return ""
 
-        # Minimal parsing without BeautifulSoup.
-        import re
+async def get_og_image_async(product_url: str, timeout: float = 8.0, max_bytes: Optional[int] = None) -> str:
+    """get_og_image over the async client."""
+    return await _fetch_og_image_async(product_url, timeout, max_bytes) or ""
 
-        # property="og:image"
-        pattern = re.compile(
-            r'<meta\s+[^>]*property=[\'"]og:image[\'"][^>]*content=[\'"]([^\'"]+)[\'"][^>]*>',
-            re.IGNORECASE,
-        )
-        m = pattern.search(html)
 
-        if not m:
-            # sometimes sites use name="og:image"
-            pattern2 = re.compile(
-                r'<meta\s+[^>]*name=[\'"]og:image[\'"][^>]*content=[\'"]([^\'"]+)[\'"][^>]*>',
-                re.IGNORECASE,
-            )
-            m = pattern2.search(html)
+async def _fetch_og_image_async(
+    product_url: str,
+    timeout: float = 8.0,
+    max_bytes: Optional[int] = None,
+) -> Optional[str]:
+    product_url = _normalize_url(product_url)
+    if not product_url:
+        return ""
+
+    byte_cap = OG_MAX_BYTES if max_bytes is None else max_bytes
 
-        og = (m.group(1).strip() if m else "")
-        return _normalize_url(og)
+    try:
+        async with async_http_stream(product_url, timeout=timeout, headers=UA_HEADERS) as resp:
+            if resp.status != 200:
+                return "" if resp.status in _GONE_STATUSES else None
+
+            reader = _HeadReader(byte_cap)
+            async for chunk in resp.content.iter_chunked(OG_CHUNK_SIZE):
+                if reader.feed(chunk):
+                    break
+        return reader.image_url()
     except Exception:
+        return None
+
+
+def get_image_cache() -> Optional[SQLiteImageCache]:
+    """Return the shared image cache, or None when IMAGE_CACHE_ENABLED is off."""
+    global _image_cache
+    if not IMAGE_CACHE_ENABLED:
+        return None
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = SQLiteImageCache(
+                    positive_ttl_s=IMAGE_CACHE_POSITIVE_TTL_S,
+                    negative_ttl_s=IMAGE_CACHE_NEGATIVE_TTL_S,
+                    max_rows=IMAGE_CACHE_MAX_ROWS,
+                )
+    return _image_cache
+
+
+def _cached_og_image(product_url: str) -> str:
+    """get_og_image backed by the persistent cache.
+
+    Pages read without finding an image are cached as misses; failed reads
+    (timeouts, 429/5xx) are not, so a retailer hiccup doesn't hide the
+    image for IMAGE_CACHE_NEGATIVE_TTL_S.
+    """
+    cache = get_image_cache()
+    if cache is None or not product_url:
+        return get_og_image(product_url)
+
+    try:
+        cached = cache.get(SQLiteImageCache.OG_IMAGE, product_url)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache read failed: {e}")
+        return get_og_image(product_url)
+    if cached is not None:
+        return cached[1]
+
+    og = _fetch_og_image(product_url)
+    if og is None:
         return ""
+    try:
+        cache.set(SQLiteImageCache.OG_IMAGE, product_url, bool(og), og)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache write failed: {e}")
+    return og
+
+
+def _cached_is_renderable(image_url: str) -> bool:
+    """is_renderable_image_url backed by the persistent cache (failed checks aren't cached)."""
+    cache = get_image_cache()
+    if cache is None or not image_url:
+        return is_renderable_image_url(image_url)
+
+    try:
+        cached = cache.get(SQLiteImageCache.RENDERABLE, image_url)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache read failed: {e}")
+        return is_renderable_image_url(image_url)
+    if cached is not None:
+        return cached[0]
+
+    ok = _check_image(image_url)
+    if ok is None:
+        return False
+    try:
+        cache.set(SQLiteImageCache.RENDERABLE, image_url, ok)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache write failed: {e}")
+    return ok
 
 
 def resolve_best_image(product_url: str, candidate_thumbnail: str) -> str:
     """
     Fix 1: Prefer retailer page og:image (validated) over thumbnails.
     Fallback to validated thumbnail.
+    Page and image checks go through the persistent image cache, so URLs seen
+    before (by any product or engine) cost no round trips.
     """
     product_url_n = _normalize_url(product_url)
     thumb_n = _normalize_url(candidate_thumbnail)
 
-    og = get_og_image(product_url_n)
-    if og and is_renderable_image_url(og):
+    og = _cached_og_image(product_url_n)
+    if og and _cached_is_renderable(og):
+        return og
+
+    if thumb_n and _cached_is_renderable(thumb_n):
+        return thumb_n
+
+    return ""
+
+
+async def _cached_og_image_async(product_url: str) -> str:
+    """_cached_og_image without blocking the event loop (SQLite access runs in a thread)."""
+    cache = get_image_cache()
+    if cache is None or not product_url:
+        return await get_og_image_async(product_url)
+
+    try:
+        cached = await asyncio.to_thread(cache.get, SQLiteImageCache.OG_IMAGE, product_url)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache read failed: {e}")
+        return await get_og_image_async(product_url)
+    if cached is not None:
+        return cached[1]
+
+    og = await _fetch_og_image_async(product_url)
+    if og is None:
+        return ""
+    try:
+        await asyncio.to_thread(cache.set, SQLiteImageCache.OG_IMAGE, product_url, bool(og), og)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache write failed: {e}")
+    return og
+
+
+async def _cached_is_renderable_async(image_url: str) -> bool:
+    """_cached_is_renderable without blocking the event loop."""
+    cache = get_image_cache()
+    if cache is None or not image_url:
+        return await is_renderable_image_url_async(image_url)
+
+    try:
+        cached = await asyncio.to_thread(cache.get, SQLiteImageCache.RENDERABLE, image_url)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache read failed: {e}")
+        return await is_renderable_image_url_async(image_url)
+    if cached is not None:
+        return cached[0]
+
+    ok = await _check_image_async(image_url)
+    if ok is None:
+        return False
+    try:
+        await asyncio.to_thread(cache.set, SQLiteImageCache.RENDERABLE, image_url, ok)
+    except Exception as e:
+        print(f"[PRODUCT_API] Image cache write failed: {e}")
+    return ok
+
+
+async def resolve_best_image_async(product_url: str, candidate_thumbnail: str) -> str:
+    """resolve_best_image over the async client."""
+    product_url_n = _normalize_url(product_url)
+    thumb_n = _normalize_url(candidate_thumbnail)
+
+    og = await _cached_og_image_async(product_url_n)
+    if og and await _cached_is_renderable_async(og):
         return og
 
-    if thumb_n and is_renderable_image_url(thumb_n):
+    if thumb_n and await _cached_is_renderable_async(thumb_n):
         return thumb_n
 
     return ""
@@ -149,24 +462,52 @@ def resolve_best_image(product_url: str, candidate_thumbnail: str) -> str:
 # ----------------------------
 # SerpAPI fetchers
 # ----------------------------
-def _fetch_serpapi_shopping(query: str, max_results: int) -> Optional[Dict[str, Any]]:
-    """Fetch product data from SerpAPI's Google Shopping API."""
-    if not SERPAPI_KEY:
-        print("[PRODUCT_API] SerpAPI: Missing API key")
-        return None
+def set_serpapi_call_hook(hook: Optional[Callable[[], None]]) -> None:
+    """
+    Register a callable run before every SerpAPI request (None to clear).
+    Retries are requests too, so it runs once per HTTP attempt, not once
+    per search. It may block (rate limiting) or raise to abort the request.
+    """
+    global _serpapi_call_hook
+    _serpapi_call_hook = hook
+
+
+def _serpapi_search(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a SerpAPI search over the pooled client and return the parsed JSON."""
+    response = http_get(
+        SERPAPI_URL,
+        params={"api_key": SERPAPI_KEY, **params},
+        timeout=DEFAULT_TIMEOUT_S,
+        on_attempt=_serpapi_call_hook,
+        headers=UA_HEADERS,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def _serpapi_search_async(params: Dict[str, Any]) -> Dict[str, Any]:
+    """_serpapi_search over the async client."""
+    hook = _serpapi_call_hook
+    # The hook may sleep (rate limiting); keep it off the event loop
+    on_attempt = (lambda: asyncio.to_thread(hook)) if hook is not None else None
+
+    response = await async_http_get(
+        SERPAPI_URL,
+        params={"api_key": SERPAPI_KEY, **params},
+        timeout=DEFAULT_TIMEOUT_S,
+        on_attempt=on_attempt,
+        headers=UA_HEADERS,
+    )
+    response.raise_for_status()
+    return await response.json(content_type=None)
 
-    url = "https://serpapi.com/search"
-    params = {
-        "api_key": SERPAPI_KEY,
-        "engine": "google_shopping",
-        "q": query,
-        "num": max_results,
-    }
 
-    response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT_S, headers=UA_HEADERS)
-    response.raise_for_status()
-    data = response.json()
+def _shopping_params(query: str, max_results: int) -> Dict[str, Any]:
+    return {"engine": "google_shopping", "q": query, "num": max_results}
+
 
+def _parse_shopping(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """First result from SerpAPI's Google Shopping API."""
     shopping_results = data.get("shopping_results", []) or []
     if not shopping_results:
         return None
@@ -187,24 +528,12 @@ def _fetch_serpapi_shopping(query: str, max_results: int) -> Optional[Dict[str,
     }
 
 
-def _fetch_serpapi_amazon(query: str, max_results: int) -> Optional[Dict[str, Any]]:
-    """Fetch product data from SerpAPI's Amazon API."""
-    if not SERPAPI_KEY:
-        print("[PRODUCT_API] SerpAPI: Missing API key")
-        return None
+def _amazon_params(query: str, max_results: int) -> Dict[str, Any]:
+    return {"engine": "amazon", "k": query, "amazon_domain": "amazon.com"}
 
-    url = "https://serpapi.com/search"
-    params = {
-        "api_key": SERPAPI_KEY,
-        "engine": "amazon",
-        "k": query,
-        "amazon_domain": "amazon.com",
-    }
-
-    response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT_S, headers=UA_HEADERS)
-    response.raise_for_status()
-    data = response.json()
 
+def _parse_amazon(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """First result from SerpAPI's Amazon API."""
     organic_results = data.get("organic_results", []) or []
     if not organic_results:
         return None
@@ -225,24 +554,12 @@ def _fetch_serpapi_amazon(query: str, max_results: int) -> Optional[Dict[str, An
     }
 
 
-def _fetch_serpapi_ebay(query: str, max_results: int) -> Optional[Dict[str, Any]]:
-    """Fetch product data from SerpAPI's eBay API."""
-    if not SERPAPI_KEY:
-        print("[PRODUCT_API] SerpAPI: Missing API key")
-        return None
+def _ebay_params(query: str, max_results: int) -> Dict[str, Any]:
+    return {"engine": "ebay", "_nkw": query, "ebay_domain": "ebay.com"}
 
-    url = "https://serpapi.com/search"
-    params = {
-        "api_key": SERPAPI_KEY,
-        "engine": "ebay",
-        "_nkw": query,
-        "ebay_domain": "ebay.com",
-    }
-
-    response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT_S, headers=UA_HEADERS)
-    response.raise_for_status()
-    data = response.json()
 
+def _parse_ebay(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """First result from SerpAPI's eBay API."""
     organic_results = data.get("organic_results", []) or []
     if not organic_results:
         return None
@@ -263,23 +580,12 @@ def _fetch_serpapi_ebay(query: str, max_results: int) -> Optional[Dict[str, Any]
     }
 
 
-def _fetch_serpapi_walmart(query: str, max_results: int) -> Optional[Dict[str, Any]]:
-    """Fetch product data from SerpAPI's Walmart API."""
-    if not SERPAPI_KEY:
-        print("[PRODUCT_API] SerpAPI: Missing API key")
-        return None
+def _walmart_params(query: str, max_results: int) -> Dict[str, Any]:
+    return {"engine": "walmart", "query": query}
 
-    url = "https://serpapi.com/search"
-    params = {
-        "api_key": SERPAPI_KEY,
-        "engine": "walmart",
-        "query": query,
-    }
-
-    response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT_S, headers=UA_HEADERS)
-    response.raise_for_status()
-    data = response.json()
 
+def _parse_walmart(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """First result from SerpAPI's Walmart API."""
     organic_results = data.get("organic_results", []) or []
     if not organic_results:
         return None
@@ -304,15 +610,31 @@ def _fetch_serpapi_walmart(query: str, max_results: int) -> Optional[Dict[str, A
     }
 
 
-# Engine configuration
+# Engine configuration: SerpAPI request parameters and result parser per engine
 SEARCH_ENGINES = [
-    {"name": "amazon", "fetch_func": _fetch_serpapi_amazon},
-    {"name": "google_shopping", "fetch_func": _fetch_serpapi_shopping},
-    {"name": "ebay", "fetch_func": _fetch_serpapi_ebay},
-    {"name": "walmart", "fetch_func": _fetch_serpapi_walmart},
+    {"name": "amazon", "params": _amazon_params, "parse": _parse_amazon},
+    {"name": "google_shopping", "params": _shopping_params, "parse": _parse_shopping},
+    {"name": "ebay", "params": _ebay_params, "parse": _parse_ebay},
+    {"name": "walmart", "params": _walmart_params, "parse": _parse_walmart},
 ]
 
 
+def _fetch_engine(engine_config: Dict[str, Any], query: str, max_results: int) -> Optional[Dict[str, Any]]:
+    """Fetch product data from one SerpAPI engine."""
+    if not SERPAPI_KEY:
+        print("[PRODUCT_API] SerpAPI: Missing API key")
+        return None
+    return engine_config["parse"](_serpapi_search(engine_config["params"](query, max_results)))
+
+
+async def _fetch_engine_async(engine_config: Dict[str, Any], query: str, max_results: int) -> Optional[Dict[str, Any]]:
+    """_fetch_engine without blocking the event loop."""
+    if not SERPAPI_KEY:
+        print("[PRODUCT_API] SerpAPI: Missing API key")
+        return None
+    return engine_config["parse"](await _serpapi_search_async(engine_config["params"](query, max_results)))
+
+
 # ----------------------------
 # Public API
 # ----------------------------
@@ -321,45 +643,253 @@ def get_product_from_apis(
     product_name: str,
     product_type: str,
     max_results: int = 3,
+    fan_out: Optional[bool] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Fetch product enrichment data from various product APIs.
-    Tries multiple search engines in order until one returns a valid result
+    Returns the result of the highest-priority engine (SEARCH_ENGINES order)
     with a renderable image (prefer og:image).
+
+    With fan_out (default ENGINE_FAN_OUT) engines run in parallel, staggered by
+    ENGINE_HEDGE_DELAY_S, and are bounded by ENGINE_BUDGET_S / OVERALL_BUDGET_S.
+    Otherwise engines are tried in order until one succeeds.
     """
     search_query = f"{brand} {product_name} {product_type}".strip()
 
+    if fan_out is None:
+        fan_out = ENGINE_FAN_OUT
+    if fan_out and len(SEARCH_ENGINES) > 1:
+        return _fan_out_engines(search_query, max_results)
+
     for engine_config in SEARCH_ENGINES:
-        try:
-            fetch_func = engine_config["fetch_func"]
-            result = fetch_func(search_query, max_results)
+        result = _run_engine(engine_config, search_query, max_results)
+        if result:
+            return result
 
-            if not result:
-                continue
+    return None
 
-            product_url = (result.get("product_url") or "").strip()
-            thumb = (result.get("image_url") or "").strip()
 
-            # Require a product_url (otherwise og:image is impossible and clicks break UX)
-            if not product_url:
-                continue
+def _run_engine(
+    engine_config: Dict[str, Any],
+    search_query: str,
+    max_results: int,
+    cancel_event: Optional[threading.Event] = None,
+    start_delay_s: float = 0.0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run one search engine and resolve its image.
+    Returns the result only if it has a product_url and a renderable image.
+    """
+    # Hedged start: wait our turn unless the lookup is already decided
+    if cancel_event is not None:
+        if start_delay_s > 0 and cancel_event.wait(start_delay_s):
+            return None
+        if cancel_event.is_set():
+            return None
 
-            # Fix 1: Prefer og:image from the product page; validate it; then fallback thumbnail.
-            best_image = resolve_best_image(product_url, thumb)
-            result["image_url"] = best_image
+    try:
+        result = _fetch_engine(engine_config, search_query, max_results)
 
-            # If you *require* images, keep this check.
-            # If you want to allow image-less results (and show a placeholder), remove this.
-            if _has_valid_thumbnail(result):
-                return result
+        if not result:
+            return None
 
-        except Exception as e:
-            print(f"[PRODUCT_API] {engine_config['name']} search failed: {e}")
-            continue
+        product_url = (result.get("product_url") or "").strip()
+        thumb = (result.get("image_url") or "").strip()
+
+        # Require a product_url (otherwise og:image is impossible and clicks break UX)
+        if not product_url:
+            return None
+
+        # A higher-priority engine already won; skip the image round trips
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+
+        # Fix 1: Prefer og:image from the product page; validate it; then fallback thumbnail.
+        best_image = resolve_best_image(product_url, thumb)
+        result["image_url"] = best_image
+
+        # If you *require* images, keep this check.
+        # If you want to allow image-less results (and show a placeholder), remove this.
+        if _has_valid_thumbnail(result):
+            return result
+
+    except Exception as e:
+        print(f"[PRODUCT_API] {engine_config['name']} search failed: {e}")
+
+    return None
+
+
+def _fan_out_engines(search_query: str, max_results: int) -> Optional[Dict[str, Any]]:
+    """
+    Run all SEARCH_ENGINES concurrently and return the first valid result in
+    priority order: a lower-priority engine only wins once every engine ahead
+    of it has finished without a result or run out of budget.
+    Slower engines are ignored (their threads finish in the background).
+    """
+    cancel_event = threading.Event()
+    started_at = time.monotonic()
+    overall_deadline = started_at + OVERALL_BUDGET_S
+
+    executor = ThreadPoolExecutor(max_workers=len(SEARCH_ENGINES), thread_name_prefix="engine")
+    try:
+        futures = [
+            executor.submit(
+                _run_engine,
+                engine_config,
+                search_query,
+                max_results,
+                cancel_event,
+                position * ENGINE_HEDGE_DELAY_S,
+            )
+            for position, engine_config in enumerate(SEARCH_ENGINES)
+        ]
+        # Each engine's budget starts when it is launched
+        deadlines = [
+            min(started_at + position * ENGINE_HEDGE_DELAY_S + ENGINE_BUDGET_S, overall_deadline)
+            for position in range(len(futures))
+        ]
+        pending = set(futures)
+
+        while True:
+            now = time.monotonic()
+            for position, future in enumerate(futures):
+                if future.done():
+                    result = future.result()
+                    if result:
+                        return result
+                    continue
+                if now >= deadlines[position]:
+                    # Over budget: treat as failed and move on to the next engine
+                    pending.discard(future)
+                    continue
+                # Highest-priority engine still running; wait for it
+                break
+            else:
+                return None
+
+            if now >= overall_deadline or not pending:
+                return None
+
+            # Wake up when any engine finishes or the blocking engine runs out of budget
+            done, _ = wait(pending, timeout=max(0.0, deadlines[position] - now), return_when=FIRST_COMPLETED)
+            pending -= done
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def get_product_from_apis_async(
+    brand: str,
+    product_name: str,
+    product_type: str,
+    max_results: int = 3,
+    fan_out: Optional[bool] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    get_product_from_apis on the event loop: the same engine priority,
+    hedging and budgets, but no thread per engine, and cancelling the
+    calling task aborts every in-flight upstream request.
+    """
+    search_query = f"{brand} {product_name} {product_type}".strip()
+
+    if fan_out is None:
+        fan_out = ENGINE_FAN_OUT
+    if fan_out and len(SEARCH_ENGINES) > 1:
+        return await _fan_out_engines_async(search_query, max_results)
+
+    for engine_config in SEARCH_ENGINES:
+        result = await _run_engine_async(engine_config, search_query, max_results)
+        if result:
+            return result
+
+    return None
+
+
+async def _run_engine_async(
+    engine_config: Dict[str, Any],
+    search_query: str,
+    max_results: int,
+    start_delay_s: float = 0.0,
+) -> Optional[Dict[str, Any]]:
+    """_run_engine as a coroutine; a decided lookup cancels it instead of setting an event."""
+    if start_delay_s > 0:
+        await asyncio.sleep(start_delay_s)
+
+    try:
+        result = await _fetch_engine_async(engine_config, search_query, max_results)
+
+        if not result:
+            return None
+
+        product_url = (result.get("product_url") or "").strip()
+        thumb = (result.get("image_url") or "").strip()
+        if not product_url:
+            return None
+
+        result["image_url"] = await resolve_best_image_async(product_url, thumb)
+        if _has_valid_thumbnail(result):
+            return result
+
+    except Exception as e:
+        print(f"[PRODUCT_API] {engine_config['name']} search failed: {e}")
 
     return None
 
 
+async def _fan_out_engines_async(search_query: str, max_results: int) -> Optional[Dict[str, Any]]:
+    """
+    _fan_out_engines on the event loop. Engines that lose (or run out of
+    budget) are cancelled rather than left to finish in the background.
+    """
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    overall_deadline = started_at + OVERALL_BUDGET_S
+
+    tasks = [
+        asyncio.create_task(
+            _run_engine_async(engine_config, search_query, max_results, position * ENGINE_HEDGE_DELAY_S)
+        )
+        for position, engine_config in enumerate(SEARCH_ENGINES)
+    ]
+    deadlines = [
+        min(started_at + position * ENGINE_HEDGE_DELAY_S + ENGINE_BUDGET_S, overall_deadline)
+        for position in range(len(tasks))
+    ]
+    pending = set(tasks)
+
+    try:
+        while True:
+            now = loop.time()
+            for position, task in enumerate(tasks):
+                if task.done():
+                    # Cancelled tasks ran out of budget
+                    result = None if task.cancelled() else task.result()
+                    if result:
+                        return result
+                    continue
+                if now >= deadlines[position]:
+                    # Over budget: stop its requests and move on to the next engine
+                    task.cancel()
+                    pending.discard(task)
+                    continue
+                break
+            else:
+                return None
+
+            if now >= overall_deadline or not pending:
+                return None
+
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=max(0.0, deadlines[position] - now),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            pending -= done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 def _has_valid_thumbnail(enrichment: Dict[str, Any]) -> bool:
     """
     Check if enrichment data has a valid image_url string.
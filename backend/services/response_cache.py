@@ -0,0 +1,169 @@
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from data.cache.memory_lru_cache import MemoryLRUCache
+
+# Words that don't change what a short product query is asking for
+_STOPWORDS = {"a", "an", "the", "for", "with", "of", "to", "in", "on", "my", "me", "i", "and", "that", "is"}
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical cache key for a query: lower-cased alphanumeric tokens without
+    stopwords, sorted, so "moisturizer for dry skin" == "Dry skin moisturizer".
+    """
+    tokens = _TOKEN_RE.findall((query or "").lower())
+    meaningful = [t for t in tokens if t not in _STOPWORDS] or tokens
+    return " ".join(sorted(meaningful))
+
+
+class ResponseCache:
+    """Cache of full recommendation responses.
+
+    Exact tier: keyed by normalize_query(query), bounded LRU with TTL.
+    Semantic tier (semantic_threshold > 0): a miss is answered by the cached
+    response whose query embedding has the highest cosine similarity, if it
+    is at least semantic_threshold.
+
+    Entries remember which product ids they contain so they can be dropped
+    when those products' enrichment changes; clear() drops everything (e.g.
+    after the vector index changes).
+
+    `scope` separates otherwise identical queries whose answers differ, such
+    as the same query with different brand / product type filters; lookups
+    (exact and semantic) only match entries of the same scope.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_s: Optional[float] = 900,
+        semantic_threshold: float = 0.0,
+    ):
+        self.semantic_threshold = semantic_threshold
+        # key -> (response, unit embedding or None, product ids, scope)
+        self._entries = MemoryLRUCache(max_entries=max_entries, ttl_s=ttl_s)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._matrix_generation = -1
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._matrix_scopes: List[str] = []
+
+        self.semantic_hits = 0
+        self.invalidations = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_threshold > 0
+
+    def get(self, query: str, scope: str = "") -> Optional[Dict[str, Any]]:
+        """Exact (normalized) lookup."""
+        entry = self._entries.get(_cache_key(query, scope))
+        if entry is None:
+            return None
+        return {**entry[0], "query": query}
+
+    def get_similar(
+        self,
+        query: str,
+        embedding: Sequence[float],
+        scope: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        """Semantic lookup: nearest cached query embedding above the threshold."""
+        if not self.semantic_enabled:
+            return None
+
+        matrix, keys, scopes = self._semantic_matrix()
+        if matrix is None:
+            return None
+
+        vector = _unit(embedding)
+        scores = np.where(scopes == scope, matrix @ vector, -np.inf)
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+
+        entry = self._entries.get(keys[best])
+        if entry is None:
+            # Expired since the matrix was built
+            return None
+        with self._lock:
+            self.semantic_hits += 1
+        return {**entry[0], "query": query}
+
+    def put(
+        self,
+        query: str,
+        response: Dict[str, Any],
+        embedding: Optional[Sequence[float]] = None,
+        scope: str = "",
+    ) -> None:
+        product_ids = frozenset(
+            str(p.get("id")) for p in response.get("products", []) if p.get("id")
+        )
+        vector = _unit(embedding) if embedding is not None and self.semantic_enabled else None
+        self._entries.set(_cache_key(query, scope), (response, vector, product_ids, scope))
+        with self._lock:
+            self._generation += 1
+
+    def invalidate_products(self, product_ids: Iterable[str]) -> int:
+        """Drop every cached response that contains one of product_ids."""
+        ids = {str(pid) for pid in product_ids}
+        if not ids:
+            return 0
+        removed = self._entries.remove_where(lambda _key, entry: not ids.isdisjoint(entry[2]))
+        if removed:
+            with self._lock:
+                self._generation += 1
+                self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        self._entries.clear()
+        with self._lock:
+            self._generation += 1
+
+    def _semantic_matrix(self):
+        """Stacked unit embeddings of cached queries, rebuilt only after changes."""
+        with self._lock:
+            if self._matrix_generation == self._generation:
+                return self._matrix, self._matrix_keys, self._matrix_scopes
+            generation = self._generation
+
+        keys: List[str] = []
+        scopes: List[str] = []
+        vectors: List[np.ndarray] = []
+        for key, (_, vector, _, scope) in self._entries.items():
+            if vector is not None:
+                keys.append(key)
+                scopes.append(scope)
+                vectors.append(vector)
+        matrix = np.vstack(vectors) if vectors else None
+        scope_array = np.array(scopes, dtype=object)
+
+        with self._lock:
+            self._matrix, self._matrix_keys, self._matrix_scopes = matrix, keys, scope_array
+            self._matrix_generation = generation
+        return matrix, keys, scope_array
+
+    def stats(self) -> Dict[str, int]:
+        stats = self._entries.stats()
+        with self._lock:
+            stats["semantic_hits"] = self.semantic_hits
+            stats["invalidations"] = self.invalidations
+        return stats
+
+
+def _cache_key(query: str, scope: str) -> str:
+    return f"{scope}|{normalize_query(query)}" if scope else normalize_query(query)
+
+
+def _unit(embedding: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
@@ -0,0 +1,77 @@
+import secrets
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from data.cache.memory_lru_cache import MemoryLRUCache
+
+
+class ResultCursors:
+    """Ranked result ids kept server-side so later pages need no new search.
+
+    open() stores a query's full ranking under a random token and returns a
+    cursor ("<token>.<offset>") for the results after the first page; each
+    page() returns that page's ids and the cursor for the page after it.
+    Rankings are bounded LRU entries with a TTL: an expired or evicted
+    cursor resolves to None, and the client has to search again.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_s: Optional[float] = 1800):
+        # token -> (query, ranked docstore ids)
+        self._entries = MemoryLRUCache(max_entries=max_entries, ttl_s=ttl_s)
+
+    def open(self, query: str, ids: Sequence[str], page_size: int) -> Optional[str]:
+        """Cursor for the results after the first page_size (None if there are none)."""
+        if len(ids) <= page_size:
+            return None
+        token = secrets.token_urlsafe(12)
+        self._entries.set(token, (query, tuple(ids)))
+        return _cursor(token, page_size)
+
+    def resume(self, cursor: Optional[str], query: str, ids: Sequence[str], page_size: int) -> Optional[str]:
+        """First-page cursor for a ranking that was opened before (e.g. stored with a cached response).
+
+        If the ranking has expired or been evicted it is saved again under
+        the same token, so the stored cursor keeps working.
+        """
+        if not cursor:
+            return self.open(query, ids, page_size)
+        token = cursor.rpartition(".")[0]
+        if self._entries.get(token) is None:
+            self._entries.set(token, (query, tuple(ids)))
+        return cursor
+
+    def page(
+        self,
+        cursor: str,
+        page_size: int,
+    ) -> Optional[Tuple[str, List[str], Optional[str], List[str]]]:
+        """Resolve a cursor.
+
+        Returns:
+            (query, ids on this page, cursor for the next page or None, ids on
+            the next page) or None if the cursor has expired
+
+        Raises:
+            ValueError: cursor is malformed
+        """
+        token, _, offset = cursor.rpartition(".")
+        if not token or not offset.isdigit():
+            raise ValueError(f"Malformed cursor: {cursor!r}")
+        offset = int(offset)
+
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        query, ids = entry
+        end = offset + page_size
+        next_cursor = _cursor(token, end) if end < len(ids) else None
+        return query, list(ids[offset:end]), next_cursor, list(ids[end:end + page_size])
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._entries.stats()
+
+
+def _cursor(token: str, offset: int) -> str:
+    return f"{token}.{offset}"
@@ -1,16 +1,369 @@
-def retrieve_top_products(vector_store, query: str,limit: int = 5):
+import os
+import threading
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from services.metadata_filter import MetadataIndex, filtered_search
+
+# "hybrid" fuses BM25 and vector rankings; "vector" is similarity search only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+# Reciprocal rank fusion: weight of each ranking, and the rank-damping constant
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# Candidates taken from each ranking before fusing
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+
+# Over-fetch, drop weak matches and collapse near-duplicates before enrichment
+RETRIEVAL_REFINE = os.getenv("RETRIEVAL_REFINE", "1").lower() in ("1", "true", "yes")
+# Candidates fetched per result slot
+RETRIEVAL_OVERFETCH = int(os.getenv("RETRIEVAL_OVERFETCH", "4"))
+# Cosine similarity to the query below which a hit is dropped (keyword matches are exempt)
+RETRIEVAL_MIN_SIMILARITY = float(os.getenv("RETRIEVAL_MIN_SIMILARITY", "0.2"))
+# Hits at least this similar to a better-ranked hit are treated as variants of it (shades, sizes)
+RETRIEVAL_DUPLICATE_SIMILARITY = float(os.getenv("RETRIEVAL_DUPLICATE_SIMILARITY", "0.97"))
+# Maximal marginal relevance trade-off: 1 keeps rank order, lower favours diverse results
+RETRIEVAL_MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "1.0"))
+
+_stats_lock = threading.Lock()
+_refine_stats = {
+    "requests": 0,
+    "candidates": 0,
+    "below_threshold": 0,
+    "duplicates": 0,
+    "returned": 0,
+}
+
+
+def get_retrieval_stats() -> Dict[str, Any]:
+    """Counters for candidate refinement (hits removed before they reach enrichment)."""
+    with _stats_lock:
+        stats = dict(_refine_stats)
+    stats["returned_per_request"] = round(stats["returned"] / stats["requests"], 2) if stats["requests"] else 0.0
+    return stats
+
+
+def refine_candidates(
+    index,
+    query_embedding,
+    rows: Sequence[int],
+    limit: int,
+    keep: Sequence[int] = (),
+    record_stats: bool = True,
+) -> np.ndarray:
+    """Drop weak matches and near-duplicates from ranked candidate rows.
+
+    Args:
+        index: FAISS index the rows belong to (vectors are read back from it)
+        query_embedding: Query vector
+        rows: Candidate index rows, best first
+        limit: Maximum number of rows to return
+        keep: Rows exempt from the similarity threshold (e.g. strong keyword matches)
+        record_stats: Count this call in get_retrieval_stats (off for extra
+            passes of a request that was already counted)
+
+    Returns:
+        Up to limit rows, in rank order (or MMR order if RETRIEVAL_MMR_LAMBDA < 1)
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0:
+        return rows
+
+    def unit(matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1)
+
+    vectors = unit(index.reconstruct_batch(rows))
+    similarity = vectors @ unit(np.asarray(query_embedding, dtype=np.float32).ravel())
+
+    relevant = (similarity >= RETRIEVAL_MIN_SIMILARITY) | np.isin(rows, np.asarray(keep, dtype=np.int64))
+    below_threshold = int((~relevant).sum())
+    rows, vectors, similarity = rows[relevant], vectors[relevant], similarity[relevant]
+
+    # All pairwise cosines at once; candidate lists are small (limit * RETRIEVAL_OVERFETCH)
+    pairwise = vectors @ vectors.T
+    available = np.ones(len(rows), dtype=bool)
+    redundancy = np.zeros(len(rows), dtype=np.float32)
+    selected = []
+    duplicates = 0
+    while len(selected) < limit and available.any():
+        if RETRIEVAL_MMR_LAMBDA >= 1:
+            pick = int(np.argmax(available))
+        else:
+            score = RETRIEVAL_MMR_LAMBDA * similarity - (1 - RETRIEVAL_MMR_LAMBDA) * redundancy
+            pick = int(np.argmax(np.where(available, score, -np.inf)))
+        selected.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, pairwise[pick])
+        variants = available & (pairwise[pick] >= RETRIEVAL_DUPLICATE_SIMILARITY)
+        duplicates += int(variants.sum())
+        available &= ~variants
+
+    if not record_stats:
+        return rows[selected]
+    with _stats_lock:
+        _refine_stats["requests"] += 1
+        _refine_stats["candidates"] += len(relevant)
+        _refine_stats["below_threshold"] += below_threshold
+        _refine_stats["duplicates"] += duplicates
+        _refine_stats["returned"] += len(selected)
+    return rows[selected]
+
+
+def embed_queries(embeddings, queries: Sequence[str]) -> List[List[float]]:
+    """Embed many queries in one model call (through the query-embedding cache if there is one)."""
+    batched = getattr(embeddings, "embed_queries", None)
+    if batched is not None:
+        return batched(list(queries))
+    # Queries and documents share one encoder for sentence-transformers models
+    return embeddings.embed_documents(list(queries))
+
+
+def _vector_rows(vector_store, query_embedding, k: int, mask=None) -> np.ndarray:
+    """Index rows of the k nearest vectors (restricted to mask if given)."""
+    if mask is not None:
+        _, rows = filtered_search(vector_store.index, query_embedding, k, mask)
+        return rows
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+    _, rows = vector_store.index.search(query, k)
+    return rows[0][rows[0] >= 0]
+
+
+def _documents(vector_store, rows):
+    return [vector_store.docstore.search(vector_store.index_to_docstore_id[int(row)]) for row in rows]
+
+
+def retrieve_top_products(
+    vector_store,
+    query: str,
+    limit: int = 5,
+    query_embedding=None,
+    filters=None,
+    metadata_index=None,
+    lexical_index=None,
+    mode: str = RETRIEVAL_MODE,
+    refine: bool = RETRIEVAL_REFINE,
+    record_stats: bool = True,
+):
     """
     Retrieve the top-matching product documents from the vector store
-    based on semantic similarity to the user's query.
+    based on semantic similarity to the user's query, fused with BM25
+    keyword matches in hybrid mode.
 
     Args:
         vector_store: Initialized vector store instance (e.g., FAISS, Chroma).
         query (str): User's natural-language search query.
         limit (int): Maximum number of results to return.
+        query_embedding: Precomputed embedding of the query (skips re-embedding).
+        filters (dict): Optional {"brand": [...], "product_type": [...]} restriction,
+            applied inside the index search.
+        metadata_index: MetadataIndex for vector_store (rebuilt if it doesn't match).
+        lexical_index: LexicalIndex for vector_store (rebuilt if it doesn't match).
+        mode (str): "hybrid" or "vector" (see RETRIEVAL_MODE).
+        refine (bool): Over-fetch, then drop weak matches and near-duplicates
+            (see refine_candidates); may return fewer than limit results.
+        record_stats (bool): Count the refinement in get_retrieval_stats.
 
     Returns:
         list: A list of Document objects ranked by similarity.
     """
-    # Run semantic similarity search against the vector store
-    top_results = vector_store.similarity_search(query, k=limit)
-    return top_results
+    if filters and (metadata_index is None or not metadata_index.covers(vector_store)):
+        # Missing, or built for a store that has since been swapped out
+        metadata_index = MetadataIndex.from_vector_store(vector_store)
+    mask = metadata_index.mask(filters) if filters else None
+
+    if mode != "hybrid" and mask is None and not refine:
+        # Reuse the query vector if the caller already embedded it
+        if query_embedding is not None:
+            return vector_store.similarity_search_by_vector(query_embedding, k=limit)
+
+        # Run semantic similarity search against the vector store
+        top_results = vector_store.similarity_search(query, k=limit)
+        return top_results
+
+    if mode == "hybrid" and (lexical_index is None or not lexical_index.covers(vector_store)):
+        lexical_index = LexicalIndex.from_vector_store(vector_store)
+    if query_embedding is None:
+        query_embedding = vector_store.embeddings.embed_query(query)
+    vector_k = _vector_depth(limit, mode, refine)
+    vector_rows = _vector_rows(vector_store, query_embedding, vector_k, mask)
+    rows = _rank_rows(
+        vector_store, query, query_embedding, vector_rows, limit, mask, lexical_index, mode, refine, record_stats
+    )
+    return _documents(vector_store, rows)
+
+
+def retrieve_top_products_batch(
+    vector_store,
+    queries: Sequence[str],
+    limit: int = 5,
+    query_embeddings=None,
+    filters=None,
+    metadata_index=None,
+    lexical_index=None,
+    mode: str = RETRIEVAL_MODE,
+    refine: bool = RETRIEVAL_REFINE,
+    record_stats: bool = True,
+) -> List[List[Any]]:
+    """
+    retrieve_top_products for many queries at once: one batched embedding
+    call and one multi-query index search (per-query searches only when
+    filtering).
+
+    Args:
+        vector_store: Initialized FAISS vector store.
+        queries: User queries.
+        limit (int): Maximum number of results per query.
+        query_embeddings: Precomputed query embeddings, one per query.
+        filters, metadata_index, lexical_index, mode, refine, record_stats: As
+            for retrieve_top_products, applied to every query.
+
+    Returns:
+        list: One list of Document objects per query, in query order.
+    """
+    if not queries:
+        return []
+    if filters and (metadata_index is None or not metadata_index.covers(vector_store)):
+        metadata_index = MetadataIndex.from_vector_store(vector_store)
+    mask = metadata_index.mask(filters) if filters else None
+    if mode == "hybrid" and (lexical_index is None or not lexical_index.covers(vector_store)):
+        lexical_index = LexicalIndex.from_vector_store(vector_store)
+
+    if query_embeddings is None:
+        query_embeddings = embed_queries(vector_store.embeddings, queries)
+    matrix = np.asarray(query_embeddings, dtype=np.float32).reshape(len(queries), -1)
+
+    vector_k = _vector_depth(limit, mode, refine)
+    if mask is None:
+        _, found = vector_store.index.search(matrix, vector_k)
+        vector_rows = [ids[ids >= 0] for ids in found]
+    else:
+        vector_rows = [_vector_rows(vector_store, vector, vector_k, mask) for vector in matrix]
+
+    return [
+        _documents(
+            vector_store,
+            _rank_rows(vector_store, query, vector, rows, limit, mask, lexical_index, mode, refine, record_stats),
+        )
+        for query, vector, rows in zip(queries, matrix, vector_rows)
+    ]
+
+
+def retrieve_ranked_products(
+    vector_store,
+    query: str,
+    page_size: int = 5,
+    max_results: int = 50,
+    query_embedding=None,
+    **kwargs,
+):
+    """
+    Ranking for paginated results: the first page_size documents are
+    exactly retrieve_top_products(limit=page_size), so adding pages never
+    reorders the first one. The rest come from a deeper search
+    (limit=max_results), minus documents already on the first page.
+    Refinement stats count the request once (the first page pass).
+
+    Args:
+        vector_store: Initialized FAISS vector store.
+        query (str): User's natural-language search query.
+        page_size (int): Results on the first page.
+        max_results (int): Maximum number of results across all pages.
+        query_embedding: Precomputed embedding of the query.
+        **kwargs: filters, metadata_index, lexical_index, mode, refine (see
+            retrieve_top_products).
+
+    Returns:
+        list: Up to max_results Document objects, best first.
+    """
+    if query_embedding is None:
+        query_embedding = vector_store.embeddings.embed_query(query)
+    first_page = retrieve_top_products(vector_store, query, page_size, query_embedding, **kwargs)
+    if max_results <= page_size:
+        return first_page
+    # Already counted by the first page pass
+    deeper = retrieve_top_products(
+        vector_store, query, max_results, query_embedding, record_stats=False, **kwargs
+    )
+    return _extend_ranking(first_page, deeper, max_results)
+
+
+def retrieve_ranked_products_batch(
+    vector_store,
+    queries: Sequence[str],
+    page_size: int = 5,
+    max_results: int = 50,
+    query_embeddings=None,
+    **kwargs,
+) -> List[List[Any]]:
+    """retrieve_ranked_products for many queries (two multi-query searches in all)."""
+    if query_embeddings is None and queries:
+        query_embeddings = embed_queries(vector_store.embeddings, queries)
+    first_pages = retrieve_top_products_batch(vector_store, queries, page_size, query_embeddings, **kwargs)
+    if max_results <= page_size:
+        return first_pages
+    deeper = retrieve_top_products_batch(
+        vector_store, queries, max_results, query_embeddings, record_stats=False, **kwargs
+    )
+    return [_extend_ranking(first, rest, max_results) for first, rest in zip(first_pages, deeper)]
+
+
+def _extend_ranking(first_page: List[Any], deeper: List[Any], max_results: int) -> List[Any]:
+    shown = {document.id for document in first_page}
+    return (first_page + [document for document in deeper if document.id not in shown])[:max_results]
+
+
+def documents_by_id(vector_store, ids: Sequence[str]) -> List[Any]:
+    """Documents for docstore ids, skipping any no longer in the store (e.g. removed by an index sync)."""
+    found = (vector_store.docstore.search(doc_id) for doc_id in ids)
+    return [document for document in found if not isinstance(document, str)]
+
+
+def _vector_depth(limit: int, mode: str, refine: bool) -> int:
+    """Nearest neighbours to fetch per query."""
+    # Extra candidates make up for the ones refinement removes
+    depth = limit * max(1, RETRIEVAL_OVERFETCH) if refine else limit
+    return max(depth, HYBRID_CANDIDATES) if mode == "hybrid" else depth
+
+
+def _rank_rows(
+    vector_store,
+    query: str,
+    query_embedding,
+    vector_rows: np.ndarray,
+    limit: int,
+    mask,
+    lexical_index,
+    mode: str,
+    refine: bool,
+    record_stats: bool = True,
+) -> np.ndarray:
+    """Final result rows for one query from its nearest-neighbour rows (fusion, refinement)."""
+    depth = limit * max(1, RETRIEVAL_OVERFETCH) if refine else limit
+
+    keyword_matches = []
+    if mode == "hybrid":
+        # Exact brand / product names rank high lexically even when MiniLM misses them
+        _, lexical_rows = lexical_index.search(query, _vector_depth(limit, mode, refine), mask)
+        rows = reciprocal_rank_fusion(
+            [vector_rows, lexical_rows],
+            [HYBRID_VECTOR_WEIGHT, HYBRID_LEXICAL_WEIGHT],
+            k=HYBRID_RRF_K,
+        )[:depth]
+        keyword_matches = lexical_rows[:limit]
+    else:
+        # With a mask, only matching products compete for the slots
+        rows = vector_rows[:depth]
+
+    if refine:
+        rows = refine_candidates(
+            vector_store.index,
+            query_embedding,
+            rows,
+            limit,
+            keep=keyword_matches,
+            record_stats=record_stats,
+        )
+    return np.asarray(rows, dtype=np.int64)[:limit]
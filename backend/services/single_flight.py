@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "finished_at", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished_at = 0.0
+        # (loop, future) pairs of coroutines waiting on this call
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def outcome(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    @property
+    def cancelled(self) -> bool:
+        # The leader's request went away; followers still want the result
+        return isinstance(self.error, asyncio.CancelledError)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight block and receive the same result (or exception). A finished
+    result lingers for linger_s so callers racing with the leader's cache
+    write still reuse it instead of starting a duplicate call.
+
+    do_async coalesces coroutine functions the same way (sync and async
+    callers of one key share a call). If the leader is cancelled, a waiting
+    caller takes over instead of failing with it.
+    """
+
+    def __init__(self, linger_s: float = 0.0):
+        self.linger_s = linger_s
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        while True:
+            call, leader = self._join(key)
+
+            if not leader:
+                call.done.wait()
+                if call.cancelled:
+                    continue
+                return call.outcome()
+
+            try:
+                call.result = fn(*args, **kwargs)
+                return call.result
+            except BaseException as error:
+                call.error = error
+                raise
+            finally:
+                self._finish(key, call)
+
+    async def do_async(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        while True:
+            call, leader = self._join(key)
+
+            if not leader:
+                await self._wait_async(call)
+                if call.cancelled:
+                    continue
+                return call.outcome()
+
+            try:
+                call.result = await fn(*args, **kwargs)
+                return call.result
+            except BaseException as error:
+                call.error = error
+                raise
+            finally:
+                self._finish(key, call)
+
+    async def _wait_async(self, call: _Call) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._lock:
+            if call.done.is_set():
+                return
+            call.waiters.append((loop, waiter))
+        await waiter
+
+    def _finish(self, key: Hashable, call: _Call) -> None:
+        call.finished_at = time.monotonic()
+        with self._lock:
+            # Failures are never reused; successes linger briefly
+            if call.error is not None or self.linger_s <= 0:
+                self._calls.pop(key, None)
+            call.done.set()
+            waiters, call.waiters = call.waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # That caller's event loop has already closed
+                pass
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            now = time.monotonic()
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and now - call.finished_at > self.linger_s:
+                del self._calls[key]
+                call = None
+
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+
+            if len(self._calls) > 1024:
+                self._drop_expired(now)
+            call = _Call()
+            self._calls[key] = call
+            self.executed += 1
+            return call, True
+
+    def _drop_expired(self, now: float) -> None:
+        expired = [
+            key for key, call in self._calls.items()
+            if call.done.is_set() and now - call.finished_at > self.linger_s
+        ]
+        for key in expired:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": sum(1 for call in self._calls.values() if not call.done.is_set()),
+            }
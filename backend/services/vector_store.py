@@ -1,7 +1,32 @@
 import os
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from pathlib import Path
 from langchain_community.vectorstores import FAISS
-from services.csv_loader import get_documents
+from services.ann_index import config_mismatch, index_config_from_env, load_index_config
+from services.columnar_store import has_columnar_store, load_index
+from services.embedding_cache import CachedQueryEmbeddings
+from services.embedding_backends import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    check_index_parity,
+    create_embeddings,
+)
+from services.index_builder import build_index
+from services.index_manifest import load_manifest, recover_index_dir, save_index, sync_index
+
+# Verify a loaded index matches the configured embedding backend; rebuild it if not
+EMBEDDING_PARITY_CHECK = os.getenv("EMBEDDING_PARITY_CHECK", "1").lower() in ("1", "true", "yes")
+EMBEDDING_PARITY_THRESHOLD = float(os.getenv("EMBEDDING_PARITY_THRESHOLD", "0.98"))
+
+# Apply CSV changes to a saved index on startup (only changed products are re-embedded)
+INDEX_SYNC_ON_STARTUP = os.getenv("INDEX_SYNC_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+
+# Query-embedding LRU in front of the model (0 disables); persisted across restarts
+QUERY_EMBEDDING_CACHE_ENTRIES = int(os.getenv("QUERY_EMBEDDING_CACHE_ENTRIES", "4096"))
+QUERY_EMBEDDING_CACHE_NORMALIZE = os.getenv("QUERY_EMBEDDING_CACHE_NORMALIZE", "lower")
+QUERY_EMBEDDING_CACHE_PATH = os.getenv(
+    "QUERY_EMBEDDING_CACHE_PATH",
+    str(Path(__file__).resolve().parents[1] / "data" / "cache" / "query_embeddings.npz"),
+)
 
 
 def get_vector_store(
@@ -19,33 +44,60 @@ def get_vector_store(
     Returns:
         Initialized FAISS vector store ready for similarity search
     """
-    # Initialize embedding model
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
+    # Initialize embedding model (EMBEDDING_BACKEND: torch / onnx / onnx-int8)
+    embeddings = create_embeddings()
+
+    # Cache query vectors so repeated queries skip model inference
+    if QUERY_EMBEDDING_CACHE_ENTRIES > 0:
+        embeddings = CachedQueryEmbeddings(
+            embeddings,
+            max_entries=QUERY_EMBEDDING_CACHE_ENTRIES,
+            normalize=QUERY_EMBEDDING_CACHE_NORMALIZE,
+            namespace=f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}",
+            persist_path=QUERY_EMBEDDING_CACHE_PATH or None,
+        )
     
     # Load existing index unless rebuild is requested
+    recover_index_dir(faiss_dir)
     index_exists = os.path.exists(faiss_dir)
+    # FAISS_INDEX_TYPE and build parameters are baked into a saved index; its recorded
+    # config tells whether they still match without loading it
+    saved_config = load_index_config(faiss_dir) if index_exists and not rebuild_index else None
+    if saved_config is not None:
+        mismatch = config_mismatch(saved_config, index_config_from_env())
+        if mismatch:
+            print(f"Saved index doesn't match FAISS settings ({mismatch}); rebuilding")
+            index_exists = False
+
     if index_exists and not rebuild_index:
-        print(f"Loading existing FAISS index from: {faiss_dir}")
-        return FAISS.load_local(
-            folder_path=faiss_dir,
-            embeddings=embeddings,
-            allow_dangerous_deserialization=True,
-        )
-    
-    # Build new index from CSV data
-    documents = get_documents(csv_path)
-    print(f"Loaded {len(documents)} product documents")
-    
-    # Create and save vector store
-    vector_store = FAISS.from_documents(
-        documents=documents,
-        embedding=embeddings,
-    )
-    
-    os.makedirs(faiss_dir, exist_ok=True)
-    vector_store.save_local(folder_path=faiss_dir)
-    print(f"FAISS index saved to: {faiss_dir}")
+        described = f" ({saved_config['type']}, {saved_config['ntotal']} vectors)" if saved_config else ""
+        print(f"Loading existing FAISS index from: {faiss_dir}{described}")
+        vector_store = load_index(faiss_dir, embeddings)
+
+        # Indexes saved before index_config.json existed are checked after loading
+        mismatch = config_mismatch(vector_store.index, index_config_from_env())
+        if mismatch:
+            print(f"Saved index doesn't match FAISS settings ({mismatch}); rebuilding")
+        # Query vectors must come from the same embedding space as the index
+        elif EMBEDDING_PARITY_CHECK and not check_index_parity(
+            vector_store, threshold=EMBEDDING_PARITY_THRESHOLD
+        ):
+            print(f"Index was built with a different embedder than {EMBEDDING_BACKEND!r}; rebuilding")
+        elif not INDEX_SYNC_ON_STARTUP:
+            return vector_store
+        else:
+            # Detect a CSV edited since the index was saved and apply just the differences
+            try:
+                sync_index(vector_store, csv_path, faiss_dir)
+            except ValueError as error:
+                print(f"Cannot update index incrementally ({error}); rebuilding")
+            else:
+                if not has_columnar_store(faiss_dir):
+                    # One-time conversion of an index saved with the pickled docstore
+                    print(f"Converting FAISS index to the columnar format: {faiss_dir}")
+                    save_index(vector_store, faiss_dir, load_manifest(faiss_dir))
+                    vector_store = load_index(faiss_dir, embeddings)
+                return vector_store
     
-    return vector_store
\ No newline at end of file
+    # Build new index from CSV data (batched, optionally parallel; see INDEX_BUILD_* settings)
+    return build_index(csv_path, faiss_dir, embeddings=embeddings)
@@ -0,0 +1,56 @@
+import hashlib
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# Tests import services.* the way the app does when run from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from the text, so tests need no model."""
+
+    def __init__(self, dim: int = 16):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+@pytest.fixture
+def embeddings() -> HashEmbeddings:
+    return HashEmbeddings()
+
+
+def product_rows(count: int) -> List[Dict[str, str]]:
+    """CSV rows in the beautyProducts.csv layout."""
+    brands = ["Maybelline", "NYX", "Milani", "e.l.f."]
+    types = ["Lipstick", "Mascara", "Foundation"]
+    return [
+        {
+            "ID": str(i + 1),
+            "Brand": brands[i % len(brands)],
+            "Name": f"Product {i + 1}",
+            "Product": types[i % len(types)],
+            "Description": f"Description of product {i + 1}",
+        }
+        for i in range(count)
+    ]
+
+
+def write_csv(path: Path, rows: List[Dict[str, str]]) -> str:
+    pd.DataFrame(rows, columns=["ID", "Brand", "Name", "Product", "Description"]).to_csv(path, index=False)
+    return str(path)
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+import api.main as main
+from services.result_cursors import ResultCursors
+
+
+class _FakeRequest:
+    """Stands in for a Starlette Request; reports a disconnect after disconnect_after checks."""
+
+    def __init__(self, disconnect_after: int):
+        self.disconnect_after = disconnect_after
+        self.checks = 0
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.checks > self.disconnect_after
+
+
+@pytest.fixture(autouse=True)
+def fast_disconnect_poll(monkeypatch):
+    monkeypatch.setattr(main, "CLIENT_DISCONNECT_POLL_S", 0.01)
+
+
+def test_run_until_disconnect_cancels_on_disconnect():
+    cancelled = []
+
+    async def pipeline():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "finished"
+
+    request = _FakeRequest(disconnect_after=2)
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        result = await main._run_until_disconnect(request, pipeline())
+        # Let the cancellation reach the coroutine
+        await asyncio.sleep(0)
+        return result, asyncio.get_running_loop().time() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result is None
+    assert cancelled == [True]
+    assert request.checks == 3
+    assert elapsed < 1
+
+
+def test_run_until_disconnect_returns_result():
+    async def pipeline():
+        await asyncio.sleep(0.03)
+        return {"products": []}
+
+    request = _FakeRequest(disconnect_after=1000)
+    assert asyncio.run(main._run_until_disconnect(request, pipeline())) == {"products": []}
+
+
+def test_run_until_disconnect_propagates_errors():
+    async def pipeline():
+        raise ValueError("retrieval failed")
+
+    with pytest.raises(ValueError):
+        asyncio.run(main._run_until_disconnect(_FakeRequest(disconnect_after=1000), pipeline()))
+
+
+def test_cached_response_gets_a_live_cursor(monkeypatch):
+    cursors = ResultCursors(max_entries=1)
+    monkeypatch.setattr(main.app.state, "result_cursors", cursors, raising=False)
+    ranking = [str(i) for i in range(12)]
+    cursor = cursors.open("lipstick", ranking, main.RECOMMENDATION_PAGE_SIZE)
+    entry = main._cache_entry({"query": "lipstick", "products": [], "next_cursor": cursor}, ranking)
+
+    # The cursor is evicted while the response stays cached
+    cursors.open("mascara", ranking, main.RECOMMENDATION_PAGE_SIZE)
+    assert cursors.page(cursor, main.RECOMMENDATION_PAGE_SIZE) is None
+
+    response = main._with_live_cursor("lipstick", dict(entry))
+
+    assert "ranking" not in response
+    assert response["next_cursor"] == cursor
+    query, ids, next_cursor, _ = cursors.page(response["next_cursor"], main.RECOMMENDATION_PAGE_SIZE)
+    assert (query, ids) == ("lipstick", ranking[5:10])
+    assert next_cursor is not None
+
+
+def test_cached_response_without_more_results_has_no_cursor(monkeypatch):
+    monkeypatch.setattr(main.app.state, "result_cursors", ResultCursors(), raising=False)
+    entry = main._cache_entry({"query": "lipstick", "products": [], "next_cursor": None}, ["1", "2"])
+
+    assert main._with_live_cursor("lipstick", dict(entry))["next_cursor"] is None
@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import services.catalog_enrichment as catalog_enrichment
+from conftest import product_rows, write_csv
+from data.cache.sqlite_enrichment_cache import SQLiteEnrichmentCache
+
+ENRICHED = {"price": "$9.99", "product_url": "https://shop.example.com/p"}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SQLiteEnrichmentCache(db_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(catalog_enrichment, "get_enrichment_cache", lambda: cache)
+    return cache
+
+
+def _enrich_failing(failing_ids):
+    """enrich_product stand-in: upstream errors come back as enrichment None, like the real one."""
+
+    def enrich(product_id, metadata):
+        enrichment = None if product_id in failing_ids else dict(ENRICHED)
+        return {"id": product_id, "name": metadata["name"], "enrichment": enrichment}
+
+    return enrich
+
+
+def _run(tmp_path, **kwargs):
+    return catalog_enrichment.enrich_catalog(
+        csv_path=write_csv(tmp_path / "products.csv", product_rows(4)),
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+        rate_per_s=0,
+        workers=2,
+        **kwargs,
+    )
+
+
+def test_failed_lookups_are_not_completed_and_keep_stale_data(tmp_path, cache, monkeypatch):
+    expired = datetime.now(timezone.utc) - timedelta(days=380)
+    stale = {"id": "1", "name": "Product 1", "enrichment": {"price": "$5.00"}}
+    cache.set("1", stale, retrieved_at=expired)
+    monkeypatch.setattr(catalog_enrichment, "enrich_product", _enrich_failing({"1", "2"}))
+
+    summary = _run(tmp_path)
+
+    assert summary["enriched"] == 2
+    assert summary["failed"] == 2
+    assert summary["remaining"] == 0
+    checkpoint = json.loads((tmp_path / "checkpoint.json").read_text())
+    assert checkpoint["completed"] == ["3", "4"]
+    # The stale entry keeps its data and age, so it is still flagged and retried
+    assert cache.lookup_many(["1"], max_age_days=365, stale_grace_days=60)["1"] == (stale, True)
+    # Without earlier data the miss is cached, as on the request path
+    assert cache.get("2")["enrichment"] is None
+    assert cache.get("3")["enrichment"] == ENRICHED
+
+
+def test_rerun_retries_failed_products(tmp_path, cache, monkeypatch):
+    cache.set("1", {"id": "1", "enrichment": {"price": "$5.00"}}, retrieved_at=datetime.now(timezone.utc) - timedelta(days=380))
+    monkeypatch.setattr(catalog_enrichment, "enrich_product", _enrich_failing({"1"}))
+    _run(tmp_path)
+
+    attempted = []
+
+    def enrich(product_id, metadata):
+        attempted.append(product_id)
+        return _enrich_failing(set())(product_id, metadata)
+
+    monkeypatch.setattr(catalog_enrichment, "enrich_product", enrich)
+    summary = _run(tmp_path)
+
+    assert attempted == ["1"]
+    assert summary["enriched"] == 1
+    assert cache.get("1")["enrichment"] == ENRICHED
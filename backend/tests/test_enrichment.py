@@ -0,0 +1,72 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import services.enrichment as enrichment
+from data.cache.sqlite_enrichment_cache import SQLiteEnrichmentCache
+
+STALE = {"id": "1", "name": "Product 1", "enrichment": {"price": "$5.00"}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SQLiteEnrichmentCache(db_dir=str(tmp_path), memory_max_entries=16)
+    cache.set("1", STALE, retrieved_at=datetime.now(timezone.utc) - timedelta(days=enrichment.ENRICHMENT_MAX_AGE_DAYS + 1))
+    return cache
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(enrichment, "_invalidation_listeners", [invalidated.extend])
+    return invalidated
+
+
+def _retrieved_at(cache: SQLiteEnrichmentCache, key: str) -> int:
+    with sqlite3.connect(cache.db_path) as conn:
+        return conn.execute("SELECT retrieved_at FROM enrichment_cache WHERE key = ?", (key,)).fetchone()[0]
+
+
+def _refresh(cache, monkeypatch, enrich):
+    monkeypatch.setattr(enrichment, "_enrich_product_once", enrich)
+    enrichment._refresh_product("1", {}, STALE, cache)
+
+
+def _failed_lookup(product_id, metadata):
+    return {"id": product_id, "name": "Product 1", "enrichment": None}
+
+
+def _upstream_error(product_id, metadata):
+    raise RuntimeError("upstream down")
+
+
+@pytest.mark.parametrize("enrich", [_failed_lookup, _upstream_error])
+def test_failed_refresh_keeps_data_and_retries_after_backoff(cache, invalidated, monkeypatch, enrich):
+    _refresh(cache, monkeypatch, enrich)
+
+    retry_at = time.time() + enrichment.ENRICHMENT_REFRESH_RETRY_S
+    expected = retry_at - enrichment.ENRICHMENT_MAX_AGE_DAYS * 86400
+    assert abs(_retrieved_at(cache, "1") - expected) < 5
+    assert invalidated == []
+
+    value, is_stale = cache.lookup_many(["1"], max_age_days=enrichment.ENRICHMENT_MAX_AGE_DAYS)["1"]
+    assert value == STALE
+    assert not is_stale
+    # Once the backoff has passed (here: a shorter max age) the entry is stale and refreshed again
+    backoff_days = (enrichment.ENRICHMENT_REFRESH_RETRY_S + 60) / 86400
+    _, is_stale = cache.lookup_many(
+        ["1"], max_age_days=enrichment.ENRICHMENT_MAX_AGE_DAYS - backoff_days, stale_grace_days=1
+    )["1"]
+    assert is_stale
+
+
+def test_successful_refresh_replaces_entry(cache, invalidated, monkeypatch):
+    refreshed = {"id": "1", "name": "Product 1", "enrichment": {"price": "$6.00"}}
+    _refresh(cache, monkeypatch, lambda product_id, metadata: refreshed)
+
+    assert cache.lookup_many(["1"], max_age_days=enrichment.ENRICHMENT_MAX_AGE_DAYS)["1"] == (refreshed, False)
+    assert abs(_retrieved_at(cache, "1") - time.time()) < 5
+    assert invalidated == ["1"]
+    assert enrichment.get_enrichment_stats()["stale_while_revalidate"]["refreshing"] == 0
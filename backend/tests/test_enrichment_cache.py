@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+import data.cache.sqlite_enrichment_cache as sqlite_enrichment_cache
+from data.cache.sqlite_enrichment_cache import SQLiteEnrichmentCache
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock(1_700_000_000)
+    monkeypatch.setattr(sqlite_enrichment_cache.time, "time", clock.time)
+    return clock
+
+
+def _disk_keys(cache: SQLiteEnrichmentCache):
+    with sqlite3.connect(cache.db_path) as conn:
+        return {key for (key,) in conn.execute("SELECT key FROM enrichment_cache")}
+
+
+def _last_access(cache: SQLiteEnrichmentCache, key: str) -> int:
+    with sqlite3.connect(cache.db_path) as conn:
+        return conn.execute("SELECT last_access FROM enrichment_cache WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_memory_hits_keep_entries_from_disk_eviction(tmp_path, clock):
+    cache = SQLiteEnrichmentCache(
+        db_dir=str(tmp_path),
+        max_rows=3,
+        access_resolution_s=60,
+        memory_max_entries=10,
+    )
+    for key in ("hot", "cold", "warm"):
+        cache.set(key, {"price": key})
+        clock.now += 1
+
+    # Served from the memory tier only
+    clock.now += 3600
+    assert cache.get("hot") == {"price": "hot"}
+    assert cache.stats()["memory"]["hits"] == 1
+    assert cache.stats()["disk"]["hits"] == 0
+
+    clock.now += 1
+    cache.set("new", {"price": "new"})
+
+    # The least recently used entry across both tiers is evicted, not the hottest
+    assert _disk_keys(cache) == {"hot", "warm", "new"}
+    cache.close()
+
+
+def test_memory_hits_touch_disk_at_most_once_per_resolution(tmp_path, clock):
+    cache = SQLiteEnrichmentCache(db_dir=str(tmp_path), access_resolution_s=60, memory_max_entries=10)
+    cache.set("key", {"price": "$5"})
+    written = _last_access(cache, "key")
+
+    clock.now += 30
+    cache.get("key")
+    assert _last_access(cache, "key") == written
+
+    clock.now += 31
+    cache.get("key")
+    assert _last_access(cache, "key") == written + 61
+
+    clock.now += 10
+    cache.get("key")
+    assert _last_access(cache, "key") == written + 61
+    cache.close()
+
+
+def test_disk_only_eviction_order(tmp_path, clock):
+    cache = SQLiteEnrichmentCache(db_dir=str(tmp_path), max_rows=2, access_resolution_s=60)
+    cache.set("a", {"v": 1})
+    clock.now += 1
+    cache.set("b", {"v": 2})
+
+    clock.now += 120
+    assert cache.get("a") == {"v": 1}
+    clock.now += 1
+    cache.set("c", {"v": 3})
+
+    assert _disk_keys(cache) == {"a", "c"}
+    cache.close()
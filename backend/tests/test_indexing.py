@@ -0,0 +1,142 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+import services.ann_index as ann_index
+import services.vector_store as vector_store_module
+from conftest import product_rows, write_csv
+from services.ann_index import describe_index, load_index_config
+from services.columnar_store import (
+    ColumnarDocstore,
+    has_columnar_store,
+    load_columnar,
+    load_index,
+    save_columnar,
+)
+from services.csv_loader import get_documents
+from services.index_builder import build_index
+from services.index_manifest import load_manifest, sync_index
+
+
+def _documents(vector_store):
+    """Product id -> Document for every index row."""
+    documents = {}
+    for row in range(vector_store.index.ntotal):
+        document = vector_store.docstore.search(vector_store.index_to_docstore_id[row])
+        documents[document.metadata["id"]] = document
+    return documents
+
+
+def test_columnar_round_trip(tmp_path, embeddings):
+    documents = get_documents(write_csv(tmp_path / "products.csv", product_rows(12)))
+    vector_store = FAISS.from_documents(documents, embeddings, ids=[d.metadata["id"] for d in documents])
+
+    save_columnar(vector_store, str(tmp_path / "index"))
+    loaded = load_columnar(str(tmp_path / "index"), embeddings)
+
+    assert isinstance(loaded.docstore, ColumnarDocstore)
+    assert loaded.index.ntotal == len(documents)
+    for document in documents:
+        restored = loaded.docstore.search(document.metadata["id"])
+        assert restored.metadata == document.metadata
+        assert restored.page_content == document.page_content
+        assert restored.id == document.metadata["id"]
+
+
+def test_columnar_round_trip_keeps_custom_page_content(tmp_path, embeddings):
+    documents = [
+        Document(page_content=f"free text {i}", metadata={"id": str(i), "brand": "NYX"})
+        for i in range(3)
+    ]
+    vector_store = FAISS.from_documents(documents, embeddings, ids=[d.metadata["id"] for d in documents])
+
+    save_columnar(vector_store, str(tmp_path / "index"))
+    loaded = load_columnar(str(tmp_path / "index"), embeddings)
+
+    for document in documents:
+        restored = loaded.docstore.search(document.metadata["id"])
+        assert restored.page_content == document.page_content
+        assert restored.metadata == document.metadata
+
+
+def test_sync_adds_edits_and_removes_on_memory_mapped_store(tmp_path, embeddings):
+    rows = product_rows(10)
+    csv_path = write_csv(tmp_path / "products.csv", rows)
+    faiss_dir = str(tmp_path / "index")
+    build_index(csv_path, faiss_dir, embeddings=embeddings)
+
+    vector_store = load_index(faiss_dir, embeddings)
+    assert isinstance(vector_store.docstore, ColumnarDocstore)
+
+    rows[2]["Description"] = "Reformulated"
+    del rows[5]
+    rows.append({"ID": "11", "Brand": "NYX", "Name": "New", "Product": "Lipstick", "Description": "Added"})
+    write_csv(tmp_path / "products.csv", rows)
+
+    summary = sync_index(vector_store, csv_path, faiss_dir)
+
+    assert summary == {"added": 1, "updated": 1, "removed": 1, "changed": True}
+    for synced in (vector_store, load_index(faiss_dir, embeddings)):
+        documents = _documents(synced)
+        assert synced.index.ntotal == len(rows)
+        assert set(documents) == {row["ID"] for row in rows}
+        assert documents["3"].metadata["description"] == "Reformulated"
+        assert documents["11"].metadata["name"] == "New"
+    # The edited product is found by its new text
+    reloaded = load_index(faiss_dir, embeddings)
+    new_text = _documents(reloaded)["3"].page_content
+    assert reloaded.similarity_search(new_text, k=1)[0].metadata["id"] == "3"
+    assert load_manifest(faiss_dir)["products"].keys() == {row["ID"] for row in rows}
+
+
+def test_sync_without_changes_leaves_index_alone(tmp_path, embeddings):
+    csv_path = write_csv(tmp_path / "products.csv", product_rows(6))
+    faiss_dir = str(tmp_path / "index")
+    build_index(csv_path, faiss_dir, embeddings=embeddings)
+
+    vector_store = load_index(faiss_dir, embeddings)
+    summary = sync_index(vector_store, csv_path, faiss_dir)
+
+    assert summary == {"added": 0, "updated": 0, "removed": 0, "changed": False}
+
+
+def test_pickled_index_is_converted_on_startup(tmp_path, embeddings, monkeypatch):
+    csv_path = write_csv(tmp_path / "products.csv", product_rows(8))
+    faiss_dir = tmp_path / "index"
+    documents = get_documents(csv_path)
+    FAISS.from_documents(documents, embeddings, ids=[d.metadata["id"] for d in documents]).save_local(str(faiss_dir))
+    assert not has_columnar_store(str(faiss_dir))
+
+    monkeypatch.setattr(vector_store_module, "create_embeddings", lambda: embeddings)
+    monkeypatch.setattr(vector_store_module, "QUERY_EMBEDDING_CACHE_ENTRIES", 0)
+    monkeypatch.setattr(vector_store_module, "EMBEDDING_PARITY_CHECK", False)
+    monkeypatch.setattr(vector_store_module, "INDEX_SYNC_ON_STARTUP", True)
+
+    vector_store = vector_store_module.get_vector_store(csv_path, str(faiss_dir))
+
+    assert has_columnar_store(str(faiss_dir))
+    assert not (faiss_dir / "index.pkl").exists()
+    assert isinstance(vector_store.docstore, ColumnarDocstore)
+    converted = _documents(vector_store)
+    for document in documents:
+        assert converted[document.metadata["id"]].metadata == document.metadata
+        assert converted[document.metadata["id"]].page_content == document.page_content
+
+
+def test_saved_config_mismatch_rebuilds_without_loading(tmp_path, embeddings, monkeypatch):
+    csv_path = write_csv(tmp_path / "products.csv", product_rows(60))
+    faiss_dir = str(tmp_path / "index")
+    build_index(csv_path, faiss_dir, embeddings=embeddings)
+    assert load_index_config(faiss_dir)["type"] == "flat"
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("a mismatched index should not be loaded")
+
+    monkeypatch.setattr(ann_index, "FAISS_INDEX_TYPE", "hnsw")
+    monkeypatch.setattr(vector_store_module, "load_index", fail_load)
+    monkeypatch.setattr(vector_store_module, "create_embeddings", lambda: embeddings)
+    monkeypatch.setattr(vector_store_module, "QUERY_EMBEDDING_CACHE_ENTRIES", 0)
+
+    vector_store = vector_store_module.get_vector_store(csv_path, faiss_dir)
+
+    assert describe_index(vector_store.index)["type"] == "hnsw"
+    assert load_index_config(faiss_dir)["type"] == "hnsw"
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import pytest
+import requests
+
+import services.http_client as http_client
+import services.product_api as product_api
+from data.cache.sqlite_image_cache import SQLiteImageCache
+from services.http_client import close_async_session
+
+PAGE_WITH_IMAGE = b'<html><head><meta property="og:image" content="https://cdn.example.com/p.jpg"></head></html>'
+PAGE_WITHOUT_IMAGE = b"<html><head><title>p</title></head><body></body></html>"
+
+# path -> (status, content type, body)
+ROUTES = {
+    "/page": (200, "text/html", PAGE_WITH_IMAGE),
+    "/no-image-page": (200, "text/html", PAGE_WITHOUT_IMAGE),
+    "/image.png": (200, "image/png", b"\x89PNG"),
+    "/not-an-image": (200, "text/html", PAGE_WITHOUT_IMAGE),
+    "/gone": (404, "text/html", b""),
+    "/throttled": (429, "text/html", b""),
+    "/unavailable": (503, "text/html", b""),
+    "/search.json": (200, "application/json", b'{"shopping_results": []}'),
+}
+
+
+@pytest.fixture(scope="module")
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, content_type, body = ROUTES[self.path.partition("?")[0]]
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def image_cache(tmp_path, monkeypatch):
+    cache = SQLiteImageCache(db_dir=str(tmp_path))
+    monkeypatch.setattr(product_api, "IMAGE_CACHE_ENABLED", True)
+    monkeypatch.setattr(product_api, "_image_cache", cache)
+    # The local server is plain http; production URLs are upgraded to https
+    monkeypatch.setattr(product_api, "_normalize_url", lambda url: url.strip() if isinstance(url, str) else "")
+    # A session without retry backoff, so each failure is seen once
+    monkeypatch.setattr(http_client, "_session", requests.Session())
+    return cache
+
+
+async def _run_async(coroutine):
+    try:
+        return await coroutine
+    finally:
+        await close_async_session()
+
+
+@pytest.mark.parametrize("path", ["/throttled", "/unavailable"])
+def test_transient_page_failures_are_not_cached(server, image_cache, path):
+    url = server + path
+    assert product_api._cached_og_image(url) == ""
+    assert image_cache.get(SQLiteImageCache.OG_IMAGE, url) is None
+
+    assert asyncio.run(_run_async(product_api._cached_og_image_async(url))) == ""
+    assert image_cache.get(SQLiteImageCache.OG_IMAGE, url) is None
+
+
+@pytest.mark.parametrize("path", ["/throttled", "/unavailable"])
+def test_transient_image_failures_are_not_cached(server, image_cache, path):
+    url = server + path
+    assert product_api._cached_is_renderable(url) is False
+    assert image_cache.get(SQLiteImageCache.RENDERABLE, url) is None
+
+    assert asyncio.run(_run_async(product_api._cached_is_renderable_async(url))) is False
+    assert image_cache.get(SQLiteImageCache.RENDERABLE, url) is None
+
+
+def test_connection_failures_are_not_cached(image_cache):
+    # Nothing listens on port 9 locally
+    url = "http://127.0.0.1:9/page"
+    assert product_api._cached_og_image(url) == ""
+    assert product_api._cached_is_renderable(url) is False
+    assert image_cache.get(SQLiteImageCache.OG_IMAGE, url) is None
+    assert image_cache.get(SQLiteImageCache.RENDERABLE, url) is None
+
+
+@pytest.mark.parametrize("path", ["/no-image-page", "/gone"])
+def test_pages_without_an_image_are_cached_as_misses(server, image_cache, path):
+    url = server + path
+    assert product_api._cached_og_image(url) == ""
+    assert image_cache.get(SQLiteImageCache.OG_IMAGE, url) == (False, "")
+
+
+@pytest.mark.parametrize("path", ["/no-image-page", "/gone"])
+def test_pages_without_an_image_are_cached_as_misses_async(server, image_cache, path):
+    url = server + path
+    assert asyncio.run(_run_async(product_api._cached_og_image_async(url))) == ""
+    assert image_cache.get(SQLiteImageCache.OG_IMAGE, url) == (False, "")
+
+
+def test_found_images_are_cached(server, image_cache):
+    page, image = server + "/page", server + "/image.png"
+    assert product_api._cached_og_image(page) == "https://cdn.example.com/p.jpg"
+    assert image_cache.get(SQLiteImageCache.OG_IMAGE, page) == (True, "https://cdn.example.com/p.jpg")
+    assert product_api._cached_is_renderable(image) is True
+    assert image_cache.get(SQLiteImageCache.RENDERABLE, image)[0] is True
+
+
+def test_non_image_content_is_cached_as_not_renderable(server, image_cache):
+    url = server + "/not-an-image"
+    assert asyncio.run(_run_async(product_api._cached_is_renderable_async(url))) is False
+    assert image_cache.get(SQLiteImageCache.RENDERABLE, url)[0] is False
+
+
+def test_public_fetchers_keep_their_return_types(server, image_cache):
+    assert product_api.get_og_image(server + "/unavailable") == ""
+    assert product_api.is_renderable_image_url(server + "/unavailable") is False
+    assert product_api.get_og_image(server + "/page") == "https://cdn.example.com/p.jpg"
+    assert product_api.is_renderable_image_url(server + "/image.png") is True
+
+
+@pytest.fixture
+def serpapi_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_FACTOR", 0)
+    product_api.set_serpapi_call_hook(lambda: calls.append(True))
+    yield calls
+    product_api.set_serpapi_call_hook(None)
+
+
+@pytest.mark.parametrize("path, attempts", [("/search.json", 1), ("/unavailable", http_client.HTTP_MAX_RETRIES + 1)])
+def test_serpapi_hook_runs_for_every_attempt(server, serpapi_calls, monkeypatch, path, attempts):
+    monkeypatch.setattr(product_api, "SERPAPI_URL", server + path)
+    if path == "/unavailable":
+        with pytest.raises(requests.HTTPError):
+            product_api._serpapi_search({"q": "lipstick"})
+    else:
+        assert product_api._serpapi_search({"q": "lipstick"}) == {"shopping_results": []}
+    assert len(serpapi_calls) == attempts
+
+
+@pytest.mark.parametrize("path, attempts", [("/search.json", 1), ("/unavailable", http_client.HTTP_MAX_RETRIES + 1)])
+def test_serpapi_hook_runs_for_every_async_attempt(server, serpapi_calls, monkeypatch, path, attempts):
+    monkeypatch.setattr(product_api, "SERPAPI_URL", server + path)
+    search = _run_async(product_api._serpapi_search_async({"q": "lipstick"}))
+    if path == "/unavailable":
+        with pytest.raises(aiohttp.ClientResponseError):
+            asyncio.run(search)
+    else:
+        assert asyncio.run(search) == {"shopping_results": []}
+    assert len(serpapi_calls) == attempts
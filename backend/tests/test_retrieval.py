@@ -0,0 +1,307 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from langchain_community.vectorstores import FAISS
+
+import services.lexical_index as lexical_index
+import services.metadata_filter as metadata_filter
+import services.retrieval as retrieval
+from conftest import product_rows
+from services.ann_index import create_index, index_config_from_env
+from services.csv_loader import frame_to_documents
+from services.lexical_index import LexicalIndex, load_lexical_index, reciprocal_rank_fusion
+from services.metadata_filter import MetadataIndex, filter_key, filtered_search
+
+ROWS = 2000
+DIM = 16
+BRANDS = ["Maybelline", " NYX\n", "Milani", "e.l.f."]
+TYPES = ["\nLipstick\n", "Mascara", "Foundation", "Blush", "Bronzer"]
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return np.random.default_rng(0).standard_normal((ROWS, DIM)).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def metadata_index():
+    columns = {
+        "brand": [BRANDS[row % len(BRANDS)] for row in range(ROWS)],
+        "product_type": [TYPES[row % len(TYPES)] for row in range(ROWS)],
+    }
+    return MetadataIndex(columns, ROWS)
+
+
+@pytest.fixture(scope="module", params=["flat", "ivf-flat", "hnsw"])
+def index(request, vectors):
+    config = {**index_config_from_env(), "type": request.param, "nlist": 0, "nprobe": 4}
+    return create_index(vectors, config)
+
+
+def _exact_rows(vectors, query, mask, k):
+    rows = np.flatnonzero(mask)
+    distances = ((vectors[rows] - query) ** 2).sum(axis=1)
+    return rows[np.argsort(distances)[:k]]
+
+
+def test_filter_key_normalizes_case_and_whitespace():
+    assert filter_key({"brand": [" NYX ", "nyx"], "product_type": ["\nLipstick\n"]}) == "brand=nyx;product_type=lipstick"
+    assert filter_key({"product_type": ["LIPSTICK"], "brand": ["Nyx"]}) == "brand=nyx;product_type=lipstick"
+    assert filter_key({"brand": [], "product_type": None}) == ""
+    assert filter_key(None) == ""
+
+
+def test_mask_combines_values_and_fields(metadata_index):
+    assert metadata_index.mask(None) is None
+    assert metadata_index.mask({"brand": [], "product_type": []}) is None
+
+    mask = metadata_index.mask({"brand": ["nyx", "MILANI"], "product_type": ["lipstick"]})
+    rows = np.flatnonzero(mask)
+    assert len(rows) > 0
+    assert all(row % len(BRANDS) in (1, 2) and row % len(TYPES) == 0 for row in rows)
+    assert mask.sum() == sum(
+        1 for row in range(ROWS) if row % len(BRANDS) in (1, 2) and row % len(TYPES) == 0
+    )
+
+
+def test_mask_rejects_unknown_field(metadata_index):
+    with pytest.raises(ValueError):
+        metadata_index.mask({"price": ["5"]})
+
+
+def test_filtered_search_returns_only_masked_rows(index, vectors, metadata_index):
+    mask = metadata_index.mask({"brand": ["nyx"]})
+    query = vectors[7] + 0.01
+
+    distances, rows = filtered_search(index, query, 10, mask)
+
+    assert len(rows) == 10
+    assert mask[rows].all()
+    assert list(distances) == sorted(distances)
+    # Few enough matches for approximate indexes to use the exact path
+    assert list(rows) == list(_exact_rows(vectors, query, mask, 10))
+
+
+def test_filtered_search_through_selector(index, vectors, metadata_index, monkeypatch):
+    # Force the in-index selector path for approximate indexes too
+    monkeypatch.setattr(metadata_filter, "FILTER_EXACT_MAX_ROWS", 0)
+    mask = metadata_index.mask({"product_type": ["mascara"]})
+
+    distances, rows = filtered_search(index, vectors[3], 10, mask)
+
+    assert len(rows) == 10
+    assert mask[rows].all()
+    assert list(distances) == sorted(distances)
+
+
+def test_filtered_search_returns_all_matches_when_fewer_than_k(index, vectors, monkeypatch):
+    # Five scattered rows: a one-cluster IVF probe or a short HNSW walk can't reach them all,
+    # so the exact fallback has to fill in
+    monkeypatch.setattr(metadata_filter, "FILTER_EXACT_MAX_ROWS", 0)
+    mask = np.zeros(ROWS, dtype=bool)
+    mask[[5, 400, 901, 1333, 1999]] = True
+    if hasattr(index, "nprobe"):
+        monkeypatch.setattr(index, "nprobe", 1)
+
+    distances, rows = filtered_search(index, vectors[0], 10, mask)
+
+    assert sorted(rows) == [5, 400, 901, 1333, 1999]
+    assert list(rows) == list(_exact_rows(vectors, vectors[0], mask, 10))
+
+
+def test_filtered_search_with_empty_mask(index, vectors, metadata_index):
+    mask = metadata_index.mask({"brand": ["no such brand"]})
+    assert not mask.any()
+
+    distances, rows = filtered_search(index, vectors[0], 5, mask)
+
+    assert len(distances) == 0
+    assert len(rows) == 0
+
+
+def test_ranked_retrieval_counts_one_refined_request(embeddings, monkeypatch):
+    # Random test vectors are barely similar to each other; keep every candidate
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MIN_SIMILARITY", -1.0)
+    monkeypatch.setattr(retrieval, "_refine_stats", dict.fromkeys(retrieval._refine_stats, 0))
+    documents = frame_to_documents(pd.DataFrame(product_rows(200)))
+    vector_store = FAISS.from_documents(documents, embeddings, ids=[d.metadata["id"] for d in documents])
+
+    query = documents[0].page_content
+    ranked = retrieval.retrieve_ranked_products(
+        vector_store, query, page_size=5, max_results=50, mode="vector", refine=True
+    )
+
+    stats = retrieval.get_retrieval_stats()
+    assert stats["requests"] == 1
+    assert stats["returned_per_request"] == 5
+    assert len(ranked) == 50
+    assert len({document.id for document in ranked}) == 50
+    # Deeper pages never reorder the first one
+    first_page = retrieval.retrieve_top_products(vector_store, query, 5, mode="vector", refine=True)
+    assert [d.id for d in ranked[:5]] == [d.id for d in first_page]
+
+
+LEXICAL_TEXTS = ["red lipstick", "red red mascara", "blue"]
+
+
+def _vector_store(embeddings, rows):
+    documents = frame_to_documents(pd.DataFrame(rows))
+    return FAISS.from_documents(documents, embeddings, ids=[d.metadata["id"] for d in documents])
+
+
+def test_bm25_weights_match_hand_computed_scores():
+    index = LexicalIndex.build(LEXICAL_TEXTS, k1=1.2, b=0.75)
+
+    # 3 documents of 2, 3 and 1 tokens: average length 2
+    idf_red = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    idf_lipstick = math.log(1 + (3 - 1 + 0.5) / (1 + 0.5))
+    red_in_0 = idf_red * 1 * 2.2 / (1 + 1.2 * (0.25 + 0.75 * 2 / 2))
+    red_in_1 = idf_red * 2 * 2.2 / (2 + 1.2 * (0.25 + 0.75 * 3 / 2))
+
+    scores, rows = index.search("Red", k=10)
+    assert list(rows) == [1, 0]
+    np.testing.assert_allclose(scores, [red_in_1, red_in_0], rtol=1e-6)
+
+    scores, rows = index.search("red lipstick", k=10)
+    assert list(rows) == [0, 1]
+    np.testing.assert_allclose(scores, [red_in_0 + idf_lipstick, red_in_1], rtol=1e-6)
+
+
+def test_lexical_search_only_returns_matching_rows():
+    index = LexicalIndex.build(LEXICAL_TEXTS)
+
+    assert list(index.search("red", k=1)[1]) == [1]
+    assert len(index.search("green", k=10)[1]) == 0
+    # Masked-out rows never match; unmatched rows never fill up k
+    mask = np.array([True, False, True])
+    assert sorted(index.search("red blue", k=10, mask=mask)[1]) == [0, 2]
+    assert len(index.search("mascara", k=10, mask=mask)[1]) == 0
+
+
+def test_lexical_index_save_load_round_trip(tmp_path, embeddings, monkeypatch, capsys):
+    vector_store = _vector_store(embeddings, product_rows(30))
+    built = LexicalIndex.from_vector_store(vector_store)
+    built.save(str(tmp_path))
+
+    loaded = LexicalIndex.load(str(tmp_path), vector_store, mmap=True)
+
+    assert isinstance(loaded.rows, np.memmap)
+    assert isinstance(loaded.weights, np.memmap)
+    assert loaded.covers(vector_store)
+    assert loaded.vocabulary == built.vocabulary
+    for query in ("NYX lipstick", "product 7", "mascara description"):
+        built_scores, built_rows = built.search(query, 10)
+        loaded_scores, loaded_rows = loaded.search(query, 10)
+        assert list(loaded_rows) == list(built_rows)
+        np.testing.assert_array_equal(loaded_scores, built_scores)
+    capsys.readouterr()
+    assert load_lexical_index(str(tmp_path), vector_store).covers(vector_store)
+    assert "Loaded BM25 index" in capsys.readouterr().out
+
+    # Weights are baked in: other BM25 settings make the saved index unusable
+    monkeypatch.setattr(lexical_index, "BM25_K1", 1.5)
+    assert LexicalIndex.load(str(tmp_path), vector_store) is None
+    assert load_lexical_index(str(tmp_path), vector_store).covers(vector_store)
+    assert "Built BM25 index" in capsys.readouterr().out
+
+
+def test_rrf_orders_by_summed_reciprocal_ranks():
+    # 3: 1/63 + 1/61 beats 2: 1/62 + 1/62
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 2, 4]], [1.0, 1.0], k=60) == [3, 2, 1, 4]
+    # Weights scale each ranking; zero drops it
+    assert reciprocal_rank_fusion([[1, 2], [2, 1]], [2.0, 1.0], k=60) == [1, 2]
+    assert reciprocal_rank_fusion([[1, 2], [3]], [0.0, 1.0], k=60) == [3]
+
+
+def test_rrf_ties_keep_first_seen_order():
+    assert reciprocal_rank_fusion([[1, 2], [2, 1]], [1.0, 1.0], k=60) == [1, 2]
+    assert reciprocal_rank_fusion([[5], [7]], [1.0, 1.0], k=60) == [5, 7]
+
+
+def test_hybrid_lifts_exact_brand_match_above_vector_ranking(embeddings):
+    # Small enough that the vector stage ranks every row, so the fused score always includes it
+    rows = product_rows(39) + [
+        {"ID": "40", "Brand": "Fenty Beauty", "Name": "Gloss Bomb", "Product": "Lip Gloss", "Description": "Shine"}
+    ]
+    vector_store = _vector_store(embeddings, rows)
+    query = "fenty beauty gloss bomb"
+
+    vector_ids = [d.id for d in retrieval.retrieve_top_products(vector_store, query, 5, mode="vector", refine=False)]
+    hybrid = retrieval.retrieve_top_products(
+        vector_store,
+        query,
+        5,
+        lexical_index=LexicalIndex.from_vector_store(vector_store),
+        mode="hybrid",
+        refine=False,
+    )
+
+    assert vector_ids[0] != "40"
+    assert hybrid[0].id == "40"
+    assert hybrid[0].metadata["brand"] == "Fenty Beauty"
+
+
+# Query along the first axis; cosine to it is the first coordinate
+REFINE_QUERY = [1.0, 0.0, 0.0, 0.0]
+REFINE_VECTORS = [
+    [0.9, 0.436, 0.0, 0.0],  # 0: best match
+    [0.89, 0.45, 0.05, 0.0],  # 1: near-duplicate of 0 (a shade of the same product)
+    [0.6, 0.0, 0.8, 0.0],  # 2
+    [0.1, 0.0, 0.0, 0.995],  # 3: below the similarity threshold
+    [0.5, -0.866, 0.0, 0.0],  # 4: unlike 0 and 1
+]
+
+
+@pytest.fixture
+def refine_index(monkeypatch):
+    monkeypatch.setattr(retrieval, "_refine_stats", dict.fromkeys(retrieval._refine_stats, 0))
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MIN_SIMILARITY", 0.2)
+    monkeypatch.setattr(retrieval, "RETRIEVAL_DUPLICATE_SIMILARITY", 0.97)
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MMR_LAMBDA", 1.0)
+    vectors = np.asarray(REFINE_VECTORS, dtype=np.float32)
+    return create_index(vectors / np.linalg.norm(vectors, axis=1, keepdims=True), {"type": "flat"})
+
+
+def test_refine_drops_weak_matches_and_near_duplicates(refine_index):
+    rows = retrieval.refine_candidates(refine_index, REFINE_QUERY, [0, 1, 2, 3, 4], limit=5)
+
+    assert list(rows) == [0, 2, 4]
+    stats = retrieval.get_retrieval_stats()
+    assert (stats["candidates"], stats["below_threshold"], stats["duplicates"], stats["returned"]) == (5, 1, 1, 3)
+
+
+def test_refine_keeps_rank_order_and_limit(refine_index):
+    assert list(retrieval.refine_candidates(refine_index, REFINE_QUERY, [4, 2, 0, 1], limit=5)) == [4, 2, 0]
+    assert list(retrieval.refine_candidates(refine_index, REFINE_QUERY, [0, 1, 2, 3, 4], limit=2)) == [0, 2]
+    # The better-ranked variant is the one kept
+    assert list(retrieval.refine_candidates(refine_index, REFINE_QUERY, [1, 0], limit=5)) == [1]
+    assert len(retrieval.refine_candidates(refine_index, REFINE_QUERY, [], limit=5)) == 0
+
+
+def test_refine_keeps_keyword_matches_below_threshold(refine_index):
+    rows = retrieval.refine_candidates(refine_index, REFINE_QUERY, [0, 1, 2, 3, 4], limit=5, keep=[3])
+
+    assert list(rows) == [0, 2, 3, 4]
+
+
+def test_refine_duplicate_threshold(refine_index, monkeypatch):
+    monkeypatch.setattr(retrieval, "RETRIEVAL_DUPLICATE_SIMILARITY", 1.01)
+    assert list(retrieval.refine_candidates(refine_index, REFINE_QUERY, [0, 1, 2, 3, 4], limit=5)) == [0, 1, 2, 4]
+
+    # Loose enough that 2 (cosine 0.54 to row 0) also counts as a variant of 0
+    monkeypatch.setattr(retrieval, "RETRIEVAL_DUPLICATE_SIMILARITY", 0.5)
+    assert list(retrieval.refine_candidates(refine_index, REFINE_QUERY, [0, 1, 2, 3, 4], limit=5)) == [0, 4]
+
+
+def test_refine_mmr_prefers_diverse_results(refine_index, monkeypatch):
+    monkeypatch.setattr(retrieval, "RETRIEVAL_DUPLICATE_SIMILARITY", 1.01)
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MMR_LAMBDA", 0.5)
+
+    rows = retrieval.refine_candidates(refine_index, REFINE_QUERY, [0, 1, 2, 3, 4], limit=5)
+
+    # 4 is least similar to 0, then 2; the near-copy of 0 comes last
+    assert list(rows) == [0, 4, 2, 1]
+    # MMR starts from the most relevant row wherever it was ranked
+    assert list(retrieval.refine_candidates(refine_index, REFINE_QUERY, [2, 4, 0], limit=1)) == [0]
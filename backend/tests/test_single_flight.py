@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+async def _until(condition, timeout_s: float = 2.0) -> None:
+    """Yield to the loop until condition() holds."""
+    deadline = asyncio.get_running_loop().time() + timeout_s
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_async_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.Event().wait()  # the leader never finishes on its own
+        return f"call {len(calls)}"
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("key", fetch))
+        await _until(lambda: flight.stats()["in_flight"] == 1)
+        follower = asyncio.create_task(flight.do_async("key", fetch))
+        await _until(lambda: flight.coalesced == 1)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.wait_for(follower, 2)
+
+    assert asyncio.run(main()) == "call 2"
+    assert flight.executed == 2
+
+
+def test_sync_follower_joins_async_leader():
+    flight = SingleFlight()
+    release = None
+
+    async def fetch():
+        await release.wait()
+        return "async result"
+
+    def fetch_sync():
+        raise AssertionError("the follower should reuse the leader's call")
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.create_task(flight.do_async("key", fetch))
+        await _until(lambda: flight.stats()["in_flight"] == 1)
+        follower = asyncio.ensure_future(asyncio.to_thread(flight.do, "key", fetch_sync))
+        await _until(lambda: flight.coalesced == 1)
+
+        release.set()
+        return await leader, await asyncio.wait_for(follower, 2)
+
+    assert asyncio.run(main()) == ("async result", "async result")
+    assert flight.executed == 1
+
+
+def test_errors_reach_followers_and_are_not_reused():
+    # A long linger would reuse a success; failures must still be retried
+    flight = SingleFlight(linger_s=60)
+    calls = []
+    release = None
+
+    async def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            await release.wait()
+            raise ValueError("upstream failed")
+        return "recovered"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.create_task(flight.do_async("key", fetch))
+        await _until(lambda: flight.stats()["in_flight"] == 1)
+        follower = asyncio.create_task(flight.do_async("key", fetch))
+        await _until(lambda: flight.coalesced == 1)
+
+        release.set()
+        results = await asyncio.gather(leader, follower, return_exceptions=True)
+        return results, await flight.do_async("key", fetch)
+
+    (leader_result, follower_result), retried = asyncio.run(main())
+    assert isinstance(leader_result, ValueError)
+    assert isinstance(follower_result, ValueError)
+    assert retried == "recovered"
+    assert flight.executed == 2
+
+
+def test_sync_errors_are_not_reused():
+    flight = SingleFlight(linger_s=60)
+
+    def fail():
+        raise ValueError("upstream failed")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "recovered") == "recovered"
@@ -1,5 +1,7 @@
 import { Platform } from "react-native";
 
+import { Product } from "../types/products";
+
 /**
  * Fetches product recommendations from the API based on a search query
  * 
@@ -33,4 +35,143 @@ export async function fetchRecommendations(query: string) {
   const data = await res.json();
   // console.log("Parsed API data:", JSON.stringify(data, null, 2));
   return data;
-}
\ No newline at end of file
+}
+/**
+ * Fetches recommendations for several queries in one request
+ * (e.g. prefetching the popular queries shown on the home screen)
+ *
+ * @param queries - Search queries (at most 32 per call)
+ * @returns Promise with one recommendation response per query, in order
+ * @throws Error when API request fails
+ */
+export async function fetchRecommendationsBatch(queries: string[]) {
+  const res = await fetch(`${API_BASE_URL}/api/recommendations/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ queries })
+  });
+
+  if (!res.ok) {
+    const text = await res.text().catch(() => "");
+    throw new Error(`Failed: ${res.status} ${res.statusText} ${text}`);
+  }
+
+  const data = await res.json();
+  return data.results;
+}
+
+/**
+ * Fetches the next page of a search's results
+ *
+ * @param cursor - `next_cursor` from the previous page (null once there are no more)
+ * @returns Promise with the page's recommendation data and its own `next_cursor`
+ * @throws Error when API request fails (status 410: the cursor expired, search again)
+ */
+export async function fetchRecommendationsPage(
+  cursor: string,
+): Promise<RecommendationResponse> {
+  const res = await fetch(
+    `${API_BASE_URL}/api/recommendations/page?cursor=${encodeURIComponent(cursor)}`,
+  );
+
+  if (!res.ok) {
+    const text = await res.text().catch(() => "");
+    const error = new Error(`Failed: ${res.status} ${res.statusText} ${text}`);
+    if (res.status === 410) error.name = "CursorExpiredError";
+    throw error;
+  }
+
+  return res.json();
+}
+
+type RecommendationResponse = {
+  query: string;
+  products: Product[];
+  next_cursor: string | null;
+};
+
+type StreamEvent =
+  | { type: "products"; query: string; products: Product[] }
+  | { type: "product"; position: number; product: Product }
+  | { type: "done"; query: string; products: Product[]; next_cursor: string | null }
+  | { type: "error"; detail: string };
+
+/**
+ * Streams product recommendations: the retrieved products arrive first
+ * (without prices or images), each one is updated as its enrichment
+ * finishes, and the list is re-ordered once everything is in
+ *
+ * @param query - User's search input
+ * @param onUpdate - Called with the current product list after every update
+ * @returns `done`, a Promise with the final recommendation data, and
+ * `cancel()`, which aborts the request (the server stops enriching; `done`
+ * rejects with an AbortError)
+ */
+export function streamRecommendations(
+  query: string,
+  onUpdate: (products: Product[]) => void,
+) {
+  const xhr = new XMLHttpRequest();
+  let products: Product[] = [];
+  let consumed = 0;
+
+  const done = new Promise<RecommendationResponse>((resolve, reject) => {
+    let final: RecommendationResponse | null = null;
+
+    // Newline-delimited JSON: handle every complete line received so far
+    const consume = () => {
+      const text = xhr.responseText;
+      let newline = text.indexOf("\n", consumed);
+      while (newline !== -1) {
+        const line = text.slice(consumed, newline).trim();
+        consumed = newline + 1;
+        newline = text.indexOf("\n", consumed);
+        if (!line) continue;
+
+        const event = JSON.parse(line) as StreamEvent;
+        if (event.type === "error") {
+          reject(new Error(`Failed: ${event.detail}`));
+          xhr.abort();
+          return;
+        }
+        if (event.type === "product") {
+          products = products.slice();
+          products[event.position] = event.product;
+        } else {
+          products = event.products;
+        }
+        if (event.type === "done") {
+          final = { query: event.query, products, next_cursor: event.next_cursor };
+        }
+        onUpdate(products);
+      }
+    };
+
+    xhr.onprogress = consume;
+    xhr.onload = () => {
+      if (xhr.status < 200 || xhr.status >= 300) {
+        reject(new Error(`Failed: ${xhr.status} ${xhr.statusText} ${xhr.responseText}`));
+        return;
+      }
+      consume();
+      if (final) {
+        resolve(final);
+      } else {
+        reject(new Error("Failed: stream ended before the final results"));
+      }
+    };
+    xhr.onerror = () => reject(new Error("Failed: network error"));
+    xhr.onabort = () => {
+      const error = new Error("Recommendation stream cancelled");
+      error.name = "AbortError";
+      reject(error);
+    };
+  });
+
+  console.log('Streaming query:', query);
+  xhr.open("POST", `${API_BASE_URL}/api/recommendations/stream`);
+  xhr.setRequestHeader("Content-Type", "application/json");
+  xhr.send(JSON.stringify(query));
+
+  return { done, cancel: () => xhr.abort() };
+}
@@ -1,10 +1,17 @@
 import React, { useCallback, useEffect, useMemo, useState } from 'react';
-import { ImageBackground, StyleSheet, Text, View } from 'react-native';
+import {
+  ActivityIndicator,
+  ImageBackground,
+  StyleSheet,
+  Text,
+  View,
+} from 'react-native';
 
 // Styles
 import useResultsStyles from '../../styles/resultsScreenStyles';
 
 // Constants
+import colors from '../../constants/colors';
 import images from '../../constants/images';
 
 // UI Components
@@ -24,7 +31,9 @@ type ProductSelection = 'like' | 'dislike' | null;
 
 type ResultsScreenProps = {
   initialQuery: string;
+  isUpdating?: boolean;
   onBack: () => void;
+  onEndReached?: () => void;
   onProductClick: (productId: string) => void;
   products: Product[];
   updateSelections: (productId: string, selection: ProductSelection) => void;
@@ -37,7 +46,9 @@ type ResultsScreenProps = {
  * - Allows users to refine results via follow-up search
  *
  * @param initialQuery - The original search query that triggered these results
+ * @param isUpdating - True while streamed products are still being enriched
  * @param onBack - Callback function triggered when back button is pressed
+ * @param onEndReached - Callback function triggered near the end of the list (loads the next page)
  * @param onProductClick - Callback function triggered when a product is clicked
  * @param products - Array of product data to display
  * @param updateSelections - Function to update user's like/dislike selections
@@ -46,7 +57,9 @@ type ResultsScreenProps = {
 
 export function ResultsScreen({
   initialQuery,
+  isUpdating = false,
   onBack,
+  onEndReached,
   onProductClick,
   products,
   updateSelections,
@@ -92,12 +105,14 @@ export function ResultsScreen({
       <View style={styles.header.container}>
         <BackButton onPress={onBack} style={styles.backButton} />
         <Text style={styles.header.title}>Curated for You</Text>
+        {isUpdating && <ActivityIndicator color={colors.RESULTS.TITLE} />}
       </View>
 
       {/* Product Results */}
       <ProductList
         products={listData}
         onProductPress={onProductClick}
+        onEndReached={onEndReached}
         updateSelections={updateSelections}
         style={styles.products}
         cardStyle={styles.productCard}
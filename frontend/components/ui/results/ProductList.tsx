@@ -9,6 +9,7 @@ type ProductSelection = 'like' | 'dislike' | null;
 type ProductListProps = {
   products: Product[];
   onProductPress: (productId: string) => void;
+  onEndReached?: () => void;
   updateSelections: (productId: string, selection: ProductSelection) => void;
   style: {
     listContent: ViewStyle;
@@ -24,10 +25,13 @@ const INITIAL_NUM_TO_RENDER = 4;
 const MAX_TO_RENDER_PER_BATCH = 4;
 const UPDATE_CELLS_BATCHING_PERIOD = 50;
 const WINDOW_SIZE = 6;
+// Ask for the next page when within half a screen of the end
+const END_REACHED_THRESHOLD = 0.5;
 
 export default function ProductList({
   products,
   onProductPress,
+  onEndReached,
   updateSelections,
   style,
   cardStyle,
@@ -72,6 +76,8 @@ export default function ProductList({
       maxToRenderPerBatch={MAX_TO_RENDER_PER_BATCH}
       updateCellsBatchingPeriod={UPDATE_CELLS_BATCHING_PERIOD}
       windowSize={WINDOW_SIZE}
+      onEndReached={onEndReached}
+      onEndReachedThreshold={END_REACHED_THRESHOLD}
       ItemSeparatorComponent={() => <View style={{ height: CARD_SPACING }} />}
       removeClippedSubviews
     />